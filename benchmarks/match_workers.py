@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   Benchmark of match_dataset with a growing number of worker processes
+#   Usage: python benchmarks/match_workers.py [num_detections]
+#
+import random
+import sys
+import time
+import brambox.boxes as bbb
+from brambox.boxes.statistics.match import match_dataset
+
+
+def random_dataset(num_detections, boxes_per_image=50, seed=0):
+    """ Create random detections and annotations, with ``boxes_per_image`` detections and half as many annotations per image """
+    rng = random.Random(seed)
+    detections = {}
+    annotations = {}
+    for i in range(num_detections // boxes_per_image):
+        image_id = f'img_{i:06d}'
+        annotations[image_id] = []
+        for _ in range(boxes_per_image // 2):
+            anno = bbb.Annotation()
+            anno.class_label = rng.choice(('person', 'car', 'bike'))
+            anno.x_top_left = rng.uniform(0, 600)
+            anno.y_top_left = rng.uniform(0, 400)
+            anno.width = rng.uniform(10, 80)
+            anno.height = rng.uniform(10, 80)
+            annotations[image_id].append(anno)
+
+        detections[image_id] = []
+        for _ in range(boxes_per_image):
+            det = bbb.Detection()
+            det.class_label = rng.choice(('person', 'car', 'bike'))
+            det.x_top_left = rng.uniform(0, 600)
+            det.y_top_left = rng.uniform(0, 400)
+            det.width = rng.uniform(10, 80)
+            det.height = rng.uniform(10, 80)
+            det.confidence = rng.random()
+            detections[image_id].append(det)
+
+    return detections, annotations
+
+
+def timed(detections, annotations, workers):
+    start = time.perf_counter()
+    match_dataset(detections, annotations, 0.5, workers=workers)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    num_detections = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    detections, annotations = random_dataset(num_detections)
+    inputs = {
+        'dict': (detections, annotations),
+        'BoxSet': (bbb.BoxSet.from_dict(detections), bbb.BoxSet.from_dict(annotations)),
+    }
+
+    for name, (det, anno) in inputs.items():
+        serial = timed(det, anno, None)
+        print(f'{name:>6} | serial    | {serial:6.2f}s')
+        for workers in (2, 4, 8):
+            duration = timed(det, anno, workers)
+            print(f'{name:>6} | {workers} workers | {duration:6.2f}s | speedup {serial / duration:4.2f}x')
@@ -5,9 +5,10 @@ This package contains parsers for various annotation and detection formats.
 You can use this package to convert formats, visualize image annotations and compute statistics on your detections.
 """
 
-from .box import Box, ParserType
+from .box import Box, ParserType, BoxSelection
 from .annotations import Annotation
 from .detections import Detection
+from .boxset import BoxSet
 
 from .formats import *
 from . import annotations
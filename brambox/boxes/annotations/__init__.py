@@ -11,6 +11,7 @@ from .cvc import *
 from .darknet import *
 from .dollar import *
 from .kitti import *
+from .npz import *
 from .pascalvoc import *
 from .pickle import *
 from .vatic import *
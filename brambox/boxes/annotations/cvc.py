@@ -8,6 +8,7 @@ CVC
 ---
 """
 
+import numpy as np
 from .annotation import *
 
 __all__ = ['CvcAnnotation', 'CvcParser']
@@ -83,3 +84,35 @@ class CvcParser(Parser):
 
     parser_type = ParserType.MULTI_FILE
     box_type = CvcAnnotation
+
+    def deserialize_columns(self, strings):
+        """ Deserialize the contents of multiple CVC files at once """
+        from ..boxset import BoxSet, NO_OBJECT_ID
+
+        split = self.split_lines(strings, 11)
+        if split is None:
+            return super().deserialize_columns(strings)
+        values, counts = split
+
+        try:
+            x_center = np.array(values[0::11], dtype=np.float64)
+            y_center = np.array(values[1::11], dtype=np.float64)
+            width = np.array(values[2::11], dtype=np.float64)
+            height = np.array(values[3::11], dtype=np.float64)
+            object_id = np.fromiter(map(int, values[9::11]), np.int64, len(x_center))
+        except (ValueError, OverflowError):
+            return super().deserialize_columns(strings)
+
+        return BoxSet.from_columns(
+            self.box_type,
+            range(len(strings)),
+            counts,
+            [''] * len(x_center),
+            {
+                'x_top_left': x_center - width / 2,
+                'y_top_left': y_center - height / 2,
+                'width': width,
+                'height': height,
+                'object_id': np.where(object_id < 0, NO_OBJECT_ID, object_id),
+            },
+        )
@@ -8,6 +8,7 @@ Darknet
 -------
 """
 import logging
+import numpy as np
 from .annotation import *
 
 __all__ = ['DarknetAnnotation', 'DarknetParser']
@@ -154,3 +155,37 @@ class DarknetParser(Parser):
             ]
 
         return result
+
+    def deserialize_columns(self, strings):
+        """ Deserialize the contents of multiple darknet files at once """
+        from ..boxset import BoxSet
+
+        split = self.split_lines(strings, 5)
+        if split is None:
+            return super().deserialize_columns(strings)
+        values, counts = split
+
+        try:
+            if self.class_label_map is not None:
+                class_labels = [self.class_label_map[int(i)] for i in values[0::5]]
+            else:
+                class_labels = ['' if i == '?' else i for i in values[0::5]]
+            x_center = np.array(values[1::5], dtype=np.float64) * self.image_width
+            y_center = np.array(values[2::5], dtype=np.float64) * self.image_height
+            width = np.array(values[3::5], dtype=np.float64) * self.image_width
+            height = np.array(values[4::5], dtype=np.float64) * self.image_height
+        except (ValueError, IndexError):
+            return super().deserialize_columns(strings)
+
+        return BoxSet.from_columns(
+            self.box_type,
+            range(len(strings)),
+            counts,
+            class_labels,
+            {
+                'x_top_left': x_center - width / 2,
+                'y_top_left': y_center - height / 2,
+                'width': width,
+                'height': height,
+            },
+        )
@@ -9,6 +9,7 @@ Dollar
 ------
 """
 import logging
+import numpy as np
 from .annotation import *
 
 __all__ = ['DollarAnnotation', 'DollarParser']
@@ -126,3 +127,44 @@ class DollarParser(Parser):
                 result += [anno.deserialize(line, self.occlusion_tag_map)]
 
         return result
+
+    def deserialize_columns(self, strings):
+        """ Deserialize the contents of multiple dollar files at once """
+        from ..boxset import BoxSet
+
+        split = self.split_lines(strings, 12, '%')
+        if split is None:
+            return super().deserialize_columns(strings)
+        values, counts = split
+
+        try:
+            columns = {
+                name: np.array(values[i::12], dtype=np.float64)
+                for i, name in (
+                    (1, 'x_top_left'),
+                    (2, 'y_top_left'),
+                    (3, 'width'),
+                    (4, 'height'),
+                    (6, 'visible_x_top_left'),
+                    (7, 'visible_y_top_left'),
+                    (8, 'visible_width'),
+                    (9, 'visible_height'),
+                )
+            }
+            if self.occlusion_tag_map is None:
+                columns['occluded_fraction'] = np.array(values[5::12], dtype=str) != '0'
+            else:
+                columns['occluded_fraction'] = [
+                    self.occlusion_tag_map[int(tag)] for tag in values[5::12]
+                ]
+        except (ValueError, IndexError):
+            return super().deserialize_columns(strings)
+        columns['lost'] = np.array(values[10::12], dtype=str) != '0'
+
+        return BoxSet.from_columns(
+            self.box_type,
+            range(len(strings)),
+            counts,
+            ['' if label == '?' else label for label in values[0::12]],
+            columns,
+        )
@@ -7,6 +7,7 @@ from .cvc import CvcParser
 from .darknet import DarknetParser
 from .dollar import DollarParser
 from .kitti import KittiParser
+from .npz import NpzParser
 from .pascalvoc import PascalVocParser
 from .pickle import PickleParser
 from .vatic import VaticParser
@@ -20,6 +21,7 @@ annotation_formats = {
     'darknet': DarknetParser,
     'dollar': DollarParser,
     'kitti': KittiParser,
+    'npz': NpzParser,
     'pickle': PickleParser,
     'pascalvoc': PascalVocParser,
     'vatic': VaticParser,
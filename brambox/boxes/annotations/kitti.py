@@ -8,6 +8,7 @@ KITTI
 -----
 """
 
+import numpy as np
 from .annotation import *
 
 __all__ = ['KittiAnnotation', 'KittiParser']
@@ -97,3 +98,39 @@ class KittiParser(Parser):
 
     parser_type = ParserType.MULTI_FILE
     box_type = KittiAnnotation
+
+    def deserialize_columns(self, strings):
+        """ Deserialize the contents of multiple KITTI files at once """
+        from ..boxset import BoxSet
+
+        split = self.split_lines(strings, 15)
+        if split is None:
+            return super().deserialize_columns(strings)
+        values, counts = split
+
+        try:
+            truncated = np.array(values[1::15], dtype=np.float64)
+            x_top_left = np.array(values[4::15], dtype=np.float64)
+            y_top_left = np.array(values[5::15], dtype=np.float64)
+            x_bottom_right = np.array(values[6::15], dtype=np.float64)
+            y_bottom_right = np.array(values[7::15], dtype=np.float64)
+        except ValueError:
+            return super().deserialize_columns(strings)
+        occluded = np.array(values[2::15], dtype=str)
+
+        return BoxSet.from_columns(
+            self.box_type,
+            range(len(strings)),
+            counts,
+            ['' if label == '?' else label for label in values[0::15]],
+            {
+                'truncated_fraction': np.maximum(truncated, 0.0),
+                'x_top_left': x_top_left,
+                'y_top_left': y_top_left,
+                'width': x_bottom_right - x_top_left,
+                'height': y_bottom_right - y_top_left,
+                'occluded_fraction': np.select(
+                    [occluded == '1', occluded == '2'], [0.25, 0.5], 0.0
+                ),
+            },
+        )
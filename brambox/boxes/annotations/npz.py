@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+"""
+Numpy
+-----
+"""
+
+import io
+from .annotation import *
+
+__all__ = ['NpzParser']
+
+
+class NpzParser(Parser):
+    """
+    This parser generates a binary columnar file of your annotations, which can be opened almost instantly.
+    Instead of storing one python object per annotation, the file contains an array for every attribute,
+    together with the offsets of the annotations of every image and tables with the image identifiers and class labels
+    (see :func:`brambox.boxes.BoxSet.save`).
+
+    When parsing a file from disk, the arrays are memory mapped and the parser returns a :class:`~brambox.boxes.BoxSet`,
+    so the annotations only get read when you use them.
+    Use ``columnar=True`` in :func:`~brambox.boxes.parse` to keep this lazy set,
+    otherwise it gets converted to a regular dictionary.
+
+    Note:
+        The image identifiers should either all be strings or all be integers
+        and the object identifiers should be integers or **None**.
+    """
+
+    parser_type = ParserType.SINGLE_FILE
+    box_type = Annotation
+    extension = '.npz'
+    read_mode = 'rb'
+    write_mode = 'wb'
+    columnar = True
+
+    def serialize(self, annotations):
+        """ Serialize input dictionary of annotations into one bytestream """
+        result = io.BytesIO()
+        self._boxset(annotations).save(result)
+        return result.getvalue()
+
+    def deserialize(self, bytestream):
+        """ Deserialize a bytestream into a set of annotations """
+        from ..boxset import BoxSet
+
+        return BoxSet.load(io.BytesIO(bytestream), self.box_type, None)
+
+    def deserialize_file(self, f, image_filter=None):
+        """ Memory map a file into a set of annotations """
+        from ..boxset import BoxSet
+
+        boxes = BoxSet.load(f, self.box_type)
+        if image_filter is not None:
+            boxes = boxes.take(
+                [img_id for img_id in boxes.image_ids if image_filter(img_id)]
+            )
+
+        return boxes
+
+    def scan_image_ids(self, f):
+        """ Get the image identifiers of a file, without reading the annotations """
+        from ..boxset import BoxSet
+
+        return BoxSet.load(f, self.box_type).image_ids
+
+    def _boxset(self, annotations):
+        """ Convert annotations to a set of ``box_type`` boxes """
+        from ..boxset import BoxSet
+
+        if isinstance(annotations, BoxSet) and issubclass(
+            annotations.box_type, self.box_type
+        ):
+            return annotations
+
+        return BoxSet.from_dict(
+            {
+                img_id: [
+                    box if isinstance(box, self.box_type) else self.box_type.create(box)
+                    for box in boxes
+                ]
+                for img_id, boxes in annotations.items()
+            },
+            self.box_type,
+        )
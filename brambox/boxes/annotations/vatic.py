@@ -8,6 +8,7 @@ Vatic
 -----
 """
 
+from ..box import LineParser
 from .annotation import *
 
 __all__ = ['VaticAnnotation', 'VaticParser']
@@ -61,7 +62,7 @@ class VaticAnnotation(Annotation):
             self.class_label = ''
 
 
-class VaticParser(Parser):
+class VaticParser(LineParser, Parser):
     """
     This parser is designed to parse the standard VATIC_ video annotation tool text files.
     The VATIC format contains all annotation from multiple images into one file.
@@ -108,17 +109,21 @@ class VaticParser(Parser):
 
         return '\n'.join(result)
 
-    def deserialize(self, string):
-        """ deserialize a string containing the content of a VATIC .txt file """
-
-        result = {}
-        for line in string.splitlines():
-            img_id = line.split()[5]
-            if img_id not in result:
-                result[img_id] = []
-
-            anno = self.box_type()
-            anno.deserialize(line)
-            result[img_id] += [anno]
-
-        return result
+    def iter_serialize(self, items):
+        """ Serialize input annotations per image into VATIC annotation strings """
+        separator = ''
+        for img_id, annos in items:
+            result = [self.box_type.create(anno).serialize(img_id) for anno in annos]
+            if len(result) > 0:
+                yield separator + '\n'.join(result)
+                separator = '\n'
+
+    def _line_image_id(self, line):
+        """ Get the image identifier of one line """
+        return line.split()[5]
+
+    def _deserialize_line(self, line):
+        """ deserialize one line into an image identifier and annotation """
+        anno = self.box_type()
+        anno.deserialize(line)
+        return line.split()[5], anno
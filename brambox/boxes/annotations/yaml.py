@@ -8,6 +8,8 @@ YAML
 ----
 """
 import logging
+from collections.abc import ItemsView
+from operator import itemgetter
 import yaml
 from .annotation import *
 
@@ -120,24 +122,65 @@ class YamlParser(Parser):
         """ Serialize input dictionary of annotations into one string """
         result = {}
         for img_id in annotations:
-            img_res = {}
-            for anno in annotations[img_id]:
-                new_anno = self.box_type.create(anno)
-                key, val = new_anno.serialize()
-                if key not in img_res:
-                    img_res[key] = [val]
-                else:
-                    img_res[key].append(val)
-            result[img_id] = img_res
+            result[img_id] = self._serialize_image(annotations[img_id])
 
         return yaml.dump(result)
 
+    def iter_serialize(self, items):
+        """ Serialize input annotations per image into yaml mappings.
+        The items of a dictionary are sorted by image identifier, like :func:`serialize`,
+        other iterables are written in their order.
+        """
+        if isinstance(items, ItemsView):
+            items = sorted(items, key=itemgetter(0))
+        empty = True
+        for img_id, annotations in items:
+            empty = False
+            yield yaml.dump({img_id: self._serialize_image(annotations)})
+
+        # An empty mapping, so that the file can be parsed again
+        if empty:
+            yield yaml.dump({})
+
+    def _serialize_image(self, annotations):
+        """ Serialize the annotations of one image into a dictionary per class label """
+        img_res = {}
+        for anno in annotations:
+            new_anno = self.box_type.create(anno)
+            key, val = new_anno.serialize()
+            if key not in img_res:
+                img_res[key] = [val]
+            else:
+                img_res[key].append(val)
+
+        return img_res
+
     def deserialize(self, string):
         """ Deserialize an annotation file into a dictionary of annotations """
-        yml_obj = yaml.load(string)
+        return self._deserialize_images(yaml.load(string))
+
+    def deserialize_file(self, f, image_filter=None):
+        """ Deserialize an annotation file, only creating the annotations of the images that pass the filter """
+        return self._deserialize_images(yaml.load(f), image_filter)
+
+    def deserialize_selection(self, f, select, image_filter=None):
+        """ Deserialize an annotation file, only creating the annotations of the selected images """
+        return self._deserialize_images(yaml.load(f), image_filter, select)
+
+    def _deserialize_images(self, yml_obj, image_filter=None, select=None):
+        """ Create the annotations of every image in a loaded yaml object """
+        if yml_obj is None:  # Empty file
+            yml_obj = {}
+        img_ids = [
+            img_id
+            for img_id in yml_obj
+            if image_filter is None or image_filter(img_id)
+        ]
+        if select is not None:
+            img_ids = select(img_ids)
 
         result = {}
-        for img_id in yml_obj:
+        for img_id in img_ids:
             anno_res = []
             for class_label, annotations in yml_obj[img_id].items():
                 for anno_yml in annotations:
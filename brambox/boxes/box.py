@@ -3,9 +3,11 @@
 #   Copyright EAVISE
 #
 
+import heapq
 from enum import Enum
+import numpy as np
 
-__all__ = ['Box', 'ParserType', 'Parser']
+__all__ = ['Box', 'ParserType', 'Parser', 'LineParser', 'BoxSelection']
 
 
 class Box:
@@ -92,6 +94,8 @@ class Parser:
     extension = '.txt'  #: Extension of the files this parser parses or creates. Derived classes should set the correct extension.
     read_mode = 'r'  #: Reading mode this parser uses when it parses a file. Derived classes should set the correct mode.
     write_mode = 'w'  #: Writing mode this parser uses when it generates a file. Derived classes should set the correct mode.
+    columnar = False  #: Whether :func:`serialize` writes a :class:`~brambox.boxes.BoxSet` straight from its arrays, so that :func:`~brambox.boxes.generate` passes it without creating box objects.
+    selection = None  #: :class:`~brambox.boxes.BoxSelection` of the boxes to keep when deserializing a file; set by :func:`~brambox.boxes.parse`
 
     def __init__(self, **kwargs):
         pass
@@ -148,3 +152,393 @@ class Parser:
             result += [self.box_type.create(line)]
 
         return result
+
+    def deserialize_file(self, f, image_filter=None):
+        """ File deserialization function that can be overloaded in the derived class.
+        This function gets called by :func:`~brambox.boxes.parse` with the opened bounding box file.
+        The default implementation reads the entire file and calls :func:`deserialize`.
+
+        Args:
+            f (file): Opened file to deserialize
+            image_filter (function, optional): Only keep images for which this function returns **True** (only for :any:`brambox.boxes.ParserType.SINGLE_FILE`); Default **None**
+
+        Returns:
+            box: Bounding box objects, in the same format as :func:`deserialize`
+
+        Note:
+            Line based :any:`brambox.boxes.ParserType.SINGLE_FILE` parsers overload this function with :class:`LineParser`
+            and deserialize the file line by line, while reading it in chunks.
+            This means they never need to keep the entire file in memory.
+            They also evaluate the ``image_filter`` before creating any bounding box,
+            so that loading a subset of the images costs proportionally less.
+
+        Note:
+            Parsers of detection formats can evaluate the :attr:`selection` on the raw values of every box,
+            before creating the bounding box objects.
+            Other parsers return all boxes and :func:`~brambox.boxes.parse` applies the selection afterwards.
+        """
+        result = self.deserialize(f.read())
+        if image_filter is not None:
+            result = {
+                img_id: boxes for img_id, boxes in result.items() if image_filter(img_id)
+            }
+
+        return result
+
+    def scan_image_ids(self, f):
+        """ Image identifier scanning function that can be overloaded in the derived class.
+        This function should return the image identifiers in a :any:`brambox.boxes.ParserType.SINGLE_FILE`, without deserializing the bounding boxes.
+        It is used to select images with the ``offset`` and ``stride`` arguments of :func:`~brambox.boxes.parse`,
+        before deserializing the file.
+
+        Args:
+            f (file): Opened file to scan
+
+        Returns:
+            list: Unique image identifiers in order of appearance or **None**, without reading from ``f``, if this parser cannot scan files; Default **None**
+        """
+        return None
+
+    def deserialize_selection(self, f, select, image_filter=None):
+        """ Selective deserialization function that can be overloaded in the derived class.
+        This function deserializes the images of a :any:`brambox.boxes.ParserType.SINGLE_FILE` that are chosen by ``select``.
+        It is used to select images with the ``offset`` and ``stride`` arguments of :func:`~brambox.boxes.parse`,
+        by parsers that need to load the entire file to know its image identifiers (eg. yaml),
+        so that they only create the bounding boxes of the selected images.
+        Parsers that can cheaply list the image identifiers implement :func:`scan_image_ids` instead.
+
+        Args:
+            f (file): Opened file to deserialize
+            select (function): Function that gets the identifiers of the images that pass the ``image_filter``, in order of appearance, and returns the identifiers to keep, in the order they should be returned
+            image_filter (function, optional): Only consider images for which this function returns **True**; Default **None**
+
+        Returns:
+            dict: Bounding boxes of the selected images or **None**, without reading from ``f``, if this parser cannot select images while deserializing; Default **None**
+        """
+        return None
+
+    def deserialize_columns(self, strings):
+        """ Columnar deserialization function that can be overloaded in the derived class.
+        This function deserializes the contents of multiple :any:`brambox.boxes.ParserType.MULTI_FILE` files at once,
+        into a :class:`~brambox.boxes.BoxSet`.
+        The default implementation calls :func:`deserialize` for every string and converts the result.
+
+        Args:
+            strings (list): Contents of the files to deserialize
+
+        Returns:
+            brambox.boxes.BoxSet: Bounding boxes, where the image identifiers are the indices of the strings
+
+        Note:
+            Parsers of whitespace separated text formats overload this function
+            and convert entire columns of values at once with numpy.
+            When a line does not have the expected number of values or cannot be converted,
+            they fall back to this implementation, so that errors are the same as with :func:`deserialize`.
+        """
+        from .boxset import BoxSet
+
+        return BoxSet.from_dict(
+            {i: self.deserialize(string) for i, string in enumerate(strings)},
+            self.box_type,
+        )
+
+    @staticmethod
+    def split_lines(strings, num_values, skip=None):
+        """ Split the lines of multiple strings into their whitespace separated values.
+
+        Args:
+            strings (list): Strings to split
+            num_values (int): Number of values every line should have
+            skip (str, optional): Lines containing this string are skipped; Default **None**
+
+        Returns:
+            tuple: **[values]**, **[number of lines per string]** or **None** if a line has a different number of values
+        """
+        values = []
+        counts = []
+        for string in strings:
+            count = 0
+            for line in string.splitlines():
+                if skip is not None and skip in line:
+                    continue
+                elements = line.split()
+                if len(elements) != num_values:
+                    return None
+                values.extend(elements)
+                count += 1
+            counts.append(count)
+
+        return values, counts
+
+    def iter_serialize(self, items):
+        """ Serialization generator that can be overloaded in the derived class.
+        This function serializes the bounding boxes of a :any:`brambox.boxes.ParserType.SINGLE_FILE` one image at a time
+        and yields pieces of the file, which can be written to the file before the next image is serialized.
+        The default implementation gathers all images in a dictionary and yields the result of :func:`serialize`.
+
+        Args:
+            items (iterable): ``(image_id, [box, box, ...])`` tuples
+
+        Yields:
+            string: Consecutive pieces of the serialized file
+        """
+        if self.parser_type != ParserType.SINGLE_FILE:
+            raise TypeError('iter_serialize only works with SINGLE_FILE parsers')
+
+        yield self.serialize(dict(items))
+
+    def iter_deserialize(self, f, image_filter=None):
+        """ Deserialization generator that can be overloaded in the derived class.
+        This function yields the bounding boxes of a :any:`brambox.boxes.ParserType.SINGLE_FILE` one image at a time.
+        The default implementation reads the entire file and yields the images returned by :func:`deserialize`.
+
+        Args:
+            f (file): Opened file to deserialize
+            image_filter (function, optional): Only yield images for which this function returns **True**; Default **None**
+
+        Yields:
+            tuple: **image_id**, **[box, box, ...]**
+
+        Note:
+            Line based parsers (see :class:`LineParser`) overload this function and read the file line by line.
+            They yield the boxes of every group of consecutive lines with the same image identifier,
+            so an image will be yielded multiple times if its lines are not consecutive in the file.
+        """
+        if self.parser_type != ParserType.SINGLE_FILE:
+            raise TypeError('iter_deserialize only works with SINGLE_FILE parsers')
+
+        yield from self.deserialize_file(f, image_filter).items()
+
+    @staticmethod
+    def merge_groups(groups):
+        """ Gather ``(image_id, [box, box, ...])`` tuples in a dictionary.
+
+        Args:
+            groups (iterable): ``(image_id, [box, box, ...])`` tuples, where an image identifier can occur multiple times
+
+        Returns:
+            dict: Dictionary containing box objects per image ``{"image_id": [box, box, ...], ...}``, in order of first occurrence
+        """
+        result = {}
+        for img_id, boxes in groups:
+            if img_id in result:
+                result[img_id] += boxes
+            else:
+                result[img_id] = boxes
+
+        return result
+
+    @staticmethod
+    def group_consecutive(items):
+        """ Group consecutive ``(image_id, box)`` tuples with the same image identifier.
+
+        Args:
+            items (iterable): ``(image_id, box)`` tuples
+
+        Yields:
+            tuple: **image_id**, **[box, box, ...]**
+        """
+        group_id = None
+        group = []
+        for img_id, box in items:
+            if len(group) > 0 and img_id != group_id:
+                yield group_id, group
+                group = []
+            group_id = img_id
+            group.append(box)
+
+        if len(group) > 0:
+            yield group_id, group
+
+
+class LineParser:
+    """ Mixin for :any:`brambox.boxes.ParserType.SINGLE_FILE` parsers, where every line of the file contains one bounding box.
+    It implements the deserialization functions of :class:`Parser` by reading the file line by line,
+    so that derived classes only need to implement :func:`_line_image_id` and :func:`_deserialize_line`.
+
+    Example:
+        >>> class MyParser(LineParser, Parser):
+        ...     def _line_image_id(self, line):
+        ...         return line.split()[0]
+        ...     def _deserialize_line(self, line):
+        ...         box = self.box_type()
+        ...         box.deserialize(line)
+        ...         return line.split()[0], box
+    """
+
+    comment = None  #: Lines starting with this string are skipped; Default **None**
+    _line_values = None  #: Function that gets the image identifier, class label and confidence of a line, to evaluate the :attr:`selection` before creating the boxes; Default **None**
+
+    def deserialize(self, string):
+        """ Deserialize a string line by line into a dictionary of boxes """
+        return self.merge_groups(
+            self.group_consecutive(
+                self._deserialize_line(line) for line in self._lines(string.splitlines())
+            )
+        )
+
+    def deserialize_file(self, f, image_filter=None):
+        """ Deserialize a file line by line into a dictionary of boxes """
+        if self.selection is None or self._line_values is None:
+            return self.merge_groups(self.iter_deserialize(f, image_filter))
+
+        # Select the lines before creating any box
+        selected = self.selection.select(
+            (*self._line_values(line), line)
+            for line in self._filter_lines(self._lines(f), image_filter)
+        )
+        return {
+            img_id: [self._deserialize_line(line)[1] for line in lines]
+            for img_id, lines in selected.items()
+        }
+
+    def iter_deserialize(self, f, image_filter=None):
+        """ Deserialize a file line by line and yield the boxes per group of consecutive lines of the same image """
+        lines = self._filter_lines(self._lines(f), image_filter)
+        return self.group_consecutive(self._deserialize_line(line) for line in lines)
+
+    def scan_image_ids(self, f):
+        """ Get the image identifiers of a file, without deserializing the boxes """
+        return list(dict.fromkeys(self._line_image_id(line) for line in self._lines(f)))
+
+    def _lines(self, f):
+        """ Iterate over the lines of a file, without newline characters and comments """
+        lines = (line.rstrip('\n') for line in f)
+        if self.comment is None:
+            return lines
+        return (line for line in lines if not line.startswith(self.comment))
+
+    def _filter_lines(self, lines, image_filter):
+        """ Only keep the lines of the images that pass the filter """
+        if image_filter is None:
+            return lines
+        return (line for line in lines if image_filter(self._line_image_id(line)))
+
+    def _line_image_id(self, line):
+        """ Get the image identifier of one line, without deserializing the box """
+        raise NotImplementedError
+
+    def _deserialize_line(self, line):
+        """ Deserialize one line into an image identifier and box """
+        raise NotImplementedError
+
+
+class BoxSelection:
+    """ Selection of the bounding boxes to keep while parsing.
+    This class gets created by :func:`~brambox.boxes.parse` and is stored as the ``selection`` of the parser,
+    so that parsers can drop boxes before creating the bounding box objects.
+
+    Args:
+        min_confidence (Number, optional): Only keep boxes with a confidence of at least this value; Default **None**
+        class_labels (list, optional): Only keep boxes with one of these class labels; Default **None**
+        top_k (int, optional): Only keep the boxes with the k highest confidences of every image; Default **None**
+
+    Note:
+        The ``min_confidence`` and ``top_k`` arguments only work with detections, as annotations have no confidence. |br|
+        Boxes with the same confidence are kept in order of appearance
+        and the selected boxes of every image keep their original order.
+        Images without any selected boxes are kept, with an empty list of boxes.
+    """
+
+    def __init__(self, min_confidence=None, class_labels=None, top_k=None):
+        self.min_confidence = min_confidence
+        self.class_labels = frozenset(class_labels) if class_labels is not None else None
+        self.top_k = top_k
+
+    def keep(self, class_label, confidence=None):
+        """ Check whether a box passes the confidence threshold and class labels.
+
+        Args:
+            class_label (string): Class label of the box
+            confidence (Number, optional): Confidence of the box; Default **None**
+
+        Returns:
+            Boolean: **True** if the box should be kept, not taking ``top_k`` into account
+        """
+        if self.class_labels is not None and class_label not in self.class_labels:
+            return False
+        if self.min_confidence is not None and confidence < self.min_confidence:
+            return False
+        return True
+
+    def select(self, items):
+        """ Select boxes from their raw values, before creating any bounding box object.
+
+        Args:
+            items (iterable): ``(image_id, class_label, confidence, value)`` tuples, where value can be anything that represents the box
+
+        Returns:
+            dict: Selected values per image ``{"image_id": [value, value, ...], ...}``, in order of first occurrence
+        """
+        result = {}
+        top_k = self.top_k
+        for index, (img_id, class_label, confidence, value) in enumerate(items):
+            group = result.get(img_id)
+            if group is None:
+                group = result[img_id] = []
+            if not self.keep(class_label, confidence):
+                continue
+            if top_k is None:
+                group.append(value)
+            elif len(group) < top_k:
+                heapq.heappush(group, (confidence, -index, value))
+            elif top_k > 0:
+                heapq.heappushpop(group, (confidence, -index, value))
+
+        if top_k is not None:
+            for img_id, group in result.items():
+                group.sort(key=lambda item: -item[1])
+                result[img_id] = [value for _, _, value in group]
+
+        return result
+
+    def select_columns(self, boxes):
+        """ Select boxes from a :class:`~brambox.boxes.BoxSet`.
+
+        Args:
+            boxes (brambox.boxes.BoxSet): Bounding boxes to select from
+
+        Returns:
+            brambox.boxes.BoxSet: Selected bounding boxes
+        """
+        keep = np.ones(boxes.num_boxes, dtype=bool)
+        if self.class_labels is not None:
+            codes = [
+                i
+                for i, label in enumerate(boxes.class_labels)
+                if label in self.class_labels
+            ]
+            keep &= np.isin(boxes.columns['class_id'], codes)
+        if self.min_confidence is not None:
+            keep &= boxes.columns['confidence'] >= self.min_confidence
+        if self.top_k is not None:
+            image = np.repeat(np.arange(len(boxes)), np.diff(boxes.offsets))
+            order = np.lexsort((-boxes.columns['confidence'], image))
+            order = order[keep[order]]
+            sorted_image = image[order]
+            first = np.searchsorted(sorted_image, sorted_image, side='left')
+            keep[:] = False
+            keep[order[np.arange(len(order)) - first < self.top_k]] = True
+
+        return boxes.select(keep)
+
+    def __call__(self, boxes):
+        """ Select boxes from a list of bounding box objects.
+
+        Args:
+            boxes (list): Bounding boxes of one image
+
+        Returns:
+            list: Selected bounding boxes
+        """
+        items = (
+            (None, box.class_label, getattr(box, 'confidence', None), box)
+            for box in boxes
+        )
+        return self.select(items).get(None, [])
+
+    def __repr__(self):
+        class_labels = (
+            sorted(self.class_labels) if self.class_labels is not None else None
+        )
+        return f'{self.__class__.__name__}(min_confidence={self.min_confidence!r}, class_labels={class_labels!r}, top_k={self.top_k!r})'
@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+
+import io
+import struct
+import zipfile
+from collections.abc import Mapping
+import numpy as np
+
+from .annotations.annotation import Annotation
+from .detections.detection import Detection
+
+__all__ = ['BoxSet']
+
+#: Value of the ``object_id`` column that represents **None**
+NO_OBJECT_ID = np.iinfo(np.int64).min
+
+
+def image_id_array(image_ids):
+    """ Convert image identifiers to a numpy array that can be stored without pickling.
+
+    Args:
+        image_ids (list): Image identifiers
+
+    Returns:
+        numpy.ndarray: string or int64 array with the identifiers
+
+    Raises:
+        TypeError: If the image identifiers are not all strings or all integers
+    """
+    if all(isinstance(img_id, str) for img_id in image_ids):
+        return np.array(image_ids, dtype=np.str_)
+    if all(
+        isinstance(img_id, (int, np.integer)) and not isinstance(img_id, bool)
+        for img_id in image_ids
+    ):
+        return np.array(image_ids, dtype=np.int64)
+    raise TypeError(
+        'The image identifiers should either all be strings or all be integers'
+    )
+
+
+class BoxSet(Mapping):
+    """ Columnar representation of a bounding box dictionary ``{"image_id": [box, box, ...], ...}``.
+    Instead of storing one python object per bounding box, this class stores every attribute of the boxes in a contiguous numpy array.
+    The boxes of one image are stored next to each other and an image index keeps track of where the boxes of every image are.
+
+    A BoxSet behaves as a read-only dictionary. Indexing it with an image id creates the bounding box objects of that image,
+    so objects are only created when you actually use them.
+
+    Args:
+        box_type (class): Type of the bounding boxes that get created when indexing this set
+        image_ids (list): Image identifiers, in order
+        offsets (numpy.ndarray): Array with ``len(image_ids) + 1`` elements, where the boxes of image i are stored in ``[offsets[i], offsets[i+1])``
+        class_labels (list): Class label strings, indexed by the ``class_id`` column
+        columns (dict): Numpy arrays for every attribute of the bounding boxes (see note)
+
+    Note:
+        The columns of a BoxSet depend on the ``box_type``. |br|
+        Every set has the ``class_id``, ``object_id``, ``x_top_left``, ``y_top_left``, ``width`` and ``height`` columns.
+        Sets of :class:`~brambox.boxes.annotations.Annotation` also have columns for all annotation flags and fractions
+        and sets of :class:`~brambox.boxes.detections.Detection` have a ``confidence`` column. |br|
+        The columns can be accessed as attributes of the BoxSet (eg. ``boxset.width``).
+
+    Note:
+        Object identifiers are stored as 64-bit integers, where **None** is encoded as :any:`brambox.boxes.boxset.NO_OBJECT_ID`.
+        If some identifiers are not integers, the column falls back to a numpy object array, so that the conversion stays lossless.
+    """
+
+    box_columns = {
+        'x_top_left': np.float64,
+        'y_top_left': np.float64,
+        'width': np.float64,
+        'height': np.float64,
+    }  #: Columns shared by all bounding boxes
+    annotation_columns = {
+        'lost': np.bool_,
+        'difficult': np.bool_,
+        'interest': np.bool_,
+        'ignore': np.bool_,
+        'occluded_fraction': np.float64,
+        'truncated_fraction': np.float64,
+        'visible_x_top_left': np.float64,
+        'visible_y_top_left': np.float64,
+        'visible_width': np.float64,
+        'visible_height': np.float64,
+    }  #: Extra columns for annotations
+    detection_columns = {
+        'confidence': np.float64,
+    }  #: Extra columns for detections
+
+    def __init__(self, box_type, image_ids, offsets, class_labels, columns):
+        self.box_type = box_type
+        self.image_ids = list(image_ids)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.class_labels = list(class_labels)
+        self.columns = dict(columns)
+        self._index = {img_id: i for i, img_id in enumerate(self.image_ids)}
+
+        if len(self.offsets) != len(self.image_ids) + 1:
+            raise ValueError(
+                'The offsets array should contain one element more than the image_ids'
+            )
+        if len(self._index) != len(self.image_ids):
+            raise ValueError('The image_ids should be unique')
+        for name in self.column_types(box_type):
+            if name not in self.columns:
+                raise ValueError(
+                    f'Missing column [{name}] for box_type <{box_type.__name__}>'
+                )
+            if len(self.columns[name]) != self.offsets[-1]:
+                raise ValueError(f'Column [{name}] does not have the correct length')
+
+    @classmethod
+    def column_types(cls, box_type):
+        """ Get the names and data types of the columns needed to store a certain box type.
+
+        Args:
+            box_type (class): Type of bounding box
+
+        Returns:
+            dict: column names with their numpy dtype
+        """
+        columns = {'class_id': np.int32, 'object_id': np.int64}
+        columns.update(cls.box_columns)
+        if issubclass(box_type, Annotation):
+            columns.update(cls.annotation_columns)
+        elif issubclass(box_type, Detection):
+            columns.update(cls.detection_columns)
+
+        return columns
+
+    @classmethod
+    def from_dict(cls, boxes, box_type=None):
+        """ Create a BoxSet from a bounding box dictionary.
+
+        Args:
+            boxes (dict): Dictionary containing box objects per image ``{"image_id": [box, box, ...], ...}``
+            box_type (class, optional): Type of bounding box to create when indexing the set; Default **type of the first box or Annotation**
+
+        Returns:
+            BoxSet: columnar representation of the boxes
+        """
+        image_ids = list(boxes.keys())
+        counts = np.fromiter(
+            (len(boxes[img_id]) for img_id in image_ids), np.int64, len(image_ids)
+        )
+        offsets = np.zeros(len(image_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        flat = [box for img_id in image_ids for box in boxes[img_id]]
+
+        if box_type is None:
+            box_type = type(flat[0]) if len(flat) > 0 else Annotation
+
+        label_codes = {}
+        class_id = np.fromiter(
+            (label_codes.setdefault(box.class_label, len(label_codes)) for box in flat),
+            np.int32,
+            len(flat),
+        )
+
+        columns = {
+            'class_id': class_id,
+            'object_id': cls._object_id_column([box.object_id for box in flat]),
+        }
+        for name, dtype in cls.column_types(box_type).items():
+            if name not in columns:
+                columns[name] = np.fromiter(
+                    (getattr(box, name) for box in flat), dtype, len(flat)
+                )
+
+        return cls(box_type, image_ids, offsets, list(label_codes), columns)
+
+    @classmethod
+    def from_columns(cls, box_type, image_ids, counts, class_labels, columns):
+        """ Create a BoxSet from the attribute values of the boxes.
+
+        Args:
+            box_type (class): Type of bounding box to create when indexing the set
+            image_ids (list): Image identifiers, in order
+            counts (list): Number of boxes of every image
+            class_labels (list): Class label of every box
+            columns (dict): Numpy arrays or lists with the values of every box for some of the columns
+
+        Returns:
+            BoxSet: columnar representation of the boxes
+
+        Note:
+            Columns that are not given get the default value of that attribute in a new ``box_type`` object.
+        """
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        num_boxes = int(offsets[-1])
+
+        label_codes = {}
+        full_columns = {
+            'class_id': np.fromiter(
+                (
+                    label_codes.setdefault(label, len(label_codes))
+                    for label in class_labels
+                ),
+                np.int32,
+                num_boxes,
+            ),
+        }
+
+        default = box_type()
+        for name, dtype in cls.column_types(box_type).items():
+            if name in full_columns:
+                continue
+            if name in columns:
+                full_columns[name] = np.asarray(columns[name], dtype=dtype)
+            elif name == 'object_id' and default.object_id is None:
+                full_columns[name] = np.full(num_boxes, NO_OBJECT_ID, dtype=dtype)
+            else:
+                full_columns[name] = np.full(
+                    num_boxes, getattr(default, name), dtype=dtype
+                )
+
+        return cls(box_type, image_ids, offsets, list(label_codes), full_columns)
+
+    @staticmethod
+    def _object_id_column(object_ids):
+        """ Create an int64 object_id column, or an object column if some ids are not integers. """
+        if all(
+            oid is None
+            or (isinstance(oid, (int, np.integer)) and not isinstance(oid, bool))
+            for oid in object_ids
+        ):
+            return np.fromiter(
+                (NO_OBJECT_ID if oid is None else oid for oid in object_ids),
+                np.int64,
+                len(object_ids),
+            )
+
+        column = np.empty(len(object_ids), dtype=object)
+        column[:] = object_ids
+        return column
+
+    def to_dict(self):
+        """ Convert this set back to a bounding box dictionary.
+
+        Returns:
+            dict: Dictionary containing box objects per image ``{"image_id": [box, box, ...], ...}``
+        """
+        return {img_id: self[img_id] for img_id in self.image_ids}
+
+    def select(self, mask):
+        """ Create a new set with a subset of the boxes.
+
+        Args:
+            mask (numpy.ndarray): Boolean array with an element for every box, which is **True** for the boxes to keep
+
+        Returns:
+            BoxSet: Set with the same images and class labels, but only the selected boxes
+        """
+        mask = np.asarray(mask, dtype=bool)
+        kept = np.zeros(len(mask) + 1, dtype=np.int64)
+        np.cumsum(mask, out=kept[1:])
+        return self.__class__(
+            self.box_type,
+            self.image_ids,
+            kept[self.offsets],
+            self.class_labels,
+            {name: column[mask] for name, column in self.columns.items()},
+        )
+
+    def take(self, image_ids):
+        """ Create a new set with a subset of the images.
+
+        Args:
+            image_ids (list): Image identifiers to keep, in the order they should be in the new set
+
+        Returns:
+            BoxSet: Set with the boxes of the given images
+
+        Raises:
+            KeyError: If an image is not in this set
+        """
+        image_ids = list(image_ids)
+        if image_ids == self.image_ids:
+            return self
+
+        positions = self.image_positions(image_ids)
+        if len(positions) > 0 and positions.min() < 0:
+            raise KeyError(image_ids[int(np.argmin(positions))])
+        starts = self.offsets[positions]
+        counts = self.offsets[positions + 1] - starts
+        offsets = np.zeros(len(image_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        index = np.arange(offsets[-1]) + np.repeat(starts - offsets[:-1], counts)
+
+        return self.__class__(
+            self.box_type,
+            image_ids,
+            offsets,
+            self.class_labels,
+            {name: column[index] for name, column in self.columns.items()},
+        )
+
+    def save(self, file):
+        """ Save this set in an uncompressed numpy ``.npz`` archive.
+        The archive contains one array per column, the offsets of the images and tables with the image identifiers and class labels.
+
+        Args:
+            file (str or file): Filename or file object opened in binary mode
+
+        Raises:
+            TypeError: If the image identifiers are not all strings or all integers, or if some object identifiers are not integers
+        """
+        image_ids = image_id_array(self.image_ids)
+        if self.columns['object_id'].dtype.hasobject:
+            raise TypeError('The object identifiers should be integers to save a BoxSet')
+
+        arrays = {
+            name: np.asarray(self.columns[name], dtype=dtype)
+            for name, dtype in self.column_types(self.box_type).items()
+        }
+        arrays['image_ids'] = image_ids
+        arrays['offsets'] = self.offsets
+        arrays['class_labels'] = np.array(self.class_labels, dtype=np.str_)
+        np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, file, box_type, mmap_mode='r'):
+        """ Load a set that was saved with :func:`save`.
+
+        Args:
+            file (str or file): Filename or file object opened in binary mode
+            box_type (class): Type of bounding box to create when indexing the set
+            mmap_mode (str, optional): Memory map the columns with this mode (see :func:`numpy.memmap`) or **None** to read them in memory; Default **'r'**
+
+        Returns:
+            BoxSet: columnar representation of the boxes
+
+        Note:
+            Memory mapping only works for files on disk, so the columns of file objects without a filename (eg. io.BytesIO) are read in memory.
+            Loading a memory mapped set only reads the image identifiers, offsets and class labels;
+            the box attributes are only read from disk when you use them.
+        """
+        arrays = cls._load_arrays(file, mmap_mode)
+        columns = {name: arrays[name] for name in cls.column_types(box_type)}
+        return cls(
+            box_type,
+            arrays['image_ids'].tolist(),
+            arrays['offsets'],
+            arrays['class_labels'].tolist(),
+            columns,
+        )
+
+    @staticmethod
+    def _load_arrays(file, mmap_mode):
+        """ Load all arrays of an npz archive, memory mapping the arrays that are stored uncompressed. """
+        filename = file if isinstance(file, str) else None
+        if filename is None:
+            # Only memory map regular files on disk (eg. not archive members or compressed files)
+            try:
+                if (
+                    isinstance(file, (io.BufferedReader, io.FileIO))
+                    and file.fileno() >= 0
+                ):
+                    filename = getattr(file, 'name', None)
+            except (AttributeError, OSError):
+                pass
+        if mmap_mode is None or not isinstance(filename, str):
+            with np.load(file, allow_pickle=False) as npz:
+                return {name: npz[name] for name in npz.files}
+
+        arrays = {}
+        with open(filename, 'rb') as f, zipfile.ZipFile(f) as archive:
+            for info in archive.infolist():
+                name = info.filename[:-4]
+                if info.compress_type != zipfile.ZIP_STORED:
+                    with archive.open(info) as member:
+                        arrays[name] = np.lib.format.read_array(
+                            member, allow_pickle=False
+                        )
+                    continue
+
+                # Skip the local file header, to find the start of the npy file
+                f.seek(info.header_offset)
+                header = f.read(30)
+                name_length, extra_length = struct.unpack('<2H', header[26:30])
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+                if dtype.hasobject:
+                    raise ValueError(f'Array [{name}] contains python objects')
+                if int(np.prod(shape)) == 0:
+                    arrays[name] = np.empty(shape, dtype=dtype)
+                else:
+                    arrays[name] = np.memmap(
+                        filename,
+                        dtype=dtype,
+                        mode=mmap_mode,
+                        offset=f.tell(),
+                        shape=shape,
+                        order='F' if fortran_order else 'C',
+                    )
+
+        return arrays
+
+    def image_slice(self, image_id):
+        """ Get the slice of the columns that contains the boxes of a certain image.
+
+        Args:
+            image_id: Image identifier
+
+        Returns:
+            slice: start and stop position of the boxes of that image in the columns
+        """
+        idx = self._index[image_id]
+        return slice(int(self.offsets[idx]), int(self.offsets[idx + 1]))
+
+    def image_positions(self, image_ids):
+        """ Get the positions of a list of images in this set.
+
+        Args:
+            image_ids (list): Image identifiers
+
+        Returns:
+            numpy.ndarray: position of every image in ``self.image_ids`` or **-1** if it is not in the set
+        """
+        get = self._index.get
+        return np.fromiter(
+            (get(img_id, -1) for img_id in image_ids), np.int64, len(image_ids)
+        )
+
+    def class_label_array(self):
+        """ Get the class labels of all boxes.
+
+        Returns:
+            numpy.ndarray: object array with the class label string of every box
+        """
+        labels = np.empty(len(self.class_labels), dtype=object)
+        labels[:] = self.class_labels
+        return labels[self.columns['class_id']]
+
+    @property
+    def num_boxes(self):
+        """ Total number of bounding boxes in the set. """
+        return int(self.offsets[-1])
+
+    @property
+    def nbytes(self):
+        """ Number of bytes used by the columns of this set. """
+        return self.offsets.nbytes + sum(col.nbytes for col in self.columns.values())
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns')
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(
+            f'{self.__class__.__name__} has no attribute or column [{name}]'
+        )
+
+    def __getitem__(self, image_id):
+        return self._create_boxes(self.image_slice(image_id))
+
+    def __contains__(self, image_id):
+        return image_id in self._index
+
+    def __iter__(self):
+        return iter(self.image_ids)
+
+    def __len__(self):
+        return len(self.image_ids)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__} {{box_type = {self.box_type.__name__}, images = {len(self)}, boxes = {self.num_boxes}}}'
+
+    def _create_boxes(self, sl):
+        """ Create box objects for a slice of the columns. """
+        values = {
+            name: column[sl].tolist()
+            for name, column in self.columns.items()
+            if name not in ('class_id', 'object_id')
+        }
+        values['class_label'] = [
+            self.class_labels[code] for code in self.columns['class_id'][sl].tolist()
+        ]
+        values['object_id'] = [
+            None if oid is None or oid == NO_OBJECT_ID else oid
+            for oid in self.columns['object_id'][sl].tolist()
+        ]
+
+        boxes = []
+        names = list(values.keys())
+        for attributes in zip(*(values[name] for name in names)):
+            box = self.box_type()
+            for name, value in zip(names, attributes):
+                setattr(box, name, value)
+            boxes.append(box)
+
+        return boxes
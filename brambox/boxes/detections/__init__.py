@@ -9,6 +9,7 @@ from .formats import *
 
 from .coco import *
 from .dollar import *
+from .npz import *
 from .pascalvoc import *
 from .pickle import *
 from .yaml import *
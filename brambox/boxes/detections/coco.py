@@ -88,15 +88,51 @@ class CocoParser(Parser):
 
     def deserialize(self, string):
         """ Parse a json string into a dictionary of detections """
-        json_obj = json.loads(string)
+        return self._deserialize_detections(json.loads(string))
+
+    def deserialize_file(self, f, image_filter=None):
+        """ Parse a json file into a dictionary of detections, only creating the detections that pass the image filter and selection """
+        return self._deserialize_detections(json.load(f), image_filter)
+
+    def _deserialize_detections(self, json_obj, image_filter=None):
+        """ Create the detections of a loaded json list """
+        if image_filter is not None:
+            json_obj = (
+                json_det for json_det in json_obj if image_filter(json_det['image_id'])
+            )
+
+        if self.selection is not None:
+            selected = self.selection.select(
+                (
+                    json_det['image_id'],
+                    self._class_label(json_det),
+                    json_det['score'],
+                    json_det,
+                )
+                for json_det in json_obj
+            )
+            return {
+                img_id: [self._deserialize_detection(json_det) for json_det in dets]
+                for img_id, dets in selected.items()
+            }
 
         result = {}
         for json_det in json_obj:
             img_id = json_det['image_id']
             if img_id not in result:
                 result[img_id] = []
-            det = self.box_type()
-            det.deserialize(json_det, self.class_label_map)
-            result[img_id] += [det]
+            result[img_id] += [self._deserialize_detection(json_det)]
 
         return result
+
+    def _class_label(self, json_det):
+        """ Get the class label of a json detection object """
+        if self.class_label_map is not None:
+            return self.class_label_map[json_det['category_id'] - 1]
+        return str(json_det['category_id'])
+
+    def _deserialize_detection(self, json_det):
+        """ Create a detection from a json detection object """
+        det = self.box_type()
+        det.deserialize(json_det, self.class_label_map)
+        return det
@@ -8,6 +8,7 @@ Dollar
 ------
 """
 
+from ..box import LineParser
 from .detection import *
 
 __all__ = ['DollarDetection', 'DollarParser']
@@ -34,7 +35,7 @@ class DollarDetection(Detection):
         self.object_id = None
 
 
-class DollarParser(Parser):
+class DollarParser(LineParser, Parser):
     """
     This parser is designed to parse the text based dollar detections generated by Piotr Dollar's toolbox_
     and the EAVISE PeopleDetect framework.
@@ -98,15 +99,17 @@ class DollarParser(Parser):
         """
         raise NotImplementedError
 
-    def deserialize(self, string):
-        """ Parse a json string into a dictionary of detections """
-        result = {}
-        for line in string.splitlines():
-            img_id = str(int(line.split(',')[0]) - 1)
-            if img_id not in result:
-                result[img_id] = []
-            det = self.box_type()
-            det.deserialize(line, self.class_label_map)
-            result[img_id] += [det]
-
-        return result
+    def _line_image_id(self, line):
+        """ Get the image identifier of one line """
+        return str(int(line.split(',')[0]) - 1)
+
+    def _line_values(self, line):
+        """ Get the image identifier, class label and confidence of one line """
+        elements = line.split(',')
+        return str(int(elements[0]) - 1), self.class_label_map[0], float(elements[5])
+
+    def _deserialize_line(self, line):
+        """ Parse one line into an image identifier and detection """
+        det = self.box_type()
+        det.deserialize(line, self.class_label_map)
+        return str(int(line.split(',')[0]) - 1), det
@@ -5,6 +5,7 @@
 
 from .coco import CocoParser
 from .dollar import DollarParser
+from .npz import NpzParser
 from .pascalvoc import PascalVocParser
 from .pickle import PickleParser
 from .yaml import YamlParser
@@ -15,6 +16,7 @@ __all__ = ['detection_formats']
 detection_formats = {
     'coco': CocoParser,
     'dollar': DollarParser,
+    'npz': NpzParser,
     'pascalvoc': PascalVocParser,
     'pickle': PickleParser,
     'yaml': YamlParser,
@@ -8,6 +8,7 @@ Pascal VOC
 ----------
 """
 import logging
+from ..box import LineParser
 from .detection import *
 
 __all__ = ['PascalVocDetection', 'PascalVocParser']
@@ -37,7 +38,7 @@ class PascalVocDetection(Detection):
         return elements[0]
 
 
-class PascalVocParser(Parser):
+class PascalVocParser(LineParser, Parser):
     """
     This parser can parse detections in the `pascal voc`_ format.
     This format consists of one file per class of detection. |br|
@@ -61,6 +62,7 @@ class PascalVocParser(Parser):
     parser_type = ParserType.SINGLE_FILE
     box_type = PascalVocDetection
     extension = '.txt'
+    comment = '#'
 
     def __init__(self, **kwargs):
         try:
@@ -75,17 +77,17 @@ class PascalVocParser(Parser):
         """
         raise NotImplementedError
 
-    def deserialize(self, string):
-        """ Deserialize a detection file into a dictionary of detections """
-        result = {}
+    def _line_image_id(self, line):
+        """ Get the image identifier of one line """
+        return line.split()[0]
 
-        for line in string.splitlines():
-            if line[0] != '#':
-                anno = self.box_type()
-                img_id = anno.deserialize(line, self.class_label)
-                if img_id in result:
-                    result[img_id].append(anno)
-                else:
-                    result[img_id] = [anno]
+    def _line_values(self, line):
+        """ Get the image identifier, class label and confidence of one line """
+        elements = line.split()
+        return elements[0], self.class_label, float(elements[1])
 
-        return result
+    def _deserialize_line(self, line):
+        """ Deserialize one line into an image identifier and detection """
+        anno = self.box_type()
+        img_id = anno.deserialize(line, self.class_label)
+        return img_id, anno
@@ -8,6 +8,8 @@ YAML
 ----
 """
 
+from collections.abc import ItemsView
+from operator import itemgetter
 import yaml
 from .detection import *
 
@@ -78,30 +80,90 @@ class YamlParser(Parser):
         """ Serialize input dictionary of detections into one string """
         result = {}
         for img_id in detections:
-            img_res = {}
-            for det in detections[img_id]:
-                new_det = self.box_type.create(det)
-                key, val = new_det.serialize()
-                if key not in img_res:
-                    img_res[key] = [val]
-                else:
-                    img_res[key] += [val]
-            result[img_id] = img_res
+            result[img_id] = self._serialize_image(detections[img_id])
 
         return yaml.dump(result)
 
+    def iter_serialize(self, items):
+        """ Serialize input detections per image into yaml mappings.
+        The items of a dictionary are sorted by image identifier, like :func:`serialize`,
+        other iterables are written in their order.
+        """
+        if isinstance(items, ItemsView):
+            items = sorted(items, key=itemgetter(0))
+        empty = True
+        for img_id, detections in items:
+            empty = False
+            yield yaml.dump({img_id: self._serialize_image(detections)})
+
+        # An empty mapping, so that the file can be parsed again
+        if empty:
+            yield yaml.dump({})
+
+    def _serialize_image(self, detections):
+        """ Serialize the detections of one image into a dictionary per class label """
+        img_res = {}
+        for det in detections:
+            new_det = self.box_type.create(det)
+            key, val = new_det.serialize()
+            if key not in img_res:
+                img_res[key] = [val]
+            else:
+                img_res[key] += [val]
+
+        return img_res
+
     def deserialize(self, string):
         """ Deserialize a detection file into a dictionary of detections """
-        yml_obj = yaml.load(string)
+        return self._deserialize_images(yaml.load(string))
+
+    def deserialize_file(self, f, image_filter=None):
+        """ Deserialize a detection file, only creating the detections of the images that pass the filter """
+        return self._deserialize_images(yaml.load(f), image_filter)
+
+    def deserialize_selection(self, f, select, image_filter=None):
+        """ Deserialize a detection file, only creating the detections of the selected images """
+        return self._deserialize_images(yaml.load(f), image_filter, select)
+
+    def _deserialize_images(self, yml_obj, image_filter=None, select=None):
+        """ Create the detections of every image in a loaded yaml object """
+        if yml_obj is None:  # Empty file
+            yml_obj = {}
+        img_ids = [
+            img_id
+            for img_id in yml_obj
+            if image_filter is None or image_filter(img_id)
+        ]
+        if select is not None:
+            img_ids = select(img_ids)
 
         result = {}
-        for img_id in yml_obj:
+        for img_id in img_ids:
+            if self.selection is not None:
+                # Select the yaml objects before creating any detection
+                selected = self.selection.select(
+                    (
+                        img_id,
+                        '' if class_label == '?' else class_label,
+                        det_yml['score'] / 100,
+                        (det_yml, class_label),
+                    )
+                    for class_label, detections in yml_obj[img_id].items()
+                    for det_yml in detections
+                )
+                values = selected.get(img_id, [])
+            else:
+                values = [
+                    (det_yml, class_label)
+                    for class_label, detections in yml_obj[img_id].items()
+                    for det_yml in detections
+                ]
+
             det_res = []
-            for class_label, detections in yml_obj[img_id].items():
-                for det_yml in detections:
-                    det = self.box_type()
-                    det.deserialize(det_yml, class_label)
-                    det_res += [det]
+            for det_yml, class_label in values:
+                det = self.box_type()
+                det.deserialize(det_yml, class_label)
+                det_res += [det]
             result[img_id] = det_res
 
         return result
@@ -4,6 +4,9 @@ Brambox boxes statistics module |br|
 This package contains functions to perform statistical analysis of your detections and annotations.
 """
 
+# Import util first, so its backwards compatible aliases do not replace the original functions
+from .util import *
+from .evaluator import *
+from .match import *
 from .mr_fppi import *
 from .pr import *
-from .util import *
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   Incremental evaluation of detections
+#
+import numpy as np
+
+from .match import MatchResult, _match_shard, pair_overlap_fns
+from .mr_fppi import _mr_fppi_values, lamr
+from .pr import _pr_values, ap
+from .util import *
+
+__all__ = ['Evaluator']
+
+
+class Evaluator:
+    """ Evaluate detections incrementally, one image at a time.
+    Every image is matched when it is added to the evaluator and only the confidence,
+    true positive flag and class label of the detections is kept, in small numpy arrays.
+    This allows to compute statistics during training, without keeping all bounding boxes in memory.
+
+    Args:
+        overlap_threshold (Number, optional): Minimum overlap threshold for true positive; Default **0.5**
+        overlap_fn (function, optional): :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`; Default :func:`~brambox.boxes.iou`
+
+    Example:
+        >>> evaluator = bbb.Evaluator()
+        >>> for image_id, detections, annotations in validation_results():
+        ...     evaluator.update(image_id, detections, annotations)
+        >>> average_precision = evaluator.ap()
+
+    Note:
+        Evaluators of different parts of a dataset can be combined with :func:`merge <Evaluator.merge>`.
+        The :attr:`result` of an evaluator can also be saved with :func:`MatchResult.save <brambox.boxes.MatchResult.save>`,
+        so that the evaluation can be distributed over multiple machines.
+
+    Note:
+        The statistics are exactly the same as the ones you get with :func:`~brambox.boxes.pr` and :func:`~brambox.boxes.mr_fppi`,
+        when calling these functions with dictionaries that contain the images in the order they were added to the evaluator.
+    """
+
+    compact_size = 1024  #: Number of images after which the results of the separate images get combined in one set of arrays
+
+    def __init__(self, overlap_threshold=0.5, overlap_fn=iou):
+        if overlap_fn not in pair_overlap_fns:
+            raise ValueError('The overlap_fn of an Evaluator should be iou or ioa')
+
+        self.overlap_threshold = overlap_threshold
+        self.overlap_fn = overlap_fn
+        self._thresholds = np.array([overlap_threshold], dtype=np.float64)
+        self._image_ids = set()
+        self._num_images = 0
+        self._chunks = []
+        self._pending = []
+
+    def update(self, image_id, detections, annotations):
+        """ Match the detections of an image and add them to the statistics.
+
+        Args:
+            image_id: Image identifier
+            detections (list): Detection objects of the image
+            annotations (list): Annotation objects of the image
+
+        Raises:
+            ValueError: If the image was already added to the evaluator
+        """
+        if image_id in self._image_ids:
+            raise ValueError(f'Image [{image_id}] was already added to the evaluator')
+        self._image_ids.add(image_id)
+        self._num_images += 1
+
+        self._pending.append(
+            _match_shard(
+                {image_id: detections},
+                {image_id: annotations},
+                [image_id],
+                self._thresholds,
+                self.overlap_fn,
+            )
+        )
+        if len(self._pending) >= self.compact_size:
+            self._chunks.append(MatchResult.concatenate(self._pending))
+            self._pending = []
+
+    def merge(self, other):
+        """ Add the statistics of another part of the dataset to this evaluator.
+        The images of ``other`` are considered to come after the images of this evaluator.
+
+        Args:
+            other (Evaluator or MatchResult): Evaluator or matching result of the other part
+
+        Raises:
+            ValueError: If the overlap thresholds differ or if both evaluators contain the same image
+        """
+        if isinstance(other, Evaluator):
+            if other.overlap_fn is not self.overlap_fn:
+                raise ValueError('Cannot merge evaluators with a different overlap_fn')
+            duplicates = self._image_ids & other._image_ids
+            if len(duplicates) > 0:
+                raise ValueError(
+                    f'Image [{next(iter(duplicates))}] was already added to the evaluator'
+                )
+            self._image_ids |= other._image_ids
+            other = other.result
+
+        self._chunks = [self.result.merge(other)]
+        self._pending = []
+        self._num_images = self._chunks[0].num_images
+
+    @property
+    def result(self):
+        """ :class:`~brambox.boxes.MatchResult` with the matched detections of all images. """
+        results = self._chunks + self._pending
+        if len(results) == 0:
+            results = [_match_shard({}, {}, [], self._thresholds, self.overlap_fn)]
+        if len(results) > 1:
+            self._chunks = [MatchResult.concatenate(results)]
+            self._pending = []
+            results = self._chunks
+
+        return results[0]
+
+    @property
+    def num_images(self):
+        """ Number of images that were added to the evaluator. """
+        return self._num_images
+
+    def pr(self, class_label=None):
+        """ Compute the precision recall values of the images added so far.
+
+        Args:
+            class_label (str, optional): Only compute the values for this class label; Default **all labels**
+
+        Returns:
+            tuple: **[precision_values]**, **[recall_values]**
+        """
+        return _pr_values(*self.result.cumulative_positives(class_label=class_label))
+
+    def ap(self, num_of_samples=100, class_label=None, mode='sample'):
+        """ Compute the average precision of the images added so far.
+
+        Args:
+            num_of_samples (int, optional): Number of samples to take from the curve to measure the average precision; Default **100**
+            class_label (str, optional): Only compute the average precision of this class label; Default **all labels**
+            mode (str, optional): How to compute the area under the curve (see :func:`~brambox.boxes.ap`); Default **'sample'**
+
+        Returns:
+            Number: average precision
+        """
+        return ap(*self.pr(class_label), num_of_samples, mode)
+
+    def mr_fppi(self, class_label=None):
+        """ Compute the miss-rate FPPI values of the images added so far.
+
+        Args:
+            class_label (str, optional): Only compute the values for this class label; Default **all labels**
+
+        Returns:
+            tuple: **[miss-rate_values]**, **[fppi_values]**
+        """
+        return _mr_fppi_values(
+            *self.result.cumulative_positives(class_label=class_label), self.num_images
+        )
+
+    def lamr(self, num_of_samples=9, class_label=None):
+        """ Compute the log average miss-rate of the images added so far.
+
+        Args:
+            num_of_samples (int, optional): Number of samples to take from the curve to measure the log average miss-rate; Default **9**
+            class_label (str, optional): Only compute the log average miss-rate of this class label; Default **all labels**
+
+        Returns:
+            Number: log average miss-rate
+        """
+        return lamr(*self.mr_fppi(class_label), num_of_samples)
@@ -0,0 +1,1051 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   Vectorized matching of detections with annotations
+#
+import json
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
+import numpy as np
+
+from ..boxset import BoxSet
+from .util import *
+from .util import box_coordinates, iou_pairs, ioa_pairs, match_detection_to_annotations
+
+__all__ = ['match_detections', 'match_dataset', 'MatchResult']
+
+
+def match_detections(
+    detection_results,
+    ground_truth,
+    overlap_threshold,
+    overlap_fn=iou,
+    workers=None,
+    assignment='greedy',
+):
+    """ Match detection results with gound truth and return true and false positive rates.
+    This function will return a list of values as the true and false positive rates.
+    These values represent the rates at increasing confidence thresholds.
+
+    Args:
+        detection_results (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_threshold (Number): Minimum overlap threshold for true positive
+        overlap_fn (function, optional): Overlap area calculation function; Default :func:`~brambox.boxes.iou`
+        workers (int, optional): Number of processes to divide the images over; Default **None** (no multiprocessing)
+        assignment (str, optional): **'greedy'** or **'optimal'** matching of detections and annotations; Default **'greedy'**
+
+    Returns:
+        list: **[true_positives]**, **[false_positives]**, **num_annotations**
+
+    Note:
+        Every detection is matched with the remaining annotation of the same class that has the biggest overlap with it,
+        starting with the detection with the highest confidence.
+        Unmatched detections that have an :func:`~brambox.boxes.ioa` bigger than the ``overlap_threshold``
+        with an annotation that has its ``ignore`` flag set, are not counted as false positives.
+
+    Note:
+        With an **'optimal'** ``assignment``, the detections are matched with the annotations
+        so that the sum of the overlaps of the matched pairs is maximal in every image,
+        regardless of the confidence of the detections.
+        This is solved with :func:`scipy.optimize.linear_sum_assignment`.
+
+    Note:
+        If the ``overlap_fn`` is :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`,
+        the matching is computed with vectorized numpy operations for all images at once.
+        Other overlap functions are called for every pair of boxes, which is a lot slower
+        and do not support the ``workers`` and ``assignment`` arguments.
+    """
+    if overlap_fn not in pair_overlap_fns:
+        if assignment != 'greedy':
+            raise ValueError('Optimal assignment is only supported for iou and ioa')
+        return _match_detections_loop(
+            detection_results, ground_truth, overlap_threshold, overlap_fn
+        )
+
+    _, tp, num_annotations = match_positives(
+        detection_results,
+        ground_truth,
+        overlap_threshold,
+        overlap_fn,
+        workers,
+        assignment,
+    )
+    return np.cumsum(tp).tolist(), np.cumsum(~tp).tolist(), num_annotations
+
+
+def match_positives(
+    detection_results,
+    ground_truth,
+    overlap_threshold,
+    overlap_fn=iou,
+    workers=None,
+    assignment='greedy',
+):
+    """ Match detection results with ground truth and return the confidence and true positive flag of every detection.
+
+    Args:
+        detection_results (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_threshold (Number or list): Minimum overlap threshold for true positive, or a list of thresholds
+        overlap_fn (function, optional): :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`; Default :func:`~brambox.boxes.iou`
+        workers (int, optional): Number of processes to divide the images over; Default **None** (no multiprocessing)
+        assignment (str, optional): **'greedy'** or **'optimal'** matching of detections and annotations; Default **'greedy'**
+
+    Returns:
+        tuple: numpy arrays **confidences**, **true_positive_flags** and the number of annotations
+
+    Note:
+        The detections are sorted from high to low confidence and ignored detections are left out. |br|
+        If you pass a list of overlap thresholds, the overlaps are only computed once
+        and the confidences and true positive flags are lists with one array per threshold. |br|
+        When using multiple workers, the images are divided in contiguous shards.
+        Every worker returns the sorted results of its shard and these get merged with a stable sort,
+        so that the result is exactly the same as without multiprocessing.
+    """
+    result = match_dataset(
+        detection_results,
+        ground_truth,
+        overlap_threshold,
+        overlap_fn,
+        workers,
+        assignment,
+    )
+    num_annotations = int(result.num_annotations.sum())
+
+    if np.ndim(overlap_threshold) == 0:
+        return result.confidences[0], result.true_positives[0], num_annotations
+    return result.confidences, result.true_positives, num_annotations
+
+
+def match_classes(
+    detection_results,
+    ground_truth,
+    overlap_threshold,
+    overlap_fn=iou,
+    workers=None,
+    assignment='greedy',
+):
+    """ Match detection results with ground truth and return the confidence and true positive flag of every detection, per class label.
+
+    Args:
+        detection_results (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_threshold (Number or list): Minimum overlap threshold for true positive, or a list of thresholds
+        overlap_fn (function, optional): :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`; Default :func:`~brambox.boxes.iou`
+        workers (int, optional): Number of processes to divide the images over; Default **None** (no multiprocessing)
+        assignment (str, optional): **'greedy'** or **'optimal'** matching of detections and annotations; Default **'greedy'**
+
+    Returns:
+        dict: **(confidences, true_positive_flags, num_annotations)** tuple for every class label
+
+    Note:
+        The results are the same as splitting the data per class label and calling :func:`match_positives` for every class,
+        but the data is only matched once. |br|
+        Only class labels that have annotations without their ``ignore`` flag set are part of the result.
+    """
+    result = match_dataset(
+        detection_results,
+        ground_truth,
+        overlap_threshold,
+        overlap_fn,
+        workers,
+        assignment,
+    )
+
+    classes = {}
+    for code, label in enumerate(result.class_labels):
+        num_annotations = int(result.num_annotations[code])
+        if num_annotations == 0:
+            continue
+        classes[label] = ([], [], num_annotations)
+
+    for confidence, tp, labels in zip(
+        result.confidences, result.true_positives, result.labels
+    ):
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(len(result.class_labels) + 1))
+        for code, label in enumerate(result.class_labels):
+            if label in classes:
+                select = order[bounds[code]:bounds[code + 1]]
+                classes[label][0].append(confidence[select])
+                classes[label][1].append(tp[select])
+
+    if np.ndim(overlap_threshold) == 0:
+        return {label: (c[0], t[0], n) for label, (c, t, n) in classes.items()}
+    return classes
+
+
+def match_dataset(
+    detection_results,
+    ground_truth,
+    overlap_threshold,
+    overlap_fn=iou,
+    workers=None,
+    assignment='greedy',
+):
+    """ Match detection results with ground truth.
+
+    Args:
+        detection_results (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_threshold (Number or list): Minimum overlap threshold for true positive, or a list of thresholds
+        overlap_fn (function, optional): :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`; Default :func:`~brambox.boxes.iou`
+        workers (int, optional): Number of processes to divide the images over; Default **None** (no multiprocessing)
+        assignment (str, optional): **'greedy'** or **'optimal'** matching of detections and annotations; Default **'greedy'**
+
+    Returns:
+        MatchResult: matched detections for every threshold
+
+    Note:
+        The result can be saved and merged with the results of other parts of the dataset,
+        which allows to distribute the evaluation over multiple machines.
+    """
+    thresholds = np.atleast_1d(np.asarray(overlap_threshold, dtype=np.float64))
+    image_ids = dataset_image_ids(detection_results, ground_truth)
+    if workers is None or workers <= 1 or len(image_ids) <= 1:
+        return _match_shard(
+            detection_results, ground_truth, image_ids, thresholds, overlap_fn, assignment
+        )
+
+    # Only the numpy columns of every shard are sent to the workers, as pickling box objects is slower than matching them
+    label_codes = {}
+    detections, annotations = dataset_arrays(
+        detection_results, ground_truth, image_ids, label_codes
+    )
+    num_shards = min(len(image_ids), workers * 4)
+    bounds = np.linspace(0, len(image_ids), num_shards + 1).astype(int)
+    det_bounds = np.searchsorted(detections.image, bounds)
+    anno_bounds = np.searchsorted(annotations.image, bounds)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                _match_arrays,
+                [detections[start:stop] for start, stop in zip(det_bounds[:-1], det_bounds[1:])],
+                [annotations[start:stop] for start, stop in zip(anno_bounds[:-1], anno_bounds[1:])],
+                bounds[1:] - bounds[:-1],
+                [list(label_codes)] * num_shards,
+                [thresholds] * num_shards,
+                [overlap_fn] * num_shards,
+                [assignment] * num_shards,
+            )
+        )
+
+    return MatchResult.concatenate(results)
+
+
+class MatchResult:
+    """ Confidence, true positive flag and class label of the matched detections of a dataset, for a list of overlap thresholds.
+    The detections are sorted from high to low confidence and ignored detections are left out.
+
+    Args:
+        thresholds (numpy.ndarray): Overlap thresholds
+        confidences (list): Confidence array for every threshold
+        true_positives (list): Boolean true positive array for every threshold
+        labels (list): Class label code array for every threshold
+        class_labels (list): Class label strings, indexed by the label codes
+        num_annotations (numpy.ndarray): Number of annotations without ``ignore`` flag, for every class label code
+        num_images (int): Number of images
+
+    Note:
+        This object is the state of an evaluation and is a lot smaller than the detections themselves.
+        You can match different parts of a dataset on different machines with :func:`match_dataset`,
+        :func:`save <MatchResult.save>` the results and :func:`merge <MatchResult.merge>` them afterwards.
+        The merged result gives exactly the same curves as matching the full dataset at once,
+        if you merge the parts in the order of the images.
+    """
+
+    __slots__ = [
+        'thresholds',
+        'confidences',
+        'true_positives',
+        'labels',
+        'class_labels',
+        'num_annotations',
+        'num_images',
+    ]
+
+    def __init__(
+        self,
+        thresholds,
+        confidences,
+        true_positives,
+        labels,
+        class_labels,
+        num_annotations,
+        num_images,
+    ):
+        self.thresholds = thresholds
+        self.confidences = confidences
+        self.true_positives = true_positives
+        self.labels = labels
+        self.class_labels = class_labels
+        self.num_annotations = num_annotations
+        self.num_images = num_images
+
+    @classmethod
+    def concatenate(cls, results):
+        """ Combine the results of consecutive parts of a dataset.
+        Detections with the same confidence keep the order of the parts.
+
+        Args:
+            results (list): MatchResult objects of the different parts, in order
+
+        Returns:
+            MatchResult: combined results
+        """
+        label_codes = {}
+        luts = [
+            np.array(
+                [
+                    label_codes.setdefault(label, len(label_codes))
+                    for label in res.class_labels
+                ],
+                dtype=np.int64,
+            )
+            for res in results
+        ]
+        num_annotations = np.zeros(len(label_codes), dtype=np.int64)
+        for res, lut in zip(results, luts):
+            np.add.at(num_annotations, lut, res.num_annotations)
+
+        thresholds = results[0].thresholds
+        confidences = []
+        true_positives = []
+        labels = []
+        for t in range(len(thresholds)):
+            confidence = np.concatenate([res.confidences[t] for res in results])
+            tp = np.concatenate([res.true_positives[t] for res in results])
+            label = np.concatenate(
+                [lut[res.labels[t]] for res, lut in zip(results, luts)]
+            )
+            order = np.argsort(-confidence, kind='stable')
+            confidences.append(confidence[order])
+            true_positives.append(tp[order])
+            labels.append(label[order])
+
+        return cls(
+            thresholds,
+            confidences,
+            true_positives,
+            labels,
+            list(label_codes),
+            num_annotations,
+            sum(res.num_images for res in results),
+        )
+
+    def merge(self, *others):
+        """ Combine this result with the results of the next parts of a dataset.
+
+        Args:
+            others (MatchResult): Results of the parts that come after this one
+
+        Returns:
+            MatchResult: combined results
+
+        Raises:
+            ValueError: If the results were computed with different overlap thresholds
+        """
+        for other in others:
+            if not np.array_equal(self.thresholds, other.thresholds):
+                raise ValueError(
+                    f'Cannot merge results with different overlap thresholds {self.thresholds.tolist()} and {other.thresholds.tolist()}'
+                )
+
+        return self.concatenate([self, *others])
+
+    def cumulative_positives(self, index=0, class_label=None):
+        """ Get the cumulative true and false positives, as returned by :func:`~brambox.boxes.match_detections`.
+
+        Args:
+            index (int, optional): Index of the overlap threshold; Default **0**
+            class_label (str, optional): Only get the values of this class label; Default **all labels**
+
+        Returns:
+            list: **[true_positives]**, **[false_positives]**, **num_annotations**
+        """
+        tp = self.true_positives[index]
+        if class_label is None:
+            num_annotations = int(self.num_annotations.sum())
+        elif class_label in self.class_labels:
+            code = self.class_labels.index(class_label)
+            tp = tp[self.labels[index] == code]
+            num_annotations = int(self.num_annotations[code])
+        else:
+            tp = tp[:0]
+            num_annotations = 0
+
+        return np.cumsum(tp).tolist(), np.cumsum(~tp).tolist(), num_annotations
+
+    def save(self, file):
+        """ Save the result as an uncompressed numpy ``.npz`` archive.
+
+        Args:
+            file (str or file): Filename or file object to write to
+
+        Note:
+            The class labels are stored as a JSON list, so they should be strings, numbers, booleans or **None**.
+            Other labels raise a TypeError, instead of silently being converted to a different type.
+        """
+        arrays = {
+            'thresholds': self.thresholds,
+            'class_labels': np.array(json.dumps(list(self.class_labels))),
+            'num_annotations': self.num_annotations.astype(np.int64),
+            'num_images': np.array(self.num_images, dtype=np.int64),
+        }
+        for t in range(len(self.thresholds)):
+            arrays[f'confidences_{t}'] = self.confidences[t]
+            arrays[f'true_positives_{t}'] = self.true_positives[t]
+            arrays[f'labels_{t}'] = self.labels[t].astype(np.int32)
+
+        np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, file):
+        """ Load a result that was saved with :func:`save <MatchResult.save>`.
+
+        Args:
+            file (str or file): Filename or file object to read from
+
+        Returns:
+            MatchResult: loaded result
+        """
+        with np.load(file, allow_pickle=False) as arrays:
+            thresholds = arrays['thresholds']
+            class_labels = arrays['class_labels']
+            if class_labels.ndim == 0:
+                class_labels = json.loads(str(class_labels))
+            else:  # Older results stored the labels as an array of strings
+                class_labels = class_labels.tolist()
+            return cls(
+                thresholds,
+                [arrays[f'confidences_{t}'] for t in range(len(thresholds))],
+                [arrays[f'true_positives_{t}'] for t in range(len(thresholds))],
+                [arrays[f'labels_{t}'].astype(np.int64) for t in range(len(thresholds))],
+                class_labels,
+                arrays['num_annotations'],
+                int(arrays['num_images']),
+            )
+
+    @property
+    def nbytes(self):
+        """ Number of bytes used by the arrays of this result. """
+        return sum(
+            arr.nbytes
+            for arrays in (self.confidences, self.true_positives, self.labels)
+            for arr in arrays
+        )
+
+    def __repr__(self):
+        return f'{self.__class__.__name__} {{thresholds = {self.thresholds.tolist()}, images = {self.num_images}, detections = {len(self.confidences[0])}}}'
+
+
+def _match_shard(
+    detection_results,
+    ground_truth,
+    image_ids,
+    thresholds,
+    overlap_fn,
+    assignment='greedy',
+):
+    """ Match the images in ``image_ids`` and return a :class:`MatchResult`. """
+    label_codes = {}
+    detections, annotations = dataset_arrays(
+        detection_results, ground_truth, image_ids, label_codes
+    )
+    return _match_arrays(
+        detections,
+        annotations,
+        len(image_ids),
+        list(label_codes),
+        thresholds,
+        overlap_fn,
+        assignment,
+    )
+
+
+def _match_arrays(
+    detections,
+    annotations,
+    num_images,
+    class_labels,
+    thresholds,
+    overlap_fn,
+    assignment='greedy',
+):
+    """ Match the :class:`BoxArrays` of ``num_images`` images and return a :class:`MatchResult`. """
+    num_annotations = np.bincount(
+        annotations.labels[~annotations.values], minlength=len(class_labels)
+    )
+
+    order, tps, keeps = match_boxes(
+        detections, annotations, thresholds, overlap_fn, assignment
+    )
+    confidences = []
+    true_positives = []
+    labels = []
+    for tp, keep in zip(tps, keeps):
+        select = order[keep]
+        sort = np.argsort(-detections.values[select], kind='stable')
+        select = select[sort]
+        confidences.append(detections.values[select])
+        true_positives.append(tp[keep][sort])
+        labels.append(detections.labels[select])
+
+    return MatchResult(
+        thresholds,
+        confidences,
+        true_positives,
+        labels,
+        class_labels,
+        num_annotations,
+        num_images,
+    )
+
+
+pair_overlap_fns = {
+    iou: iou_pairs,
+    ioa: ioa_pairs,
+}  #: Functions that compute the overlap between coordinate arrays, for the supported overlap functions
+
+#: Number of annotations of one class in an image, from which only the pairs of boxes that overlap on the x-axis are considered
+sweep_threshold = 256
+
+
+class BoxArrays:
+    """ Flat columns of the bounding boxes of multiple images, as used by the matching functions.
+
+    Args:
+        image (numpy.ndarray): Integer image index of every box
+        coords (numpy.ndarray): Nx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+        labels (numpy.ndarray): Integer class label codes
+        values (numpy.ndarray): Confidence of detections or ignore flag of annotations
+    """
+
+    __slots__ = ['image', 'coords', 'labels', 'values']
+
+    def __init__(self, image, coords, labels, values):
+        self.image = image
+        self.coords = coords
+        self.labels = labels
+        self.values = values
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, index):
+        return BoxArrays(
+            self.image[index], self.coords[index], self.labels[index], self.values[index]
+        )
+
+
+def dataset_image_ids(detection_results, ground_truth):
+    """ Get the image identifiers of a dataset, in the order that they are matched.
+    This is the order of the detections, followed by the images that only have annotations.
+
+    Args:
+        detection_results (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+
+    Returns:
+        list: image identifiers
+
+    Raises:
+        KeyError: If there are detections for an image that is not in the ground truth
+    """
+    image_ids = list(detection_results.keys())
+    for image_id in image_ids:
+        if image_id not in ground_truth:
+            raise KeyError(image_id)
+
+    return image_ids + [
+        image_id for image_id in ground_truth if image_id not in detection_results
+    ]
+
+
+def dataset_arrays(detection_results, ground_truth, image_ids=None, label_codes=None):
+    """ Get the columns of the detections and annotations of a dataset.
+
+    Args:
+        detection_results (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        image_ids (list, optional): Images to get, the position in this list is used as integer image index; Default :func:`dataset_image_ids`
+        label_codes (dict, optional): Mapping from class labels to integer codes, which gets updated with new labels
+
+    Returns:
+        tuple: :class:`BoxArrays` **detections**, **annotations**
+    """
+    if image_ids is None:
+        image_ids = dataset_image_ids(detection_results, ground_truth)
+    if label_codes is None:
+        label_codes = {}
+
+    return (
+        box_arrays(detection_results, image_ids, 'confidence', label_codes),
+        box_arrays(ground_truth, image_ids, 'ignore', label_codes),
+    )
+
+
+def box_arrays(boxes, image_ids, value_name, label_codes):
+    """ Get the columns needed for matching from a bounding box dictionary.
+
+    Args:
+        boxes (dict or BoxSet): Bounding boxes per image
+        image_ids (list): Image identifiers, the position in this list is used as integer image index
+        value_name (str): Extra attribute to get from the boxes (eg. 'confidence' or 'ignore')
+        label_codes (dict): Mapping from class labels to integer codes, which gets updated with new labels
+
+    Returns:
+        BoxArrays: columns of the boxes of the images in ``image_ids`` that are in ``boxes``, ordered by image
+    """
+    value_dtype = np.bool_ if value_name == 'ignore' else np.float64
+
+    if isinstance(boxes, BoxSet):
+        positions = boxes.image_positions(image_ids)
+        image_index = np.flatnonzero(positions >= 0)
+        positions = positions[image_index]
+        start = boxes.offsets[positions]
+        counts = boxes.offsets[positions + 1] - start
+        select = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(
+            int(counts.sum())
+        )
+
+        lut = np.array(
+            [
+                label_codes.setdefault(label, len(label_codes))
+                for label in boxes.class_labels
+            ],
+            dtype=np.int64,
+        )
+        coords = np.stack(
+            [boxes.x_top_left, boxes.y_top_left, boxes.width, boxes.height], axis=1
+        )
+        return BoxArrays(
+            np.repeat(image_index, counts),
+            coords[select],
+            lut[boxes.class_id[select]],
+            boxes.columns[value_name][select].astype(value_dtype),
+        )
+
+    indices = [(i, image_id) for i, image_id in enumerate(image_ids) if image_id in boxes]
+    image_index = np.array([i for i, _ in indices], dtype=np.int64)
+    flat = [box for _, image_id in indices for box in boxes[image_id]]
+    counts = np.array([len(boxes[image_id]) for _, image_id in indices], dtype=np.int64)
+    labels = [box.class_label for box in flat]
+    for label in dict.fromkeys(labels):
+        label_codes.setdefault(label, len(label_codes))
+
+    return BoxArrays(
+        np.repeat(image_index, counts),
+        box_coordinates(flat),
+        np.fromiter(map(label_codes.__getitem__, labels), np.int64, len(flat)),
+        np.fromiter(map(attrgetter(value_name), flat), value_dtype, len(flat)),
+    )
+
+
+def match_boxes(
+    detections, annotations, overlap_threshold, overlap_fn=iou, assignment='greedy'
+):
+    """ Match detections with annotations of the same image and class label.
+
+    Args:
+        detections (BoxArrays): Detections, with their confidence as values
+        annotations (BoxArrays): Annotations, with their ignore flag as values
+        overlap_threshold (Number or list): Minimum overlap threshold for true positive, or a list of thresholds
+        overlap_fn (function, optional): :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`; Default :func:`~brambox.boxes.iou`
+        assignment (str, optional): **'greedy'** or **'optimal'** (see :func:`assign_detections`); Default **'greedy'**
+
+    Returns:
+        tuple: **order**, **true_positive_flags**, **keep_flags**
+
+    Note:
+        The detections get sorted per image, from high to low confidence.
+        The ``order`` array contains the indices of the detections in that order
+        and the flags are given in that order as well. |br|
+        Detections that are not true positives, but that are inside of an ignored annotation get a **False** keep flag.
+
+    Note:
+        The overlaps between the boxes are computed once, after which the detections are matched for every threshold.
+        If ``overlap_threshold`` is a list, the flags are 2D arrays with one row per threshold.
+    """
+    thresholds = np.atleast_1d(np.asarray(overlap_threshold, dtype=np.float64))
+    order = np.lexsort((-detections.values, detections.image))
+    detections = detections[order]
+    ignored = annotations.values
+    regular = annotations[~ignored]
+
+    # Match with annotations
+    sweep = thresholds.min(initial=np.inf) > 0
+    det_idx, anno_idx = same_class_pairs(detections, regular, sweep)
+    overlaps = pair_overlap_fns[overlap_fn](
+        regular.coords[anno_idx], detections.coords[det_idx]
+    )
+    matched = assign_detections(
+        det_idx,
+        anno_idx,
+        overlaps,
+        thresholds,
+        detections.image,
+        len(detections),
+        assignment,
+    )
+    tp = matched >= 0
+
+    # Discard detections in ignored regions
+    keep = np.ones_like(tp)
+    if len(regular) < len(annotations):
+        ignored = annotations[ignored]
+        det_idx, anno_idx = same_class_pairs(detections, ignored, sweep)
+        overlaps = ioa_pairs(ignored.coords[anno_idx], detections.coords[det_idx])
+        max_overlap = np.full(len(detections), -np.inf)
+        np.fmax.at(max_overlap, det_idx, overlaps)
+        keep = tp | (max_overlap[None, :] < thresholds[:, None])
+
+    if np.ndim(overlap_threshold) == 0:
+        return order, tp[0], keep[0]
+    return order, tp, keep
+
+
+def same_class_pairs(detections, annotations, sweep=False):
+    """ Get all pairs of detections and annotations that are in the same image and have the same class label.
+
+    Args:
+        detections (BoxArrays): Detections
+        annotations (BoxArrays): Annotations
+        sweep (Boolean, optional): Whether to leave out pairs that do not overlap in crowded images; Default **False**
+
+    Returns:
+        tuple: numpy arrays **detection_indices**, **annotation_indices**
+
+    Note:
+        If ``sweep`` is **True** and an image has more than :any:`sweep_threshold` annotations of the same class,
+        the annotations get sorted on their x coordinate and only the annotations that overlap with a detection on the x-axis are paired with it.
+        This sort-and-sweep only leaves out pairs with an overlap of zero,
+        so it can only be used when the overlap threshold is bigger than zero.
+
+    Note:
+        The pairs are ordered by detection index.
+    """
+    num_labels = 1 + max(
+        int(detections.labels.max(initial=0)), int(annotations.labels.max(initial=0))
+    )
+    det_keys = detections.image * num_labels + detections.labels
+    anno_keys = annotations.image * num_labels + annotations.labels
+
+    anno_order = np.argsort(anno_keys, kind='stable')
+    anno_keys = anno_keys[anno_order]
+    start = np.searchsorted(anno_keys, det_keys, 'left')
+    counts = np.searchsorted(anno_keys, det_keys, 'right') - start
+
+    if sweep and counts.max(initial=0) > sweep_threshold:
+        anno_order, start, counts = sweep_ranges(
+            detections, annotations, det_keys, anno_keys, anno_order
+        )
+
+    det_idx = np.repeat(np.arange(len(det_keys)), counts)
+    offset = np.arange(len(det_idx)) - np.repeat(np.cumsum(counts) - counts, counts)
+    anno_idx = anno_order[np.repeat(start, counts) + offset]
+
+    return det_idx, anno_idx
+
+
+def sweep_ranges(detections, annotations, det_keys, anno_keys, anno_order):
+    """ Get the annotations that overlap with every detection on the x-axis.
+
+    Args:
+        detections (BoxArrays): Detections
+        annotations (BoxArrays): Annotations
+        det_keys (numpy.ndarray): Image and class label key of the detections
+        anno_keys (numpy.ndarray): Sorted image and class label key of the annotations
+        anno_order (numpy.ndarray): Indices that sort the annotations by key
+
+    Returns:
+        tuple: numpy arrays **annotation_order**, **start**, **counts**;
+        the annotations ``annotation_order[start[i]:start[i]+counts[i]]`` are the candidates for detection i
+    """
+    x1 = annotations.coords[anno_order, 0]
+    x2 = x1 + annotations.coords[anno_order, 2]
+    sort = np.lexsort((x1, anno_keys))
+    anno_order, anno_keys, x1, x2 = anno_order[sort], anno_keys[sort], x1[sort], x2[sort]
+
+    # Maximal annotation width per key, to find the annotations that start left of a detection, but still overlap with it
+    unique_keys, key_start = np.unique(anno_keys, return_index=True)
+    max_width = np.maximum.reduceat(x2 - x1, key_start)
+    key_index = np.minimum(np.searchsorted(unique_keys, det_keys), len(unique_keys) - 1)
+    max_width = max_width[key_index]
+
+    det_x1 = detections.coords[:, 0]
+    det_x2 = det_x1 + detections.coords[:, 2]
+    lower = det_x1 - max_width
+    lower -= 1e-9 * (np.abs(det_x1) + np.abs(max_width) + 1)
+
+    start = sorted_position(anno_keys, x1, det_keys, lower)
+    stop = sorted_position(anno_keys, x1, det_keys, det_x2)
+    return anno_order, start, np.maximum(stop - start, 0)
+
+
+def sorted_position(keys, values, query_keys, query_values):
+    """ Vectorized :func:`numpy.searchsorted` on arrays sorted by (key, value).
+
+    Args:
+        keys (numpy.ndarray): Sorted keys
+        values (numpy.ndarray): Values, sorted within every key
+        query_keys (numpy.ndarray): Keys to search
+        query_values (numpy.ndarray): Values to search
+
+    Returns:
+        numpy.ndarray: index of the first element that is not smaller than the (query_key, query_value) pair
+    """
+    num = len(keys)
+    is_element = np.concatenate(
+        (np.ones(num, dtype=np.bool_), np.zeros(len(query_keys), dtype=np.bool_))
+    )
+    order = np.lexsort(
+        (
+            is_element,
+            np.concatenate((values, query_values)),
+            np.concatenate((keys, query_keys)),
+        )
+    )
+
+    is_element = is_element[order]
+    position = np.cumsum(is_element) - is_element
+    result = np.empty(len(query_keys), dtype=np.int64)
+    result[order[~is_element] - num] = position[~is_element]
+    return result
+
+
+def assign_boxes(
+    detections, annotations, overlap_threshold, overlap_fn=iou, assignment='greedy'
+):
+    """ Match two lists of bounding boxes of one image.
+
+    Args:
+        detections (list): Bounding boxes to match, in the order they are processed in a greedy assignment
+        annotations (list): Bounding boxes to match with
+        overlap_threshold (Number): Minimum overlap threshold to consider boxes as matched
+        overlap_fn (function, optional): :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`; Default :func:`~brambox.boxes.iou`
+        assignment (str, optional): **'greedy'** or **'optimal'** (see :func:`assign_detections`); Default **'greedy'**
+
+    Returns:
+        numpy.ndarray: index of the matched annotation or **-1**, for every detection
+    """
+    label_codes = {}
+    arrays = []
+    for boxes in (detections, annotations):
+        arrays.append(
+            BoxArrays(
+                np.zeros(len(boxes), dtype=np.int64),
+                box_coordinates(boxes),
+                np.array(
+                    [
+                        label_codes.setdefault(box.class_label, len(label_codes))
+                        for box in boxes
+                    ],
+                    dtype=np.int64,
+                ),
+                np.zeros(len(boxes)),
+            )
+        )
+    detections, annotations = arrays
+
+    thresholds = np.array([overlap_threshold], dtype=np.float64)
+    det_idx, anno_idx = same_class_pairs(detections, annotations, overlap_threshold > 0)
+    overlaps = pair_overlap_fns[overlap_fn](
+        annotations.coords[anno_idx], detections.coords[det_idx]
+    )
+    return assign_detections(
+        det_idx,
+        anno_idx,
+        overlaps,
+        thresholds,
+        detections.image,
+        len(detections),
+        assignment,
+    )[0]
+
+
+def assign_detections(
+    det_idx, anno_idx, overlaps, thresholds, image, num_detections, assignment='greedy'
+):
+    """ Match detections with annotations.
+
+    Args:
+        det_idx (numpy.ndarray): Detection index of the candidate pairs
+        anno_idx (numpy.ndarray): Annotation index of the candidate pairs
+        overlaps (numpy.ndarray): Overlap of the candidate pairs
+        thresholds (numpy.ndarray): Minimum overlap thresholds to consider a pair
+        image (numpy.ndarray): Image index of every detection
+        num_detections (int): Number of detections
+        assignment (str, optional): **'greedy'** or **'optimal'** (see note); Default **'greedy'**
+
+    Returns:
+        numpy.ndarray: integer array of shape (thresholds, detections) with the index of the matched annotation or **-1**
+
+    Note:
+        With a **'greedy'** assignment, the detections are processed in order and each detection gets matched with the remaining annotation
+        that has the biggest overlap with it. If multiple annotations have the same overlap, the last one is taken. |br|
+        An **'optimal'** assignment maximizes the sum of the overlaps of the matched pairs,
+        by solving a linear sum assignment problem for every group of detections and annotations that compete for the same boxes.
+    """
+    if assignment not in ('greedy', 'optimal'):
+        raise ValueError(
+            f'Unknown assignment [{assignment}], should be greedy or optimal'
+        )
+    matched = np.full((len(thresholds), num_detections), -1, dtype=np.int64)
+
+    # Sort candidates per detection, from best to worst choice
+    order = np.lexsort((-anno_idx, -overlaps, det_idx))
+    det_idx, anno_idx, overlaps = det_idx[order], anno_idx[order], overlaps[order]
+
+    for t, threshold in enumerate(thresholds):
+        valid = overlaps >= threshold
+        _assign_sorted(
+            det_idx[valid],
+            anno_idx[valid],
+            overlaps[valid],
+            image,
+            matched[t],
+            assignment,
+        )
+
+    return matched
+
+
+def _assign_sorted(det_idx, anno_idx, overlaps, image, matched, assignment):
+    """ Assignment of candidate pairs that are sorted per detection, from best to worst choice. """
+    if len(det_idx) == 0:
+        return
+
+    first = np.ones(len(det_idx), dtype=np.bool_)
+    first[1:] = det_idx[1:] != det_idx[:-1]
+
+    # When the first choices in an image are all different, they can all be matched
+    first_det, first_anno = det_idx[first], anno_idx[first]
+    unique_anno, anno_count = np.unique(first_anno, return_counts=True)
+    conflict_images = image[first_det[np.isin(first_anno, unique_anno[anno_count > 1])]]
+    conflict = np.isin(image[det_idx], conflict_images)
+    select = first & ~conflict
+    matched[det_idx[select]] = anno_idx[select]
+
+    if assignment == 'optimal':
+        optimal_assignment(
+            det_idx[conflict], anno_idx[conflict], overlaps[conflict], matched
+        )
+        return
+
+    # Images with conflicts are processed sequentially
+    taken = set()
+    for det, anno in zip(det_idx[conflict].tolist(), anno_idx[conflict].tolist()):
+        if matched[det] >= 0 or anno in taken:
+            continue
+        taken.add(anno)
+        matched[det] = anno
+
+
+def optimal_assignment(det_idx, anno_idx, overlaps, matched):
+    """ Match detections and annotations so that the sum of the overlaps is maximal.
+    The pairs are divided in connected groups of detections and annotations,
+    after which :func:`scipy.optimize.linear_sum_assignment` is solved for every group.
+
+    Args:
+        det_idx (numpy.ndarray): Detection index of the candidate pairs
+        anno_idx (numpy.ndarray): Annotation index of the candidate pairs
+        overlaps (numpy.ndarray): Overlap of the candidate pairs
+        matched (numpy.ndarray): Array in which the index of the matched annotation is stored for every detection
+    """
+    if len(det_idx) == 0:
+        return
+    import scipy.optimize
+    import scipy.sparse
+    import scipy.sparse.csgraph
+
+    dets, det_local = np.unique(det_idx, return_inverse=True)
+    annos, anno_local = np.unique(anno_idx, return_inverse=True)
+    graph = scipy.sparse.coo_matrix(
+        (np.ones(len(det_idx)), (det_local, len(dets) + anno_local)),
+        shape=(len(dets) + len(annos),) * 2,
+    )
+    _, component = scipy.sparse.csgraph.connected_components(graph, directed=False)
+
+    pair_component = component[det_local]
+    order = np.argsort(pair_component, kind='stable')
+    bounds = np.flatnonzero(np.diff(pair_component[order])) + 1
+    for pairs in np.split(order, bounds):
+        rows, row_idx = np.unique(det_local[pairs], return_inverse=True)
+        cols, col_idx = np.unique(anno_local[pairs], return_inverse=True)
+        weights = np.zeros((len(rows), len(cols)))
+        valid = np.zeros((len(rows), len(cols)), dtype=np.bool_)
+        weights[row_idx, col_idx] = overlaps[pairs]
+        valid[row_idx, col_idx] = True
+
+        row_sel, col_sel = scipy.optimize.linear_sum_assignment(weights, maximize=True)
+        keep = valid[row_sel, col_sel]
+        matched[dets[rows[row_sel[keep]]]] = annos[cols[col_sel[keep]]]
+
+
+def _match_detections_loop(
+    detection_results, ground_truth, overlap_threshold, overlap_fn
+):
+    """ Pure python implementation of :func:`match_detections`, that works with any overlap function. """
+    positives = []
+    num_annotations = 0
+
+    # Make copy to not alter the reference
+    detection_results = dict(detection_results.items())
+
+    # make sure len(detection_results) == len(ground_truth) by inserting empty detections lists
+    for image_id, annotations in ground_truth.items():
+        if image_id not in detection_results:
+            detection_results[image_id] = []
+
+    for image_id, detections in detection_results.items():
+        # Split ignored annotations
+        annotations = []
+        ignored_annotations = []
+        for annotation in ground_truth[image_id][:]:
+            if annotation.ignore:
+                ignored_annotations.append(annotation)
+            else:
+                annotations.append(annotation)
+        num_annotations += len(annotations)
+
+        # Match detections
+        detections = sorted(detections, key=lambda d: d.confidence, reverse=True)
+        for detection in detections:
+            matched_annotation = match_detection_to_annotations(
+                detection, annotations, overlap_threshold, overlap_fn
+            )
+            if matched_annotation is not None:
+                del annotations[matched_annotation]
+                # tp found
+                positives.append((detection.confidence, True))
+            elif (
+                match_detection_to_annotations(
+                    detection, ignored_annotations, overlap_threshold, ioa
+                )
+                is None
+            ):
+                # fp found
+                positives.append((detection.confidence, False))
+
+    # sort matches by confidence from high to low
+    positives = sorted(positives, key=lambda d: d[0], reverse=True)
+
+    tps = []
+    fps = []
+    tp_counter = 0
+    fp_counter = 0
+
+    # all matches in dataset
+    for pos in positives:
+        if pos[1]:
+            tp_counter += 1
+        else:
+            fp_counter += 1
+        tps.append(tp_counter)
+        fps.append(fp_counter)
+
+    return tps, fps, num_annotations
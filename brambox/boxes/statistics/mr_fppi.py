@@ -8,29 +8,41 @@
 #   and calculating log average miss-rate
 #
 import numpy as np
-import scipy.interpolate
 
-from .util import *
+from .match import *
 
 __all__ = ['mr_fppi', 'lamr']
 
 
-def mr_fppi(detections, ground_truth, overlap_threshold=0.5):
+def mr_fppi(
+    detections, ground_truth, overlap_threshold=0.5, workers=None, assignment='greedy'
+):
     """ Compute a list of miss-rate FPPI values that can be plotted into a graph.
 
     Args:
         detections (dict): Detection objects per image
         ground_truth (dict): Annotation objects per image
         overlap_threshold (Number, optional): Minimum iou threshold for true positive; Default **0.5**
+        workers (int, optional): Number of processes to use for matching the detections; Default **None** (no multiprocessing)
+        assignment (str, optional): **'greedy'** or **'optimal'** matching of detections and annotations (see :func:`~brambox.boxes.match_detections`); Default **'greedy'**
 
     Returns:
         tuple: **[miss-rate_values]**, **[fppi_values]**
     """
     num_images = len(ground_truth)
     tps, fps, num_annotations = match_detections(
-        detections, ground_truth, overlap_threshold
+        detections,
+        ground_truth,
+        overlap_threshold,
+        workers=workers,
+        assignment=assignment,
     )
 
+    return _mr_fppi_values(tps, fps, num_annotations, num_images)
+
+
+def _mr_fppi_values(tps, fps, num_annotations, num_images):
+    """ Compute miss-rate and FPPI values from the cumulative true and false positives. """
     miss_rate = []
     fppi = []
     for tp, fp in zip(tps, fps):
@@ -55,11 +67,8 @@ def lamr(miss_rate, fppi, num_of_samples=9):
         Number: log average miss-rate
     """
     samples = np.logspace(-2.0, 0.0, num_of_samples)
-    m = np.array(miss_rate)
-    f = np.array(fppi)
-    interpolated = scipy.interpolate.interp1d(
-        f, m, fill_value=(1.0, 0.0), bounds_error=False
-    )(samples)
-    log_interpolated = np.log(interpolated)
-    avg = sum(log_interpolated) / len(log_interpolated)
-    return np.exp(avg)
+    f = np.asarray(fppi, dtype=np.float64)
+    m = np.asarray(miss_rate, dtype=np.float64)
+    order = np.argsort(f, kind='stable')
+    interpolated = np.interp(samples, f[order], m[order], left=1.0, right=0.0)
+    return np.exp(np.log(interpolated).mean())
@@ -10,28 +10,99 @@
 import math
 from statistics import mean
 import numpy as np
-import scipy.interpolate
 
-from .util import *
+from .match import *
+from .match import match_classes, match_positives
 
-__all__ = ['pr', 'ap']
+__all__ = ['pr', 'ap', 'pr_range', 'ap_range', 'pr_per_class', 'mean_ap']
 
+#: COCO overlap thresholds ``[0.5, 0.55, ..., 0.95]``
+COCO_THRESHOLDS = tuple(np.linspace(0.5, 0.95, 10).round(2).tolist())
 
-def pr(detections, ground_truth, overlap_threshold=0.5):
+#: COCO recall values ``[0, 0.01, ..., 1]`` at which the precision gets sampled
+COCO_RECALLS = np.linspace(0.0, 1.0, 101)
+
+
+def pr(
+    detections, ground_truth, overlap_threshold=0.5, workers=None, assignment='greedy'
+):
     """ Compute a list of precision recall values that can be plotted into a graph.
 
     Args:
         detections (dict): Detection objects per image
         ground_truth (dict): Annotation objects per image
         overlap_threshold (Number, optional): Minimum iou threshold for true positive; Default **0.5**
+        workers (int, optional): Number of processes to use for matching the detections; Default **None** (no multiprocessing)
+        assignment (str, optional): **'greedy'** or **'optimal'** matching of detections and annotations (see :func:`~brambox.boxes.match_detections`); Default **'greedy'**
 
     Returns:
         tuple: **[precision_values]**, **[recall_values]**
     """
     tps, fps, num_annotations = match_detections(
-        detections, ground_truth, overlap_threshold
+        detections,
+        ground_truth,
+        overlap_threshold,
+        workers=workers,
+        assignment=assignment,
     )
+    return _pr_values(tps, fps, num_annotations)
+
+
+def pr_range(detections, ground_truth, overlap_thresholds=COCO_THRESHOLDS, workers=None):
+    """ Compute the precision recall values for multiple overlap thresholds at once.
+
+    Args:
+        detections (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_thresholds (list, optional): Minimum iou thresholds for true positive; Default **[0.5, 0.55, ..., 0.95]**
+        workers (int, optional): Number of processes to use for matching the detections; Default **None** (no multiprocessing)
+
+    Returns:
+        list: **(precision_values, recall_values)** tuple for every threshold
+
+    Note:
+        This function gives the same results as calling :func:`~brambox.boxes.pr` for every threshold,
+        but the overlaps between the detections and annotations are only computed once.
+    """
+    _, tps, num_annotations = match_positives(
+        detections, ground_truth, list(overlap_thresholds), workers=workers
+    )
+    return [
+        _pr_values(np.cumsum(tp).tolist(), np.cumsum(~tp).tolist(), num_annotations)
+        for tp in tps
+    ]
+
+
+def pr_per_class(detections, ground_truth, overlap_threshold=0.5, workers=None):
+    """ Compute the precision recall values of every class label.
 
+    Args:
+        detections (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_threshold (Number, optional): Minimum iou threshold for true positive; Default **0.5**
+        workers (int, optional): Number of processes to use for matching the detections; Default **None** (no multiprocessing)
+
+    Returns:
+        dict: **(precision_values, recall_values)** tuple for every class label
+
+    Note:
+        This function gives the same results as filtering the detections and annotations
+        with a :class:`~brambox.boxes.ClassLabelFilter` and calling :func:`~brambox.boxes.pr` for every class,
+        but the data is only traversed and matched once. |br|
+        Class labels that have no annotations (without the ``ignore`` flag set) are left out,
+        as their recall is undefined.
+    """
+    classes = match_classes(detections, ground_truth, overlap_threshold, workers=workers)
+    return {
+        label: _pr_values(
+            np.cumsum(tp).tolist(), np.cumsum(~tp).tolist(), num_annotations
+        )
+        for label, (_, tp, num_annotations) in classes.items()
+    }
+
+
+def _pr_values(tps, fps, num_annotations):
+    """ Compute precision and recall values from the cumulative true and false positives. """
     precision = []
     recall = []
     for tp, fp in zip(tps, fps):
@@ -41,7 +112,7 @@ def pr(detections, ground_truth, overlap_threshold=0.5):
     return precision, recall
 
 
-def ap(precision, recall, num_of_samples=100):
+def ap(precision, recall, num_of_samples=100, mode='sample'):
     """ Compute the average precision from a given pr-curve.
     The average precision is defined as the area under the curve.
 
@@ -49,11 +120,33 @@ def ap(precision, recall, num_of_samples=100):
         precision (list): Precision values
         recall (list): Recall values
         num_of_samples (int, optional): Number of samples to take from the curve to measure the average precision; Default **100**
+        mode (str, optional): How to compute the area under the curve (see note); Default **'sample'**
 
     Returns:
         Number: average precision
+
+    Note:
+        The ``mode`` argument can be one of the following values:
+
+        - **'sample'**: Linearly interpolate the curve and average ``num_of_samples`` evenly spaced samples.
+        - **'voc'**: Exact area under the precision envelope, evaluated at every recall value (PASCAL VOC 2010 and later).
+        - **'coco'**: Average of the precision envelope at 101 evenly spaced recall values (COCO). |br|
+
+        The precision envelope is the maximum precision at the same or a higher recall.
+        The **'voc'** and **'coco'** modes are computed with numpy only and ignore the ``num_of_samples`` argument.
     """
+    if mode == 'voc':
+        return _ap_voc(precision, recall)
+    elif mode == 'coco':
+        return _ap_coco(precision, recall)
+    elif mode != 'sample':
+        raise ValueError(
+            f'Unknown ap mode [{mode}], should be one of sample, voc or coco'
+        )
+
     if len(precision) > 1 and len(recall) > 1:
+        import scipy.interpolate
+
         p = np.array(precision)
         r = np.array(recall)
         p_start = p[np.argmin(r)]
@@ -69,3 +162,93 @@ def ap(precision, recall, num_of_samples=100):
         avg = float('nan')
 
     return avg
+
+
+def _precision_envelope(precision):
+    """ Get the maximum precision at the same or a higher recall, for a curve sorted by recall. """
+    return np.maximum.accumulate(np.asarray(precision, dtype=np.float64)[::-1])[::-1]
+
+
+def _ap_voc(precision, recall):
+    """ Exact area under the precision envelope (PASCAL VOC 2010+). """
+    if len(precision) == 0:
+        return float('nan')
+
+    r = np.concatenate(([0.0], recall))
+    p = _precision_envelope(precision)
+    return float(np.dot(np.diff(r), p))
+
+
+def _ap_coco(precision, recall):
+    """ Average of the precision envelope at 101 recall values (COCO). """
+    if len(precision) == 0:
+        return float('nan')
+
+    p = np.append(_precision_envelope(precision), 0.0)
+    idx = np.searchsorted(np.asarray(recall, dtype=np.float64), COCO_RECALLS, side='left')
+    return float(p[np.minimum(idx, len(p) - 1)].mean())
+
+
+def ap_range(
+    detections,
+    ground_truth,
+    overlap_thresholds=COCO_THRESHOLDS,
+    num_of_samples=100,
+    workers=None,
+    mode='sample',
+):
+    """ Compute the average precision for multiple overlap thresholds and their mean (eg. COCO AP@[.5:.95]).
+
+    Args:
+        detections (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_thresholds (list, optional): Minimum iou thresholds for true positive; Default **[0.5, 0.55, ..., 0.95]**
+        num_of_samples (int, optional): Number of samples to take from the curves to measure the average precision; Default **100**
+        workers (int, optional): Number of processes to use for matching the detections; Default **None** (no multiprocessing)
+        mode (str, optional): How to compute the area under the curves (see :func:`~brambox.boxes.ap`); Default **'sample'**
+
+    Returns:
+        tuple: **[average_precisions]**, **mean_average_precision**
+    """
+    aps = [
+        ap(precision, recall, num_of_samples, mode)
+        for precision, recall in pr_range(
+            detections, ground_truth, overlap_thresholds, workers
+        )
+    ]
+    return aps, mean(aps)
+
+
+def mean_ap(
+    detections,
+    ground_truth,
+    overlap_threshold=0.5,
+    num_of_samples=100,
+    workers=None,
+    mode='sample',
+):
+    """ Compute the average precision of every class label and their mean (mAP).
+
+    Args:
+        detections (dict or BoxSet): Detection objects per image
+        ground_truth (dict or BoxSet): Annotation objects per image
+        overlap_threshold (Number, optional): Minimum iou threshold for true positive; Default **0.5**
+        num_of_samples (int, optional): Number of samples to take from the curves to measure the average precision; Default **100**
+        workers (int, optional): Number of processes to use for matching the detections; Default **None** (no multiprocessing)
+        mode (str, optional): How to compute the area under the curves (see :func:`~brambox.boxes.ap`); Default **'sample'**
+
+    Returns:
+        tuple: **{class_label: average_precision}**, **mean_average_precision**
+
+    Note:
+        Class labels that have annotations, but no detections, get an average precision of **0**.
+    """
+    aps = {}
+    for label, (precision, recall) in pr_per_class(
+        detections, ground_truth, overlap_threshold, workers
+    ).items():
+        aps[label] = (
+            ap(precision, recall, num_of_samples, mode) if len(precision) > 0 else 0.0
+        )
+
+    return aps, mean(aps.values()) if len(aps) > 0 else float('nan')
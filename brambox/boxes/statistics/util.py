@@ -6,8 +6,9 @@
 #
 #   Common functions for this package
 #
+import numpy as np
 
-__all__ = ['iou', 'ioa', 'match_detections']
+__all__ = ['iou', 'ioa', 'iou_matrix', 'ioa_matrix', 'match_detections']
 
 
 def iou(a, b):
@@ -61,79 +62,104 @@ def ioa(a, b, denominator='b'):
     return intersection(a, b) / div
 
 
-def match_detections(detection_results, ground_truth, overlap_threshold, overlap_fn=iou):
-    """ Match detection results with gound truth and return true and false positive rates.
-    This function will return a list of values as the true and false positive rates.
-    These values represent the rates at increasing confidence thresholds.
+def iou_matrix(a, b):
+    """ Compute the intersection over union between every pair of boxes of two lists.
+    This is the vectorized version of :func:`~brambox.boxes.iou`.
+
+    Args:
+        a (list or numpy.ndarray): N bounding boxes or Nx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+        b (list or numpy.ndarray): M bounding boxes or Mx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+
+    Returns:
+        numpy.ndarray: NxM array where element (i, j) is the intersection over union between a[i] and b[j]
+
+    Note:
+        Where the scalar function raises a ZeroDivisionError because both boxes have no area,
+        this function returns **NaN**.
+    """
+    return iou_pairs(box_coordinates(a)[:, None], box_coordinates(b)[None, :])
+
+
+def ioa_matrix(a, b, denominator='b'):
+    """ Compute the intersection over area between every pair of boxes of two lists.
+    This is the vectorized version of :func:`~brambox.boxes.ioa`.
+
+    Args:
+        a (list or numpy.ndarray): N bounding boxes or Nx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+        b (list or numpy.ndarray): M bounding boxes or Mx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+        denominator (string, optional): String indicating from which box to compute the area; Default **'b'**
+
+    Returns:
+        numpy.ndarray: NxM array where element (i, j) is the intersection over area between a[i] and b[j]
+
+    Note:
+        The `denominator` can have the same values as in :func:`~brambox.boxes.ioa`. |br|
+        Where the scalar function raises a ZeroDivisionError because the denominator box has no area,
+        this function returns **NaN**.
+    """
+    return ioa_pairs(
+        box_coordinates(a)[:, None], box_coordinates(b)[None, :], denominator
+    )
+
+
+def iou_pairs(a, b):
+    """ Compute the intersection over union between corresponding rows of two coordinate arrays.
+    The arrays are broadcasted against each other, like any other numpy operation.
 
     Args:
-        detection_results (dict): Detection objects per image
-        ground_truth (dict): Annotation objects per image
-        overlap_threshold (Number): Minimum overlap threshold for true positive
-        overlap_fn (function, optional): Overlap area calculation function; Default :func:`~brambox.boxes.iou`
+        a (numpy.ndarray): Array with ``[x_top_left, y_top_left, width, height]`` values in its last dimension
+        b (numpy.ndarray): Array with ``[x_top_left, y_top_left, width, height]`` values in its last dimension
+
+    Returns:
+        numpy.ndarray: intersection over union values
+    """
+    intersection_area = intersection_pairs(a, b)
+    union_area = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - intersection_area
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return intersection_area / union_area
+
+
+def ioa_pairs(a, b, denominator='b'):
+    """ Compute the intersection over area between corresponding rows of two coordinate arrays.
+    The arrays are broadcasted against each other, like any other numpy operation.
+
+    Args:
+        a (numpy.ndarray): Array with ``[x_top_left, y_top_left, width, height]`` values in its last dimension
+        b (numpy.ndarray): Array with ``[x_top_left, y_top_left, width, height]`` values in its last dimension
+        denominator (string, optional): String indicating from which box to compute the area; Default **'b'**
+
+    Returns:
+        numpy.ndarray: intersection over area values
+    """
+    area_a = a[..., 2] * a[..., 3]
+    area_b = b[..., 2] * b[..., 3]
+
+    if denominator == 'min':
+        div = np.minimum(area_a, area_b)
+    elif denominator == 'max':
+        div = np.maximum(area_a, area_b)
+    elif denominator == 'a':
+        div = area_a
+    else:
+        div = area_b
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return intersection_pairs(a, b) / div
+
+
+def match_detections(detection_results, ground_truth, overlap_threshold, overlap_fn=iou, **kwargs):
+    """ Match detection results with gound truth and return true and false positive rates.
+    This function is kept here for backwards compatibility,
+    see :func:`brambox.boxes.statistics.match.match_detections` for the arguments.
 
     Returns:
         list: **[true_positives]**, **[false_positives]**, **num_annotations**
     """
-    positives = []
-    num_annotations = 0
-
-    # Make copy to not alter the reference
-    detection_results = detection_results.copy()
-
-    # make sure len(detection_results) == len(ground_truth) by inserting empty detections lists
-    for image_id, annotations in ground_truth.items():
-        if image_id not in detection_results:
-            detection_results[image_id] = []
-
-    for image_id, detections in detection_results.items():
-        # Split ignored annotations
-        annotations = []
-        ignored_annotations = []
-        for annotation in ground_truth[image_id][:]:
-            if annotation.ignore:
-                ignored_annotations.append(annotation)
-            else:
-                annotations.append(annotation)
-        num_annotations += len(annotations)
-
-        # Match detections
-        detections = sorted(detections, key=lambda d: d.confidence, reverse=True)
-        for detection in detections:
-            matched_annotation = match_detection_to_annotations(
-                detection, annotations, overlap_threshold, overlap_fn
-            )
-            if matched_annotation is not None:
-                del annotations[matched_annotation]
-                # tp found
-                positives.append((detection.confidence, True))
-            elif (
-                match_detection_to_annotations(
-                    detection, ignored_annotations, overlap_threshold, ioa
-                )
-                is None
-            ):
-                # fp found
-                positives.append((detection.confidence, False))
-
-    # sort matches by confidence from high to low
-    positives = sorted(positives, key=lambda d: d[0], reverse=True)
-
-    tps = []
-    fps = []
-    tp_counter = 0
-    fp_counter = 0
-
-    # all matches in dataset
-    for pos in positives:
-        if pos[1]:
-            tp_counter += 1
-        else:
-            fp_counter += 1
-        tps.append(tp_counter)
-        fps.append(fp_counter)
-
-    return tps, fps, num_annotations
+    # Imported here, as the match module depends on the functions of this module
+    from .match import match_detections as match
+
+    return match(detection_results, ground_truth, overlap_threshold, overlap_fn, **kwargs)
 
 
 def intersection(a, b):
@@ -160,6 +186,62 @@ def intersection(a, b):
     return intersection_width * intersection_height
 
 
+def intersection_matrix(a, b):
+    """ Calculate the intersection area between every pair of boxes of two lists.
+
+    Args:
+        a (list or numpy.ndarray): N bounding boxes or Nx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+        b (list or numpy.ndarray): M bounding boxes or Mx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+
+    Returns:
+        numpy.ndarray: NxM array with intersection areas
+    """
+    return intersection_pairs(box_coordinates(a)[:, None], box_coordinates(b)[None, :])
+
+
+def intersection_pairs(a, b):
+    """ Calculate the intersection area between corresponding rows of two coordinate arrays.
+
+    Args:
+        a (numpy.ndarray): Array with ``[x_top_left, y_top_left, width, height]`` values in its last dimension
+        b (numpy.ndarray): Array with ``[x_top_left, y_top_left, width, height]`` values in its last dimension
+
+    Returns:
+        numpy.ndarray: intersection areas
+    """
+    intersection_top_left_x = np.maximum(a[..., 0], b[..., 0])
+    intersection_top_left_y = np.maximum(a[..., 1], b[..., 1])
+    intersection_bottom_right_x = np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2])
+    intersection_bottom_right_y = np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3])
+
+    intersection_width = intersection_bottom_right_x - intersection_top_left_x
+    intersection_height = intersection_bottom_right_y - intersection_top_left_y
+
+    return np.where(
+        (intersection_width <= 0) | (intersection_height <= 0),
+        0.0,
+        intersection_width * intersection_height,
+    )
+
+
+def box_coordinates(boxes):
+    """ Get the coordinates of a list of bounding boxes as a numpy array.
+
+    Args:
+        boxes (list or numpy.ndarray): Bounding boxes or Nx4 array with ``[x_top_left, y_top_left, width, height]`` rows
+
+    Returns:
+        numpy.ndarray: Nx4 float64 array with ``[x_top_left, y_top_left, width, height]`` rows
+    """
+    if isinstance(boxes, np.ndarray):
+        return boxes.astype(np.float64, copy=False).reshape(-1, 4)
+
+    return np.array(
+        [(box.x_top_left, box.y_top_left, box.width, box.height) for box in boxes],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+
+
 def match_detection_to_annotations(detection, annotations, overlap_threshold, overlap_fn):
     """ Compute the best match (largest overlap area) between a given detection and a list of annotations.
 
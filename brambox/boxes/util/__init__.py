@@ -6,6 +6,11 @@ This package contains utilitary function to use with brambox boxes.
 
 from .visual import *
 from .convert import *
+from .cache import *
+from .archive import *
+from .compression import *
+from .shards import *
+from .database import *
 from .path import *
 from .modifiers import *
 from .filters import *
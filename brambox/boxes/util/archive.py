@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   Reading and writing bounding box files inside tar and zip archives
+#
+
+import io
+import os
+import re
+import tarfile
+import time
+import zipfile
+from contextlib import contextmanager
+
+from .compression import decompress, get_compression, open_compressed, wrap_compressed
+
+__all__ = ['ArchiveWriter']
+
+#: Separator between the path of an archive and the path of a member inside it (eg. ``labels.tar::train/img_000.txt``)
+SEPARATOR = '::'
+
+#: Extensions of the archives that can be written, with their tarfile mode or **'zip'**
+ARCHIVE_MODES = {
+    '.zip': 'zip',
+    '.tar': 'w',
+    '.tar.gz': 'w:gz',
+    '.tgz': 'w:gz',
+    '.tar.bz2': 'w:bz2',
+    '.tar.xz': 'w:xz',
+}
+
+
+def split_archive_path(path):
+    """ Split a path into the archive and member path.
+
+    Returns:
+        tuple: **archive**, **member** or **None** if the path does not point inside an archive
+    """
+    if not isinstance(path, str) or SEPARATOR not in path:
+        return None
+    archive, member = path.split(SEPARATOR, 1)
+    return archive, member
+
+
+def archive_mode(path):
+    """ Get the writing mode of an archive from its extension, or **None** if it is not an archive. """
+    lower = path.lower()
+    for extension, mode in ARCHIVE_MODES.items():
+        if lower.endswith(extension):
+            return mode
+    return None
+
+
+def member_name(name):
+    """ Normalize the name of an archive member, by removing leading **'./'** and **'/'** (eg. ``tar -C folder -cf labels.tar .``). """
+    while name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+
+def archive_members(archive):
+    """ List the normalized names of all regular files in an archive, in the order they are stored. """
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            return [
+                member_name(info.filename) for info in zf.infolist() if not info.is_dir()
+            ]
+
+    with tarfile.open(archive, 'r|*') as tar:
+        return [member_name(member.name) for member in tar if member.isfile()]
+
+
+def translate_pattern(pattern):
+    """ Convert a glob pattern to a regular expression, where only **'\\*\\*'** matches across folders. """
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+
+    return re.compile(regex + r'\Z')
+
+
+def expand_archive(expr):
+    """ Expand a selection expression inside an archive into the sorted paths of the members.
+
+    Note:
+        The member part of the expression can be empty (all files), a file, a folder (all files below it)
+        or contain **'\\*'** wildcards.
+    """
+    archive, pattern = split_archive_path(expr)
+    names = archive_members(archive)
+    pattern = member_name(pattern)
+
+    if pattern == '':
+        selected = names
+    elif pattern in names:
+        selected = [pattern]
+    elif '*' in pattern or '?' in pattern:
+        regex = translate_pattern(pattern)
+        selected = [name for name in names if regex.match(name)]
+    else:
+        folder = pattern.rstrip('/') + '/'
+        selected = [name for name in names if name.startswith(folder)]
+
+    return [archive + SEPARATOR + name for name in sorted(selected)]
+
+
+def iter_archive(archive, members):
+    """ Read the contents of some members of an archive in one sequential pass.
+
+    Args:
+        archive (str): Path to the archive
+        members (set): Normalized names of the members to read
+
+    Yields:
+        tuple: **member**, **bytes**, in the order they are stored in the archive
+    """
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                name = member_name(info.filename)
+                if name in members:
+                    yield name, zf.read(info)
+        return
+
+    # Stream mode reads (compressed) tar files front to back without seeking
+    with tarfile.open(archive, 'r|*') as tar:
+        for member in tar:
+            name = member_name(member.name)
+            if member.isfile() and name in members:
+                yield name, tar.extractfile(member).read()
+
+
+def iter_files(paths, mode='r', compression='infer'):
+    """ Read regular files and archive members, where the members of every archive are read in one sequential pass.
+
+    Args:
+        paths (list): File paths or ``archive::member`` paths
+        mode (str, optional): Reading mode, where text modes decode the contents as utf-8 for archive members; Default **'r'**
+        compression (str, optional): Compression of the files (see :func:`~brambox.boxes.parse`); Default **'infer'**
+
+    Yields:
+        tuple: **path**, **contents** for every path. Regular files are yielded in order,
+        members of an archive are yielded in the order they are stored in the archive, when the first member of that archive is reached.
+
+    Raises:
+        FileNotFoundError: If a member is not in its archive
+    """
+    paths = list(paths)
+    archives = {}
+    for path in paths:
+        parts = split_archive_path(path)
+        if parts is not None:
+            archives.setdefault(parts[0], {})[member_name(parts[1])] = path
+
+    done = set()
+    for path in paths:
+        parts = split_archive_path(path)
+        if parts is None:
+            with open_compressed(path, mode, compression) as f:
+                yield path, f.read()
+        elif parts[0] not in done:
+            done.add(parts[0])
+            members = archives[parts[0]]
+            found = set()
+            for name, data in iter_archive(parts[0], members.keys()):
+                if name in found:
+                    continue
+                found.add(name)
+                data = decompress(data, get_compression(name, compression))
+                yield members[name], data if 'b' in mode else data.decode('utf-8')
+
+            if len(found) != len(members):
+                missing = sorted(set(members) - found)[0]
+                raise FileNotFoundError(
+                    f'Member [{missing}] not found in archive [{parts[0]}]'
+                )
+
+
+def read_members(paths, mode='r', compression='infer'):
+    """ Read regular files and archive members with :func:`iter_files`.
+
+    Returns:
+        list: contents of every path, in the same order as ``paths``
+    """
+    paths = list(paths)
+    contents = dict(iter_files(paths, mode, compression))
+    return [contents[path] for path in paths]
+
+
+@contextmanager
+def open_file(path, mode='r', compression='infer'):
+    """ Open a regular file or an archive member for reading, decompressing it while reading.
+    Archive members are opened in binary mode and wrapped to decode them as utf-8 for text modes.
+    """
+    parts = split_archive_path(path)
+    if parts is None:
+        with open_compressed(path, mode, compression) as f:
+            yield f
+        return
+
+    archive, member = parts
+    name = member_name(member)
+    f = None
+    if zipfile.is_zipfile(archive):
+        container = zipfile.ZipFile(archive)
+        for info in container.infolist():
+            if not info.is_dir() and member_name(info.filename) == name:
+                f = container.open(info)
+                break
+    else:
+        container = tarfile.open(archive, 'r:*')
+        for info in container:
+            if info.isfile() and member_name(info.name) == name:
+                f = container.extractfile(info)
+                break
+    if f is None:
+        container.close()
+        raise FileNotFoundError(f'Member [{member}] not found in archive [{archive}]')
+
+    try:
+        compression = get_compression(member, compression)
+        if compression is not None:
+            f = wrap_compressed(f, compression)
+        if 'b' not in mode:
+            f = io.TextIOWrapper(f, encoding='utf-8')
+        yield f
+    finally:
+        f.close()
+        container.close()
+
+
+def file_signature(path):
+    """ Get the size and modification time of a file, or of the archive containing it. """
+    parts = split_archive_path(path)
+    stat = os.stat(path if parts is None else parts[0])
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ArchiveWriter:
+    """ Write files into a tar or zip archive.
+    The type of archive is chosen with the extension of the filename:
+    **.zip**, **.tar**, **.tar.gz**, **.tgz**, **.tar.bz2** or **.tar.xz**.
+
+    Args:
+        filename (str): Path to the archive
+        atomic (boolean, optional): Write to a temporary file in the same folder and rename it when the archive gets closed; Default **False**
+
+    Note:
+        This class is used by :func:`~brambox.boxes.generate` to write :any:`brambox.boxes.ParserType.MULTI_FILE` formats
+        into a single archive. When used as a context manager, an atomic archive is removed if an exception was raised.
+
+    Example:
+        >>> brambox.boxes.generate('anno_kitti', annotations, 'labels.tar.gz')
+        >>> annotations = brambox.boxes.parse('anno_kitti', 'labels.tar.gz::*.txt')
+    """
+
+    def __init__(self, filename, atomic=False):
+        self.filename = filename
+        self.mode = archive_mode(filename)
+        if self.mode is None:
+            raise ValueError(f'Unknown archive extension [{filename}]')
+
+        if atomic:
+            directory, name = os.path.split(filename)
+            self._path = os.path.join(directory, f'.{name}.{os.getpid()}.tmp')
+        else:
+            self._path = filename
+
+        if self.mode == 'zip':
+            self._archive = zipfile.ZipFile(self._path, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            self._archive = tarfile.open(self._path, self.mode)
+
+    def write(self, name, data):
+        """ Add a file to the archive.
+
+        Args:
+            name (str): Path of the file inside the archive
+            data (str or bytes): Contents of the file, strings are encoded as utf-8
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        if self.mode == 'zip':
+            self._archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        """ Close the archive and, for atomic writers, move it to its final path. """
+        if self._archive is None:
+            return
+        self._archive.close()
+        self._archive = None
+        if self._path != self.filename:
+            os.replace(self._path, self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None or self._path == self.filename:
+            self.close()
+        else:
+            self._archive.close()
+            self._archive = None
+            os.remove(self._path)
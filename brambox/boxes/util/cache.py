@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   On-disk cache of parsed bounding box files
+#
+
+import os
+import hashlib
+import logging
+import pickle
+import threading
+
+from .archive import file_signature, open_file
+
+__all__ = ['ParseCache']
+log = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """ On-disk cache of deserialized bounding box files.
+    The cache stores the result of the ``deserialize`` function of the parser for every bounding box file,
+    together with the size and modification time of that file (or of the archive containing it).
+    When parsing the files again, only files that are not in the cache or that have been modified since, get deserialized again.
+
+    The files are grouped in cache entries per parser class, parser keyword arguments, reading options (eg. ``compression``) and folder,
+    so that loading a large dataset only needs to read a single cache entry.
+
+    Args:
+        cache_dir (str): Folder to store the cache entries in
+        max_size (int, optional): Maximum size of the cache folder in bytes; Default **4GiB**
+
+    Note:
+        When the cache grows larger than ``max_size``, the least recently used entries get removed.
+        The modification time of the entries is used to keep track of when they were used,
+        so the cache can be shared between different processes and scripts.
+
+    Example:
+        >>> cache = brambox.boxes.ParseCache('.bbcache', 2**30)
+        >>> annotations = brambox.boxes.parse('anno_kitti', 'labels/*.txt', cache_dir=cache)
+    """
+
+    default_size = 4 * 2 ** 30  #: Default maximum size of the cache folder in bytes
+    extension = '.pkl'  #: Extension of the cache entries
+
+    def __init__(self, cache_dir, max_size=None):
+        self.cache_dir = cache_dir
+        self.max_size = max_size if max_size is not None else self.default_size
+
+    def key(self, parser, kwargs, folder):
+        """ Compute the key of a cache entry.
+
+        Args:
+            parser (brambox.boxes.box.Parser): Parser object
+            kwargs (dict): Keyword arguments used to create the parser and read the files
+            folder (str): Absolute path of the folder containing the bounding box files
+
+        Returns:
+            str: Hexadecimal key
+        """
+        cls = parser.__class__
+        identity = repr(
+            (
+                f'{cls.__module__}.{cls.__qualname__}',
+                sorted((name, repr(value)) for name, value in kwargs.items()),
+                folder,
+            )
+        )
+        return hashlib.sha1(identity.encode()).hexdigest()
+
+    def path(self, key):
+        """ Get the filename of the cache entry with a certain key. """
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def load(self, parser, box_files, kwargs, deserialize=None):
+        """ Get the deserialized boxes of a list of files, from the cache if possible.
+
+        Args:
+            parser (brambox.boxes.box.Parser): Parser to deserialize the files with that are not cached
+            box_files (list): Paths to the bounding box files
+            kwargs (dict): Keyword arguments used to create the parser and read the files
+            deserialize (function, optional): Function that reads and deserializes a list of files; Default **sequentially read and deserialize the files**
+
+        Returns:
+            list: deserialized bounding boxes of every file, in the same order as ``box_files``
+        """
+        if len(box_files) == 0:
+            return []
+        try:
+            folder = os.path.commonpath([os.path.dirname(f) for f in box_files])
+        except ValueError:  # Mix of absolute and relative paths
+            folder = ''
+        folder = os.path.join(os.getcwd(), folder)
+        entry = self.path(self.key(parser, kwargs, folder))
+
+        cached = self.read(entry)
+        result = []
+        stale = []
+        for i, path in enumerate(box_files):
+            signature = file_signature(path)
+            hit = cached.get(path)
+            if hit is not None and hit[0] == signature:
+                result.append(hit[1])
+            else:
+                result.append(None)
+                stale.append((i, signature))
+
+        if len(stale) == 0:
+            return result
+
+        if deserialize is None:
+            deserialize = self.deserialize
+        stale_boxes = deserialize(parser, [box_files[i] for i, _ in stale])
+        for (i, signature), boxes in zip(stale, stale_boxes):
+            result[i] = boxes
+            cached[box_files[i]] = (signature, boxes)
+
+        self.write(entry, cached)
+        return result
+
+    @staticmethod
+    def deserialize(parser, box_files):
+        """ Read and deserialize files sequentially. """
+        result = []
+        for box_file in box_files:
+            with open_file(box_file, parser.read_mode) as f:
+                result.append(parser.deserialize_file(f))
+
+        return result
+
+    def read(self, entry):
+        """ Read a cache entry and mark it as used.
+
+        Returns:
+            dict: **{path: ((size, mtime), boxes)}** for every cached file or an empty dictionary if the entry does not exist
+        """
+        try:
+            with open(entry, 'rb') as f:
+                cached = pickle.load(f)
+            os.utime(entry)
+            return cached
+        except FileNotFoundError:
+            return {}
+        except Exception as err:
+            log.warning(f'Could not read cache entry [{entry}], ignoring it: {err}')
+            return {}
+
+    def write(self, entry, cached):
+        """ Write a cache entry, through a temporary file so that other readers never see a partial entry. """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_entry = f'{entry}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_entry, 'wb') as f:
+                pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_entry, entry)
+        except OSError as err:
+            log.warning(f'Could not write cache entry [{entry}]: {err}')
+            if os.path.exists(tmp_entry):
+                os.remove(tmp_entry)
+
+    def entries(self):
+        """ List all cache entries.
+
+        Returns:
+            list: **(last_used, size, path)** tuples for every entry
+        """
+        result = []
+        if not os.path.isdir(self.cache_dir):
+            return result
+
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(self.extension):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return result
+
+    @property
+    def size(self):
+        """ Total size of the cache entries in bytes. """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache is smaller than ``max_size``.
+
+        Returns:
+            int: Number of removed entries
+        """
+        entries = self.entries()
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for _, entry_size, entry in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            removed += 1
+
+        return removed
+
+    def clear(self):
+        """ Remove all cache entries. """
+        for _, _, entry in self.entries():
+            try:
+                os.remove(entry)
+            except FileNotFoundError:
+                pass
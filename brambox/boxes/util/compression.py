@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   Transparent gzip, bz2 and xz compression of bounding box files
+#
+
+import bz2
+import gzip
+import lzma
+
+__all__ = ['compressions']
+
+#: Supported compressions and the file extension they are inferred from
+compressions = {
+    'gzip': '.gz',
+    'bz2': '.bz2',
+    'xz': '.xz',
+}
+
+_codecs = {
+    'gzip': gzip,
+    'bz2': bz2,
+    'xz': lzma,
+}
+
+
+def get_compression(path, compression='infer'):
+    """ Get the compression of a file.
+
+    Args:
+        path (str): Path to the file
+        compression (str, optional): **'infer'** to use the extension of the path, **None** or one of the :data:`compressions`; Default **'infer'**
+
+    Returns:
+        str: name of the compression or **None** if the file is not compressed
+
+    Raises:
+        ValueError: If the compression is unknown
+    """
+    if compression == 'infer':
+        if not isinstance(path, str):
+            return None
+        lower = path.lower()
+        for name, extension in compressions.items():
+            if lower.endswith(extension):
+                return name
+        return None
+    elif compression is not None and compression not in compressions:
+        raise ValueError(
+            f'Unknown compression [{compression}], should be one of infer, None, {", ".join(compressions)}'
+        )
+
+    return compression
+
+
+def strip_compression(path):
+    """ Remove the extension of the inferred compression from a path. """
+    compression = get_compression(path)
+    if compression is None:
+        return path
+    return path[: -len(compressions[compression])]
+
+
+def text_mode(mode):
+    """ Explicitly mark a mode as text, as the compressed file objects default to binary. """
+    return mode if 'b' in mode or 't' in mode else mode + 't'
+
+
+def open_compressed(path, mode='r', compression='infer'):
+    """ Open a file, decompressing or compressing it while reading or writing.
+    Text modes use the same default encoding as :func:`open`.
+    """
+    compression = get_compression(path, compression)
+    if compression is None:
+        return open(path, mode)
+
+    return _codecs[compression].open(path, text_mode(mode))
+
+
+def wrap_compressed(f, compression):
+    """ Wrap an opened binary file object to decompress it while reading. """
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=f, mode='rb')
+    elif compression == 'bz2':
+        return bz2.BZ2File(f)
+    return lzma.LZMAFile(f)
+
+
+def compress(data, compression):
+    """ Compress bytes, or return them unchanged if ``compression`` is **None**. """
+    if compression is None:
+        return data
+    return _codecs[compression].compress(data)
+
+
+def decompress(data, compression):
+    """ Decompress bytes, or return them unchanged if ``compression`` is **None**. """
+    if compression is None:
+        return data
+    return _codecs[compression].decompress(data)
@@ -6,14 +6,55 @@
 #
 
 import os
+import posixpath
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from .path import expand
+from .archive import (
+    ArchiveWriter,
+    archive_mode,
+    iter_files,
+    open_file,
+    read_members,
+    split_archive_path,
+)
+from .compression import (
+    compress,
+    compressions,
+    get_compression,
+    open_compressed,
+    strip_compression,
+)
+from .cache import ParseCache
 from ..formats import formats
-from ..box import ParserType, Parser, Box
+from ..box import ParserType, Parser, Box, BoxSelection
+from ..boxset import BoxSet
+from ..detections import Detection
 
-__all__ = ['parse', 'generate']
+__all__ = ['parse', 'iparse', 'generate']
 
 
-def parse(fmt, box_file, identify=None, offset=0, stride=1, **kwargs):
+def parse(
+    fmt,
+    box_file,
+    identify=None,
+    offset=0,
+    stride=1,
+    workers=None,
+    executor='thread',
+    cache_dir=None,
+    columnar=False,
+    image_filter=None,
+    min_confidence=None,
+    class_labels=None,
+    top_k_per_image=None,
+    compression='infer',
+    **kwargs,
+):
     """ Parse any type of bounding box format.
 
     Args:
@@ -22,10 +63,19 @@ def parse(fmt, box_file, identify=None, offset=0, stride=1, **kwargs):
         identify (function, optional): Function to create an image identifier
         offset (int, optional): Skip images untill offset; Default **0**
         stride (int, optional): Only read every n'th file; Default **1**
+        workers (int, optional): Number of files to read and deserialize concurrently; Default **None** (sequential)
+        executor (str, optional): Run the workers in a **'thread'** or **'process'** pool; Default **'thread'**
+        cache_dir (str or ParseCache, optional): Folder or :class:`~brambox.boxes.ParseCache` to cache the parsed files in; Default **None** (no caching)
+        columnar (boolean, optional): Return a :class:`~brambox.boxes.BoxSet` instead of a dictionary; Default **False**
+        image_filter (function or collection, optional): Only parse images for which this function returns **True** or whose identifier is in this collection; Default **None**
+        min_confidence (Number, optional): Only keep detections with a confidence of at least this value; Default **None**
+        class_labels (list, optional): Only keep boxes with one of these class labels; Default **None**
+        top_k_per_image (int, optional): Only keep the detections with the k highest confidences of every image; Default **None**
+        compression (str, optional): Compression of the bounding box files (see note); Default **'infer'**
         **kwargs: Keyword arguments that are passed to the parser
 
     Returns:
-        dict: Dictionary containing the bounding boxes for every image ``{"image_id": [box, box, ...], ...}``
+        dict or BoxSet: Dictionary containing the bounding boxes for every image ``{"image_id": [box, box, ...], ...}``
 
     Note:
         The ``identify`` function will be used to generate ``image_id`` tags. |br|
@@ -44,18 +94,86 @@ def parse(fmt, box_file, identify=None, offset=0, stride=1, **kwargs):
         If you use a string, it will first be expanded with the :func:`~brambox.boxes.expand` function
         to generate a list of strings. This expand function can take optional stride and offset parameters,
         which can be passed via keyword arguments.
+
+    Note:
+        The ``workers`` and ``executor`` arguments are only used for :any:`brambox.boxes.ParserType.MULTI_FILE` formats.
+        The files are still returned in the same order. |br|
+        Threads work best when reading the files is the bottleneck (eg. network filesystems),
+        while processes also parallelize the deserialization, but need a parser that can be pickled.
+
+    Note:
+        With a ``cache_dir``, the deserialized boxes of every file are stored in a binary cache entry,
+        so parsing the same unchanged files again only needs to load these entries.
+        Files that were modified since they were cached get parsed again.
+        The ``identify``, ``offset`` and ``stride`` arguments are applied after loading the cached boxes,
+        so the same cache entries can be used with different values for these arguments.
+        Arguments that change how the files are read, like ``compression``, ``min_confidence``, ``class_labels`` and ``top_k_per_image``,
+        use separate cache entries. |br|
+        After parsing, the least recently used entries are removed to keep the cache under its maximum size.
+
+    Note:
+        With ``columnar`` parsing, :any:`brambox.boxes.ParserType.MULTI_FILE` formats read all files first
+        and deserialize them at once with :func:`~brambox.boxes.box.Parser.deserialize_columns`.
+        The darknet, kitti, cvc and dollar annotation parsers convert entire columns of values with numpy,
+        without creating bounding box objects, which is considerably faster for large datasets. |br|
+        The npz parsers memory map their file into a :class:`~brambox.boxes.BoxSet`,
+        which is returned as is with ``columnar`` parsing and otherwise converted to a dictionary.
+
+    Note:
+        The ``image_filter`` gets the final image identifiers (after ``identify``) and is applied before the ``offset`` and ``stride``.
+        It gets evaluated before the bounding boxes of an image are deserialized,
+        namely before reading the file for :any:`brambox.boxes.ParserType.MULTI_FILE` formats
+        and, for line based :any:`brambox.boxes.ParserType.SINGLE_FILE` formats, before deserializing a line. |br|
+        These line based formats also select the images for the ``offset`` and ``stride`` arguments
+        by scanning the image identifiers first, so that loading a subset of the images costs proportionally less.
+        The yaml formats still load the entire file, but only create the bounding boxes of the selected images.
+
+    Note:
+        The ``min_confidence``, ``class_labels`` and ``top_k_per_image`` arguments give the same result as removing the boxes
+        with :func:`~brambox.boxes.filter_discard` after parsing, but are evaluated while parsing (see :class:`~brambox.boxes.BoxSelection`).
+        The coco, dollar, pascalvoc and yaml detection parsers check them on the raw values of every line or json/yaml object,
+        so that detections which are dropped are never created.
+        The ``min_confidence`` and ``top_k_per_image`` arguments can only be used with detection formats.
+
+    Note:
+        Bounding box files can be read from **.tar** (optionally compressed) and **.zip** archives, without extracting them.
+        Use an ``archive::member`` path for :any:`brambox.boxes.ParserType.SINGLE_FILE` formats,
+        or an archive path with an optional ``::`` selection expression for :any:`brambox.boxes.ParserType.MULTI_FILE` formats
+        (eg. ``'labels.tar::train/*.txt'``, see :func:`~brambox.boxes.expand`).
+        The files inside an archive are read in one sequential pass over the archive, without using the ``workers``.
+        The cache considers all files of an archive modified, when the archive itself is modified.
+
+    Note:
+        Bounding box files can be compressed with **'gzip'**, **'bz2'** or **'xz'** (see :data:`~brambox.boxes.compressions`).
+        With the default ``compression='infer'``, the compression is chosen with the extension of every file
+        (**.gz**, **.bz2** or **.xz**) and the default ``identify`` function removes this extension as well.
+        Use **None** to read the files as they are, or one of the compressions to decompress files with another extension. |br|
+        The files are decompressed while they are read, so line based formats never hold the entire decompressed file in memory.
     """
 
-    # Create parser
-    if type(fmt) is str:
-        try:
-            parser = formats[fmt](**kwargs)
-        except KeyError as err:
-            raise TypeError(f'Invalid parser {fmt}') from err
-    elif issubclass(fmt, Parser):
-        parser = fmt(**kwargs)
+    parser = create_parser(fmt, **kwargs)
+    cache_kwargs = dict(kwargs)
+    if compression != 'infer':  # Keep the keys of existing entries with the default compression
+        cache_kwargs['compression'] = compression
+    if (
+        min_confidence is not None
+        or class_labels is not None
+        or top_k_per_image is not None
+    ):
+        if not issubclass(parser.box_type, Detection) and (
+            min_confidence is not None or top_k_per_image is not None
+        ):
+            raise ValueError(
+                f'Parser <{parser.__class__.__name__}> does not parse detections, which are needed for min_confidence and top_k_per_image'
+            )
+        parser.selection = BoxSelection(min_confidence, class_labels, top_k_per_image)
+        cache_kwargs['selection'] = parser.selection
+    if image_filter is not None and not callable(image_filter):
+        image_filter = set(image_filter).__contains__
+    if cache_dir is None or isinstance(cache_dir, ParseCache):
+        cache = cache_dir
     else:
-        raise TypeError(f'Invalid parser {fmt}')
+        cache = ParseCache(cache_dir)
 
     # Parse bounding boxes
     if parser.parser_type == ParserType.SINGLE_FILE:
@@ -63,38 +181,75 @@ def parse(fmt, box_file, identify=None, offset=0, stride=1, **kwargs):
             raise TypeError(
                 f'Parser <{parser.__class__.__name__}> requires a single annotation file'
             )
-        with open(box_file, parser.read_mode) as f:
-            data = parser.deserialize(f.read())
+        # Image filter on the original identifiers
+        if image_filter is not None and identify is not None:
+
+            def raw_filter(img_id):
+                return image_filter(identify(img_id))
 
-        # Offset
-        if offset > 0:
-            keys = sorted(list(data.keys()))
-            while offset > 0:
-                offset -= 1
-                del data[keys[offset]]
+        else:
+            raw_filter = image_filter
+
+        if cache is not None:
+            data = cache.load(
+                parser,
+                [box_file],
+                cache_kwargs,
+                lambda parser, files: parse_files(
+                    parser, files, None, compression=compression
+                ),
+            )[0]
+            if raw_filter is not None:
+                data = take_images(data, [k for k in data if raw_filter(k)])
+            data = select_images(data, offset, stride)
+        else:
+            with ExitStack() as stack:
+                f = stack.enter_context(
+                    open_file(box_file, parser.read_mode, compression)
+                )
+                data = None
+                img_ids = None
+                if offset > 0 or stride > 1:
 
-        # Stride
-        if stride > 1:
-            new_data = {}
-            keys = sorted(list(data.keys()))
-            length = len(keys)
-            number = offset
+                    def select(img_ids):
+                        return select_image_ids(img_ids, offset, stride)
 
-            while number < 0:
-                number += stride
+                    data = parser.deserialize_selection(f, select, raw_filter)
+                    if data is None:
+                        img_ids = parser.scan_image_ids(f)
 
-            while number < length:
-                new_data[keys[number]] = data[keys[number]]
-                number += stride
+                if data is None and img_ids is None:
+                    data = parser.deserialize_file(f, raw_filter)
+                    data = select_images(data, offset, stride)
+                elif data is None:
+                    if raw_filter is not None:
+                        img_ids = [img_id for img_id in img_ids if raw_filter(img_id)]
+                    img_ids = select_image_ids(img_ids, offset, stride)
 
-            data = new_data
+                    # Archive members cannot always seek (eg. zip members before python 3.7)
+                    if f.seekable():
+                        f.seek(0)
+                    else:
+                        f = stack.enter_context(
+                            open_file(box_file, parser.read_mode, compression)
+                        )
+                    data = parser.deserialize_file(f, set(img_ids).__contains__)
+                    data = take_images(data, img_ids)
 
         # Identify
-        if identify is not None:
+        if identify is not None and isinstance(data, BoxSet):
+            data = BoxSet(
+                data.box_type,
+                [identify(key) for key in data.image_ids],
+                data.offsets,
+                data.class_labels,
+                data.columns,
+            )
+        elif identify is not None:
             data = {identify(key): value for key, value in data.items()}
     elif parser.parser_type == ParserType.MULTI_FILE:
         if type(box_file) is str:
-            box_files = expand(box_file, stride, offset)
+            box_files = list(expand(box_file, stride, offset))
         elif type(box_file) is list:
             box_files = box_file
         else:
@@ -104,35 +259,364 @@ def parse(fmt, box_file, identify=None, offset=0, stride=1, **kwargs):
 
         # Default identify
         if identify is None:
+            identify = default_identify
 
-            def identify(f):
-                return os.path.splitext(os.path.basename(f))[0]
+        archived = any(split_archive_path(f) is not None for f in box_files)
+        if (
+            cache is None
+            and not columnar
+            and not archived
+            and (workers is None or workers <= 1)
+        ):
+            data = {}
+            for box_file in box_files:
+                img_id = identify(box_file)
+                if image_filter is not None and not image_filter(img_id):
+                    continue
+                if img_id in data:
+                    raise ValueError(
+                        f'Multiple bounding box files with the same name were found ({img_id})'
+                    )
 
-        data = {}
-        for box_file in box_files:
+                data[img_id] = parse_file(parser, box_file, compression)
+        else:
+            selected_files = []
+            img_ids = []
+            seen = set()
+            for box_file in box_files:
+                img_id = identify(box_file)
+                if image_filter is not None and not image_filter(img_id):
+                    continue
+                if img_id in seen:
+                    raise ValueError(
+                        f'Multiple bounding box files with the same name were found ({img_id})'
+                    )
+                seen.add(img_id)
+                img_ids.append(img_id)
+                selected_files.append(box_file)
+            box_files = selected_files
+
+            if cache is None and columnar:
+                boxes = parser.deserialize_columns(
+                    read_files(parser, box_files, workers, compression)
+                )
+                data = BoxSet(
+                    parser.box_type,
+                    img_ids,
+                    boxes.offsets,
+                    boxes.class_labels,
+                    boxes.columns,
+                )
+            else:
+                if cache is None:
+                    boxes = parse_files(parser, box_files, workers, executor, compression)
+                else:
+                    boxes = cache.load(
+                        parser,
+                        box_files,
+                        cache_kwargs,
+                        lambda parser, files: parse_files(
+                            parser, files, workers, executor, compression
+                        ),
+                    )
+                data = dict(zip(img_ids, boxes))
+    else:
+        raise AttributeError(
+            f'Parser <{parser.__class__.__name__}> has not defined a parser_type class attribute'
+        )
+
+    if cache is not None:
+        cache.evict()
+    if parser.selection is not None:
+        if isinstance(data, BoxSet):
+            data = parser.selection.select_columns(data)
+        else:
+            data = {img_id: parser.selection(boxes) for img_id, boxes in data.items()}
+    if columnar and not isinstance(data, BoxSet):
+        data = BoxSet.from_dict(data, parser.box_type)
+    elif not columnar and isinstance(data, BoxSet):
+        data = data.to_dict()
+
+    return data
+
+
+def select_image_ids(img_ids, offset=0, stride=1):
+    """ Select image identifiers with an offset and stride, the same way as :func:`~brambox.boxes.parse` does for SINGLE_FILE formats.
+    The ``offset`` first identifiers are removed, in sorted order.
+    If the stride is bigger than 1, every n'th of the remaining identifiers is kept, in sorted order.
+
+    Args:
+        img_ids (list): Image identifiers
+        offset (int, optional): Number of identifiers to remove; Default **0**
+        stride (int, optional): Only keep every n'th identifier; Default **1**
+
+    Returns:
+        list: Selected image identifiers
+    """
+    if offset > 0:
+        removed = set(sorted(img_ids)[:offset])
+        img_ids = [img_id for img_id in img_ids if img_id not in removed]
+        offset = 0
+
+    if stride > 1:
+        img_ids = sorted(img_ids)[offset % stride::stride]
+
+    return img_ids
+
+
+def select_images(data, offset=0, stride=1):
+    """ Select the images of a dictionary with :func:`select_image_ids`. """
+    if offset <= 0 and stride <= 1:
+        return data
+
+    return take_images(data, select_image_ids(list(data), offset, stride))
+
+
+def take_images(data, img_ids):
+    """ Select images of a dictionary or :class:`~brambox.boxes.BoxSet`, in the order of ``img_ids``. """
+    if isinstance(data, BoxSet):
+        return data.take(img_ids)
+
+    return {img_id: data[img_id] for img_id in img_ids}
+
+
+def iparse(
+    fmt, box_file, identify=None, offset=0, stride=1, compression='infer', **kwargs
+):
+    """ Parse any type of bounding box format, one image at a time.
+    This generator has the same arguments as :func:`~brambox.boxes.parse`,
+    but instead of building a dictionary with all bounding boxes, it yields them image per image.
+
+    Args:
+        fmt (str or class): Format from the :mod:`brambox.boxes.format <brambox.boxes>` dictionary
+        box_file (list or string): Bounding box filename or array of bounding box file names
+        identify (function, optional): Function to create an image identifier
+        offset (int, optional): Skip images untill offset; Default **0**
+        stride (int, optional): Only read every n'th file; Default **1**
+        compression (str, optional): Compression of the bounding box files (see :func:`~brambox.boxes.parse`); Default **'infer'**
+        **kwargs: Keyword arguments that are passed to the parser
+
+    Yields:
+        tuple: **image_id**, **[box, box, ...]**
+
+    Note:
+        For :any:`brambox.boxes.ParserType.MULTI_FILE` formats, every file is read when its image is yielded.
+        Duplicate image identifiers raise a ValueError, like in :func:`~brambox.boxes.parse`.
+        The files inside an archive are read in one sequential pass and are yielded in the order they are stored in the archive. |br|
+        For :any:`brambox.boxes.ParserType.SINGLE_FILE` formats, the file is deserialized with
+        :func:`~brambox.boxes.box.Parser.iter_deserialize`.
+        Line based formats (eg. vatic annotations, dollar and pascalvoc detections) read the file line by line
+        and yield every group of consecutive lines with the same image identifier,
+        which means an image is yielded multiple times if its lines are not consecutive.
+        Other formats read the entire file before yielding the images.
+
+    Warning:
+        For :any:`brambox.boxes.ParserType.SINGLE_FILE` formats, the ``offset`` and ``stride`` are computed on the sorted image identifiers.
+        If you use them, the entire file is parsed with :func:`~brambox.boxes.parse` before yielding the images.
+    """
+    parser = create_parser(fmt, **kwargs)
+
+    if parser.parser_type == ParserType.SINGLE_FILE:
+        if type(box_file) is not str:
+            raise TypeError(
+                f'Parser <{parser.__class__.__name__}> requires a single annotation file'
+            )
+
+        if offset != 0 or stride != 1:
+            yield from parse(
+                parser.__class__,
+                box_file,
+                identify,
+                offset,
+                stride,
+                compression=compression,
+                **kwargs,
+            ).items()
+            return
+
+        with open_file(box_file, parser.read_mode, compression) as f:
+            for img_id, boxes in parser.iter_deserialize(f):
+                if identify is not None:
+                    img_id = identify(img_id)
+                yield img_id, boxes
+    elif parser.parser_type == ParserType.MULTI_FILE:
+        if type(box_file) is str:
+            box_files = list(expand(box_file, stride, offset))
+        elif type(box_file) is list:
+            box_files = box_file
+        else:
+            raise TypeError(
+                f'Parser <{parser.__class__.__name__}> requires a list of annotation files or an expandable file expression'
+            )
+
+        if identify is None:
+            identify = default_identify
+
+        seen = set()
+        for box_file, boxes in iter_parse_files(parser, box_files, compression):
             img_id = identify(box_file)
-            if img_id in data:
+            if img_id in seen:
                 raise ValueError(
                     f'Multiple bounding box files with the same name were found ({img_id})'
                 )
+            seen.add(img_id)
 
-            with open(box_file, parser.read_mode) as f:
-                data[img_id] = parser.deserialize(f.read())
+            yield img_id, boxes
     else:
         raise AttributeError(
             f'Parser <{parser.__class__.__name__}> has not defined a parser_type class attribute'
         )
 
-    return data
 
+def create_parser(fmt, **kwargs):
+    """ Create a parser object.
+
+    Args:
+        fmt (str or class): Format from the :mod:`brambox.boxes.format <brambox.boxes>` dictionary or parser class
+        **kwargs: Keyword arguments that are passed to the parser
+
+    Returns:
+        brambox.boxes.box.Parser: parser object
+
+    Raises:
+        TypeError: If the format is not a valid parser
+    """
+    if type(fmt) is str:
+        try:
+            return formats[fmt](**kwargs)
+        except KeyError as err:
+            raise TypeError(f'Invalid parser {fmt}') from err
+    elif isinstance(fmt, type) and issubclass(fmt, Parser):
+        return fmt(**kwargs)
+    else:
+        raise TypeError(f'Invalid parser {fmt}')
+
+
+def default_identify(box_file):
+    """ Default identify function for MULTI_FILE formats, which returns the name of the file without (compression) extension. """
+    parts = split_archive_path(box_file)
+    if parts is not None:
+        box_file = parts[1]
+    return os.path.splitext(os.path.basename(strip_compression(box_file)))[0]
+
+
+def parse_files(parser, box_files, workers, executor='thread', compression='infer'):
+    """ Read and deserialize multiple files concurrently.
+
+    Args:
+        parser (brambox.boxes.box.Parser): Parser to deserialize the files with
+        box_files (list): Filenames
+        workers (int): Number of workers
+        executor (str, optional): Run the workers in a **'thread'** or **'process'** pool; Default **'thread'**
+        compression (str, optional): Compression of the files; Default **'infer'**
+
+    Returns:
+        list: deserialized bounding boxes of every file, in the same order as ``box_files``
+
+    Note:
+        Files inside archives are read sequentially, one pass per archive, without using the workers.
+    """
+    if (
+        workers is None
+        or workers <= 1
+        or any(split_archive_path(f) is not None for f in box_files)
+    ):
+        boxes = dict(iter_parse_files(parser, box_files, compression))
+        return [boxes[box_file] for box_file in box_files]
+
+    if executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=workers)
+        chunksize = 1
+    elif executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(box_files) // (workers * 16))
+    else:
+        raise ValueError(f'Unknown executor [{executor}], should be thread or process')
+
+    with pool:
+        return list(
+            pool.map(
+                parse_file,
+                [parser] * len(box_files),
+                box_files,
+                [compression] * len(box_files),
+                chunksize=chunksize,
+            )
+        )
+
+
+def read_files(parser, box_files, workers=None, compression='infer'):
+    """ Read multiple files, concurrently with a thread pool if ``workers`` is larger than 1.
+
+    Returns:
+        list: contents of every file, in the same order as ``box_files``
+    """
+    if any(split_archive_path(f) is not None for f in box_files):
+        return read_members(box_files, parser.read_mode, compression)
+
+    if workers is None or workers <= 1:
+        return [read_file(parser, box_file, compression) for box_file in box_files]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(
+                read_file,
+                [parser] * len(box_files),
+                box_files,
+                [compression] * len(box_files),
+            )
+        )
+
+
+def read_file(parser, box_file, compression='infer'):
+    """ Read one file. """
+    with open_file(box_file, parser.read_mode, compression) as f:
+        return f.read()
 
-def generate(fmt, box, path, **kwargs):
+
+def parse_file(parser, box_file, compression='infer'):
+    """ Read and deserialize one file. """
+    with open_file(box_file, parser.read_mode, compression) as f:
+        return parser.deserialize_file(f)
+
+
+def iter_parse_files(parser, box_files, compression='infer'):
+    """ Read and deserialize files one at a time, reading the files inside every archive in one sequential pass.
+
+    Yields:
+        tuple: **box_file**, **boxes**, where the files of an archive are yielded in the order they are stored in the archive
+    """
+    if not any(split_archive_path(f) is not None for f in box_files):
+        for box_file in box_files:
+            yield box_file, parse_file(parser, box_file, compression)
+        return
+
+    for box_file, contents in iter_files(box_files, parser.read_mode, compression):
+        yield box_file, parser.deserialize(contents)
+
+
+def generate(
+    fmt,
+    box,
+    path,
+    workers=None,
+    atomic=False,
+    progress=None,
+    shards=None,
+    compression='infer',
+    **kwargs,
+):
     """ Generate bounding box file(s) in any format.
 
     Args:
         fmt (str or class): Format from the :mod:`brambox.boxes.format <brambox.boxes>` dictionary
-        box (dict): Dictionary containing box objects per image ``{"image_id": [box, box, ...], ...}``
+        box (dict or iterable): Dictionary containing box objects per image ``{"image_id": [box, box, ...], ...}`` or iterable of ``(image_id, [box, box, ...])`` tuples
         path (str): Path to the bounding box file/folder
+        workers (int, optional): Number of threads that serialize and write files concurrently; Default **None** (sequential)
+        atomic (boolean, optional): Write every file to a temporary file first and rename it afterwards; Default **False**
+        progress (function, optional): Function that gets called with the number of written files and the elapsed time in seconds; Default **None**
+        shards (int, optional): Write a sharded dataset with this number of shard files in the ``path`` folder; Default **None**
+        compression (str, optional): Compress the bounding box file(s) with **'gzip'**, **'bz2'** or **'xz'**; Default **'infer'**
         **kwargs (dict): Keyword arguments that are passed to the parser
 
     Warning:
@@ -140,43 +624,201 @@ def generate(fmt, box, path, **kwargs):
         then the ``path`` parameter should contain a path to a **file**. |br|
         If the format is of the type :any:`brambox.boxes.ParserType.MULTI_FILE`,
         then the ``path`` parameter should contain a path to a **folder**.
+
+    Note:
+        The bounding boxes are serialized and written one image at a time,
+        so passing an iterable (eg. the result of :func:`~brambox.boxes.iparse`) allows to convert large datasets in constant memory.
+        Multi file formats, as well as the vatic and yaml formats support this,
+        other single file formats (eg. pickle) need to gather all images before they can be serialized.
+        Columnar formats (eg. npz) write a :class:`~brambox.boxes.BoxSet` straight from its arrays. |br|
+        When using an iterable, every image identifier should only occur once,
+        as multi file formats will overwrite the file of that image and yaml will contain duplicate keys.
+
+    Note:
+        The ``workers`` argument is only used for :any:`brambox.boxes.ParserType.MULTI_FILE` formats,
+        where it speeds up writing many small files, especially on network filesystems.
+        Only a limited number of images is queued for the workers, so iterables are still written in constant memory. |br|
+        With ``atomic`` writing, a file is either completely written or not changed at all,
+        which means readers never see partially written files when the program gets interrupted. |br|
+        The ``progress`` function gets called in the calling thread, after every file, in the order of the images.
+        A single file format calls it once, after writing the file.
+
+    Note:
+        With ``shards``, the boxes of every image are serialized with the parser of ``fmt``
+        and written with a :class:`~brambox.boxes.ShardWriter`, for any type of format.
+        The resulting dataset can be opened with a :class:`~brambox.boxes.ShardReader`,
+        which reads the boxes of a single image without parsing the entire dataset.
+        The ``progress`` function then gets called after every image. |br|
+        The shards are written sequentially and cannot be compressed, as the boxes of an image are read at a byte offset,
+        nor written atomically, as the index is only written after all images.
+        Using ``shards`` together with multiple ``workers``, ``atomic`` or a ``compression`` raises a ValueError.
+
+    Note:
+        :any:`brambox.boxes.ParserType.MULTI_FILE` formats can also be written into a single archive,
+        by using a ``path`` that ends in **.tar**, **.tar.gz**, **.tgz**, **.tar.bz2**, **.tar.xz** or **.zip**.
+        The files get stored in the root of the archive, or below ``folder`` for a ``archive::folder`` path.
+        The archive is written sequentially with an :class:`~brambox.boxes.ArchiveWriter`, so the ``workers`` argument is ignored.
+
+    Note:
+        With the default ``compression='infer'``, a :any:`brambox.boxes.ParserType.SINGLE_FILE` format is compressed
+        if the ``path`` ends in **.gz**, **.bz2** or **.xz** (eg. ``'detections.json.gz'``),
+        while :any:`brambox.boxes.ParserType.MULTI_FILE` formats are not compressed.
+        Otherwise, the files are compressed with the given ``compression``
+        and multi file formats add its extension to every file (eg. ``img_000.txt.gz``),
+        so that :func:`~brambox.boxes.parse` can infer it. |br|
+        The serialized boxes are compressed while they are written, so this does not change the memory usage.
     """
+    parser = create_parser(fmt, **kwargs)
+    if shards is not None:
+        if workers is not None and workers > 1:
+            raise ValueError(
+                'Sharded datasets are written sequentially and do not support multiple workers'
+            )
+        if atomic:
+            raise ValueError('Sharded datasets cannot be written atomically')
+        if compression not in ('infer', None):
+            raise ValueError('Sharded datasets cannot be compressed')
 
-    # Create parser
-    if type(fmt) is str:
-        try:
-            parser = formats[fmt](**kwargs)
-        except KeyError as err:
-            raise TypeError(f'Invalid parser {fmt}') from err
-    elif issubclass(fmt, Parser):
-        parser = fmt(**kwargs)
+    items = box.items() if isinstance(box, Mapping) else box
+    archive, folder = split_archive_path(path) or (path, '')
+    if compression == 'infer' or compression is None:
+        extension = parser.extension
+        file_compression = None
     else:
-        raise TypeError(f'Invalid parser {fmt}')
+        extension = parser.extension + compressions[get_compression(path, compression)]
+        file_compression = compression
+    start = time.perf_counter()
 
     # Write bounding boxes
-    if parser.parser_type == ParserType.SINGLE_FILE:
+    if shards is not None:
+        from .shards import ShardWriter
+
+        with ShardWriter(path, fmt, shards, **kwargs) as writer:
+            for count, (img_id, boxes) in enumerate(items, 1):
+                writer.write(img_id, boxes)
+                if progress is not None:
+                    progress(count, time.perf_counter() - start)
+    elif parser.parser_type == ParserType.SINGLE_FILE:
         if os.path.isdir(path):
-            path = os.path.join(path, 'boxes' + parser.extension)
+            path = os.path.join(path, 'boxes' + extension)
         elif len(os.path.splitext(path)[1]) == 0:
-            path += parser.extension
+            path += extension
 
-        with open(path, parser.write_mode) as f:
-            f.write(parser.serialize(box))
+        if parser.columnar and isinstance(box, BoxSet):
+            chunks = [parser.serialize(box)]
+        else:
+            chunks = parser.iter_serialize(items)
+        write_file(chunks, path, parser.write_mode, atomic, compression)
+        if progress is not None:
+            progress(1, time.perf_counter() - start)
+    elif (
+        parser.parser_type == ParserType.MULTI_FILE and archive_mode(archive) is not None
+    ):
+        with ArchiveWriter(archive, atomic) as writer:
+            for count, (img_id, boxes) in enumerate(items, 1):
+                data = parser.serialize(boxes)
+                if isinstance(data, str):
+                    data = data.encode('utf-8')
+                writer.write(
+                    posixpath.join(folder, img_id + extension),
+                    compress(data, file_compression),
+                )
+                if progress is not None:
+                    progress(count, time.perf_counter() - start)
     elif parser.parser_type == ParserType.MULTI_FILE:
         if not os.path.isdir(path):
             raise ValueError(
                 f'Parser <{parser.__class__.__name__}> requires a path to a folder'
             )
-        for img_id, boxes in box.items():
-            filename = os.path.join(path, img_id + parser.extension)
 
-            directory = os.path.dirname(filename)
-            if not os.path.exists(directory):
-                os.makedirs(directory)
+        directories = set()
+        pending = deque()
+        count = 0
+        pool = (
+            ThreadPoolExecutor(max_workers=workers)
+            if workers is not None and workers > 1
+            else None
+        )
+        try:
+            for img_id, boxes in items:
+                filename = os.path.join(path, img_id + extension)
+
+                directory = os.path.dirname(filename)
+                if directory not in directories:
+                    os.makedirs(directory, exist_ok=True)
+                    directories.add(directory)
 
-            with open(filename, parser.write_mode) as f:
-                f.write(parser.serialize(boxes))
+                if pool is None:
+                    write_boxes(parser, boxes, filename, atomic, file_compression)
+                else:
+                    pending.append(
+                        pool.submit(
+                            write_boxes,
+                            parser,
+                            boxes,
+                            filename,
+                            atomic,
+                            file_compression,
+                        )
+                    )
+                    if len(pending) < workers * 4:
+                        continue
+                    pending.popleft().result()
+
+                count += 1
+                if progress is not None:
+                    progress(count, time.perf_counter() - start)
+
+            while len(pending) > 0:
+                pending.popleft().result()
+                count += 1
+                if progress is not None:
+                    progress(count, time.perf_counter() - start)
+        finally:
+            if pool is not None:
+                for future in pending:
+                    future.cancel()
+                pool.shutdown(wait=True)
     else:
         raise AttributeError(
             f'Parser <{parser.__class__.__name__}> has not defined a parser_type class attribute'
         )
+
+
+def write_boxes(parser, boxes, filename, atomic=False, compression=None):
+    """ Serialize and write the bounding boxes of one image. """
+    write_file(
+        (parser.serialize(boxes),), filename, parser.write_mode, atomic, compression
+    )
+
+
+def write_file(chunks, filename, mode, atomic=False, compression='infer'):
+    """ Write consecutive pieces of a file.
+
+    Args:
+        chunks (iterable): Pieces of the file to write
+        filename (str): Path of the file
+        mode (str): Mode to open the file with
+        atomic (boolean, optional): Write to a temporary file in the same folder and rename it when done; Default **False**
+        compression (str, optional): Compression of the file, inferred from ``filename`` by default; Default **'infer'**
+    """
+    compression = get_compression(filename, compression)
+    if not atomic:
+        with open_compressed(filename, mode, compression) as f:
+            for chunk in chunks:
+                f.write(chunk)
+        return
+
+    directory, name = os.path.split(filename)
+    tmp_filename = os.path.join(
+        directory, f'.{name}.{os.getpid()}.{threading.get_ident()}.tmp'
+    )
+    try:
+        with open_compressed(tmp_filename, mode, compression) as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
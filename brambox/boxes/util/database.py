@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   SQLite database of bounding boxes with indexed queries
+#
+
+import sqlite3
+from collections.abc import Mapping
+import numpy as np
+from ..annotations import Annotation
+from ..detections import Detection
+from ..boxset import BoxSet
+
+__all__ = ['BoxDatabase']
+
+
+class BoxDatabase:
+    """ Store bounding boxes in a local SQLite database and query subsets of them.
+    The database contains one row per bounding box, with indexes on the image, class label, confidence and area of the boxes,
+    so that selecting boxes does not need to parse and filter the entire dataset.
+
+    Args:
+        filename (str): Path to the database file; use **':memory:'** for a temporary database in memory
+        box_type (class, optional): Type of bounding box to create when querying the database; Default **Annotation or Detection, depending on the stored boxes**
+
+    Note:
+        The kind of boxes (annotations or detections) is decided when the first boxes get inserted and is stored in the database.
+        Boxes of a different type get converted with the ``create`` method of the ``box_type``. |br|
+        Image identifiers keep their type (strings or integers) and images are returned in the order they were first inserted.
+
+    Example:
+        >>> with brambox.boxes.BoxDatabase('detections.db') as db:
+        ...     db.insert(brambox.boxes.iparse('det_coco', 'detections.json', class_label_map=labels))
+        ...     zebras = db.query(class_label='zebra', min_confidence=0.3, min_height=50, max_height=200)
+    """
+
+    indexes = {
+        'boxes_image': 'image',
+        'boxes_class_label': 'class_label',
+        'boxes_confidence': 'confidence',
+        'boxes_area': 'width * height',
+    }  #: Indexes of the boxes table, the confidence index is only created for detections
+
+    def __init__(self, filename, box_type=None):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)'
+        )
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS images (id INTEGER PRIMARY KEY, image_id UNIQUE NOT NULL)'
+        )
+
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'box_type'"
+        ).fetchone()
+        if row is not None:
+            self.kind = Annotation if row[0] == 'annotation' else Detection
+            self.box_type = box_type if box_type is not None else self.kind
+        elif box_type is not None:
+            self.box_type = box_type
+            with self.connection:
+                self._create_tables(box_type)
+        else:
+            self.box_type = None
+            self.kind = None
+
+    def _create_tables(self, box_type):
+        """ Create the boxes table for a certain type of boxes. """
+        self.kind = Annotation if issubclass(box_type, Annotation) else Detection
+        sql_types = {
+            name: 'INTEGER' if np.dtype(dtype).kind in 'bi' else 'REAL'
+            for name, dtype in BoxSet.column_types(self.kind).items()
+        }
+        columns = ', '.join(f'{name} {sql_types[name]}' for name in self.columns)
+
+        self.connection.execute(
+            f'CREATE TABLE IF NOT EXISTS boxes (image INTEGER NOT NULL, class_label TEXT, {columns})'
+        )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('box_type', ?)",
+            ('annotation' if self.kind is Annotation else 'detection',),
+        )
+
+    def _create_indexes(self):
+        """ Create the indexes of the boxes table. """
+        for name, expression in self.indexes.items():
+            if name == 'boxes_confidence' and self.kind is not Detection:
+                continue
+            self.connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON boxes ({expression})'
+            )
+
+    def _drop_indexes(self):
+        """ Remove the indexes of the boxes table. """
+        for name in self.indexes:
+            self.connection.execute(f'DROP INDEX IF EXISTS {name}')
+
+    @property
+    def columns(self):
+        """ Names of the attribute columns of the boxes table. """
+        if self.kind is None:
+            return []
+        return [name for name in BoxSet.column_types(self.kind) if name != 'class_id']
+
+    def insert(self, boxes):
+        """ Insert bounding boxes in the database.
+
+        Args:
+            boxes (dict or iterable): Dictionary containing box objects per image ``{"image_id": [box, box, ...], ...}`` or iterable of ``(image_id, [box, box, ...])`` tuples
+
+        Note:
+            Images without boxes are stored as well, so they are part of the result of :func:`query` with ``empty_images=True``.
+            Inserting boxes of an image that is already in the database adds them to the existing boxes of that image. |br|
+            All boxes are inserted in a single transaction.
+            When the database does not contain any boxes yet, the indexes are only created after inserting the boxes,
+            which is about twice as fast as updating them for every box.
+        """
+        items = boxes.items() if isinstance(boxes, Mapping) else boxes
+        with self.connection:
+            if self.kind is not None and self._num_boxes() == 0:
+                self._drop_indexes()
+
+            for img_id, image_boxes in items:
+                if self.kind is None and len(image_boxes) > 0:
+                    self.box_type = type(image_boxes[0])
+                    self._create_tables(self.box_type)
+
+                self.connection.execute(
+                    'INSERT OR IGNORE INTO images (image_id) VALUES (?)', (img_id,)
+                )
+                if len(image_boxes) == 0:
+                    continue
+
+                image = self.connection.execute(
+                    'SELECT id FROM images WHERE image_id = ?', (img_id,)
+                ).fetchone()[0]
+                columns = self.columns
+                self.connection.executemany(
+                    f'INSERT INTO boxes VALUES (?, ?, {", ".join("?" * len(columns))})',
+                    (
+                        (image, box.class_label)
+                        + tuple(getattr(box, name) for name in columns)
+                        for box in self._convert(image_boxes)
+                    ),
+                )
+
+            if self.kind is not None:
+                self._create_indexes()
+
+    def _num_boxes(self):
+        """ Number of boxes in the boxes table. """
+        return self.connection.execute('SELECT COUNT(*) FROM boxes').fetchone()[0]
+
+    def _convert(self, boxes):
+        """ Convert boxes to the kind of boxes stored in the database. """
+        for box in boxes:
+            yield box if isinstance(box, self.kind) else self.kind.create(box)
+
+    def query(
+        self,
+        class_label=None,
+        min_confidence=None,
+        max_confidence=None,
+        min_width=None,
+        max_width=None,
+        min_height=None,
+        max_height=None,
+        min_area=None,
+        max_area=None,
+        image_ids=None,
+        where=None,
+        parameters=(),
+        empty_images=False,
+    ):
+        """ Get the bounding boxes that match all given conditions.
+        The minimum and maximum values are inclusive.
+
+        Args:
+            class_label (str or list, optional): Class label or list of class labels; Default **None**
+            min_confidence (Number, optional): Minimum confidence of detections; Default **None**
+            max_confidence (Number, optional): Maximum confidence of detections; Default **None**
+            min_width (Number, optional): Minimum width in pixels; Default **None**
+            max_width (Number, optional): Maximum width in pixels; Default **None**
+            min_height (Number, optional): Minimum height in pixels; Default **None**
+            max_height (Number, optional): Maximum height in pixels; Default **None**
+            min_area (Number, optional): Minimum area (width * height) in pixels; Default **None**
+            max_area (Number, optional): Maximum area (width * height) in pixels; Default **None**
+            image_ids (list, optional): Only get boxes of these images; Default **None**
+            where (str, optional): Extra SQL condition on the columns of the boxes table; Default **None**
+            parameters (tuple, optional): Parameters for the ``?`` placeholders in the ``where`` condition; Default **()**
+            empty_images (boolean, optional): Also return the images without matching boxes; Default **False**
+
+        Returns:
+            dict: Dictionary containing box objects per image ``{"image_id": [box, box, ...], ...}``
+
+        Example:
+            >>> db.query(class_label='zebra', min_confidence=0.3, min_height=50, max_height=200)
+            >>> db.query(where='x_top_left + width > ?', parameters=(640,))
+        """
+        if self.kind is None:
+            if empty_images and image_ids is not None:
+                self._select_images(image_ids)
+                return {img_id: [] for img_id in self._image_ids(True)}
+            elif empty_images:
+                return {img_id: [] for img_id in self._image_ids()}
+            return {}
+        if self.kind is not Detection and (
+            min_confidence is not None or max_confidence is not None
+        ):
+            raise ValueError('The database does not contain detections with a confidence')
+
+        conditions = []
+        values = []
+        if class_label is not None:
+            labels = [class_label] if isinstance(class_label, str) else list(class_label)
+            conditions.append(f'class_label IN ({", ".join("?" * len(labels))})')
+            values.extend(labels)
+        for column, minimum, maximum in (
+            ('confidence', min_confidence, max_confidence),
+            ('width', min_width, max_width),
+            ('height', min_height, max_height),
+            ('width * height', min_area, max_area),
+        ):
+            if minimum is not None:
+                conditions.append(f'{column} >= ?')
+                values.append(minimum)
+            if maximum is not None:
+                conditions.append(f'{column} <= ?')
+                values.append(maximum)
+        if image_ids is not None:
+            self._select_images(image_ids)
+            conditions.append('image IN (SELECT id FROM selected_images)')
+        if where is not None:
+            conditions.append(f'({where})')
+            values.extend(parameters)
+
+        columns = self.columns
+        sql = f'SELECT images.image_id, boxes.class_label, {", ".join("boxes." + c for c in columns)} FROM boxes JOIN images ON images.id = boxes.image'
+        if len(conditions) > 0:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY boxes.image, boxes.rowid'
+
+        if empty_images:
+            result = {img_id: [] for img_id in self._image_ids(image_ids is not None)}
+        else:
+            result = {}
+        bools = {
+            name
+            for name, dtype in BoxSet.column_types(self.kind).items()
+            if np.dtype(dtype).kind == 'b'
+        }
+        for row in self.connection.execute(sql, values):
+            box = self.box_type()
+            box.class_label = row[1]
+            for name, value in zip(columns, row[2:]):
+                setattr(box, name, bool(value) if name in bools else value)
+
+            boxes = result.get(row[0])
+            if boxes is None:
+                boxes = result[row[0]] = []
+            boxes.append(box)
+
+        return result
+
+    def image_ids(self):
+        """ Get the image identifiers in the database.
+
+        Returns:
+            list: image identifiers in the order they were inserted
+        """
+        return self._image_ids()
+
+    def _image_ids(self, selected=False):
+        """ Get all image identifiers or those in the selected_images table, in the order they were inserted. """
+        sql = 'SELECT image_id FROM images'
+        if selected:
+            sql += ' WHERE id IN (SELECT id FROM selected_images)'
+        return [row[0] for row in self.connection.execute(sql + ' ORDER BY id')]
+
+    def _select_images(self, image_ids):
+        """ Fill a temporary table with the ids of some images, as there is a limit on the number of query parameters. """
+        self.connection.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS selected_images (id INTEGER PRIMARY KEY)'
+        )
+        with self.connection:
+            self.connection.execute('DELETE FROM selected_images')
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO selected_images SELECT id FROM images WHERE image_id = ?',
+                ((img_id,) for img_id in image_ids),
+            )
+
+    def close(self):
+        """ Close the connection to the database. """
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM images').fetchone()[0]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__} {{filename = {self.filename}, images = {len(self)}}}'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -9,7 +9,9 @@ These functions allow to filter out boxes depending on certain criteria.
 """
 
 import copy
+from bisect import bisect_left, insort
 from ..statistics import *
+from ..statistics.match import assign_boxes
 from ..statistics.util import match_detection_to_annotations
 
 __all__ = [
@@ -234,6 +236,7 @@ class MatchFilter:
         remove_on_match (Boolean, optional): Whether to remove the matched box from the boxes list; Default **True**
         match_threshold (Number, optional): Threshold for the matching criteria to reach; Default **0.5**
         match_criteria (function, optional): Function that computes a matching criteria; Default **iou**
+        assignment (str, optional): **'greedy'** or **'optimal'** matching (see note); Default **'greedy'**
 
     Returns:
         Boolean: **True** if a match was found.
@@ -241,22 +244,182 @@ class MatchFilter:
     Note:
         The ``match_criteria`` function takes two bounding boxes as input
         and must return a Number to compare with the matching threshold.
+
+    Note:
+        By default, every box that is passed to this filter gets greedily matched with the remaining box that has the best match with it. |br|
+        With an **'optimal'** assignment, you first need to pass all boxes to :func:`assign`,
+        which matches them with the boxes of this filter so that the sum of the matching criteria is maximal.
+        Afterwards, the filter returns **True** for the boxes that got matched.
+        This only works with :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa` as ``match_criteria``.
+
+        >>> match_filter = bbb.MatchFilter(annotations, assignment='optimal')
+        >>> match_filter.assign(detections)
+        >>> matched, unmatched = bbb.filter_split(detections, match_filter)
+
+    Note:
+        If the ``match_criteria`` is :func:`~brambox.boxes.iou` or :func:`~brambox.boxes.ioa`, the ``match_threshold`` is bigger than zero
+        and there are at least :attr:`index_threshold` boxes, the boxes are sorted on their x coordinate
+        and only the boxes that overlap with the given box on the x-axis are compared with it.
+        This gives the same results, but is a lot faster for crowded images.
     """
 
+    index_threshold = 256  #: Minimal number of boxes for which a spatial index is used
+
     def __init__(
-        self, boxes, remove_on_match=True, match_threshold=0.5, match_criteria=iou
+        self,
+        boxes,
+        remove_on_match=True,
+        match_threshold=0.5,
+        match_criteria=iou,
+        assignment='greedy',
     ):
         self.boxes = copy.deepcopy(boxes)
         self.rm = remove_on_match
         self.thresh = match_threshold
         self.fn = match_criteria
+        self.assignment = assignment
+        self.assigned = None
+
+        if assignment not in ('greedy', 'optimal'):
+            raise ValueError(
+                f'Unknown assignment [{assignment}], should be greedy or optimal'
+            )
+        if assignment == 'optimal' and self.fn not in (iou, ioa):
+            raise ValueError('Optimal assignment is only supported for iou and ioa')
+
+        if (
+            self.fn in (iou, ioa)
+            and self.thresh > 0
+            and len(self.boxes) >= self.index_threshold
+        ):
+            self.index = SweepIndex(self.boxes)
+        else:
+            self.index = None
+
+    def assign(self, boxes):
+        """ Optimally match a list of boxes with the boxes of this filter.
+
+        Args:
+            boxes (list): Bounding boxes that will be passed to this filter
+
+        Note:
+            The boxes are remembered by their identity,
+            so you need to pass the same objects to the filter afterwards.
+        """
+        if self.assignment != 'optimal':
+            raise ValueError(
+                'MatchFilter.assign can only be used with an optimal assignment'
+            )
+
+        matches = assign_boxes(boxes, self.boxes, self.thresh, self.fn, 'optimal')
+        self.assigned = {
+            id(box): match for box, match in zip(boxes, matches.tolist()) if match >= 0
+        }
+        self.removed = []
 
     def __call__(self, box):
-        match = match_detection_to_annotations(box, self.boxes, self.thresh, self.fn)
+        if self.assignment == 'optimal':
+            return self._call_assigned(box)
+
+        if self.index is None:
+            match = match_detection_to_annotations(box, self.boxes, self.thresh, self.fn)
+        else:
+            match = self.index.match(box, self.thresh, self.fn)
 
         if match is None:
             return False
 
         if self.rm:
+            if self.index is not None:
+                match = self.index.remove(match)
             del self.boxes[match]
         return True
+
+    def _call_assigned(self, box):
+        """ Check whether a box got matched in :func:`assign`. """
+        if self.assigned is None:
+            raise ValueError(
+                'You need to call MatchFilter.assign before using an optimal assignment'
+            )
+
+        match = self.assigned.get(id(box))
+        if match is None:
+            return False
+
+        if self.rm:
+            del self.assigned[id(box)]
+            position = match - bisect_left(self.removed, match)
+            insort(self.removed, match)
+            del self.boxes[position]
+        return True
+
+
+class SweepIndex:
+    """ Spatial index that sorts bounding boxes on their x coordinate.
+    This index finds the best match for a box, by only considering the boxes that overlap with it on the x-axis.
+
+    Args:
+        boxes (list): List of bounding boxes to index
+
+    Note:
+        Boxes that are removed from the index keep their original index, which is what :func:`match` returns.
+        :func:`remove` returns the position of the box in the original list, after removing the previously removed boxes.
+    """
+
+    def __init__(self, boxes):
+        self.boxes = list(boxes)
+        order = sorted(range(len(self.boxes)), key=lambda i: self.boxes[i].x_top_left)
+        self.starts = [self.boxes[i].x_top_left for i in order]
+        self.order = order
+        self.max_width = max((box.width for box in self.boxes), default=0)
+        self.removed = []
+        self.removed_set = set()
+
+    def match(self, box, overlap_threshold, overlap_fn):
+        """ Compute the best match between a given box and the boxes in the index.
+        This gives the same result as :func:`~brambox.boxes.statistics.util.match_detection_to_annotations`,
+        for overlap functions that are zero when the boxes do not intersect and an ``overlap_threshold`` bigger than zero.
+
+        Args:
+            box (brambox.boxes.box.Box): Box to match
+            overlap_threshold (Number): Minimum overlap threshold to consider the boxes as matched
+            overlap_fn (function): Overlap area calculation function
+
+        Returns:
+            int or None: original index of the best matching box
+        """
+        lower = box.x_top_left - self.max_width
+        lower -= 1e-9 * (abs(box.x_top_left) + abs(self.max_width) + 1)
+        start = bisect_left(self.starts, lower)
+        stop = bisect_left(self.starts, box.x_top_left + box.width)
+
+        best_overlap = overlap_threshold
+        best_index = None
+        for i in sorted(self.order[start:stop]):
+            if i in self.removed_set:
+                continue
+            candidate = self.boxes[i]
+            if candidate.class_label != box.class_label:
+                continue
+
+            overlap = overlap_fn(candidate, box)
+            if overlap < best_overlap:
+                continue
+            best_overlap = overlap
+            best_index = i
+
+        return best_index
+
+    def remove(self, index):
+        """ Remove a box from the index.
+
+        Args:
+            index (int): Original index of the box
+
+        Returns:
+            int: current position of the box in the list, with all previously removed boxes deleted
+        """
+        position = index - bisect_left(self.removed, index)
+        insort(self.removed, index)
+        self.removed_set.add(index)
+        return position
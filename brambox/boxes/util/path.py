@@ -9,14 +9,18 @@ import os
 from pathlib import Path
 import glob
 
+from .archive import SEPARATOR, archive_mode, expand_archive
+
 __all__ = ['expand']
 
 
 def files(folder):
     """ List all files in a directory omitting directories. """
-    for filepath in Path(folder).glob('**/*'):
-        if filepath.is_file():
-            yield str(filepath)
+    for entry in os.scandir(str(Path(folder))):
+        if entry.is_dir():
+            yield from files(entry.path)
+        elif entry.is_file():
+            yield entry.path
 
 
 def strider(elements, stride, offset):
@@ -66,13 +70,22 @@ def expand(expr, stride=1, offset=0):
         - a directory -> return files from directory and subdirectories (recursive)
         - path with **'*'** wildcard -> return globbed files (recursive if **'\\*\\*'** is used)
         - path with **'%d'** wildcard -> return incremental files
+        - an archive (**.tar**, **.tar.gz**, **.tgz**, **.tar.bz2**, **.tar.xz** or **.zip**) -> return all files in the archive
+        - archive path followed by **'::'** and a file, folder or **'\\*'** wildcard inside the archive -> return the selected files of the archive
+
+        Files inside an archive are returned as ``archive::member`` paths (eg. ``labels.tar::train/img_000.txt``),
+        which can be read by :func:`~brambox.boxes.parse` and :func:`~brambox.boxes.iparse`.
 
     Warning:
         If you use **'\\*'** wildcards in your expression, this function glob it recursively,
         meaning **'\\*\\*'** wildcards will go down through all the subdirectories.
         If the folder contains symlinked loops, this will cause this function to generate the same files over and over again.
     """
-    if os.path.isdir(expr):
+    if SEPARATOR in expr and os.path.isfile(expr.split(SEPARATOR, 1)[0]):
+        return strider(expand_archive(expr), stride, offset)
+    elif archive_mode(expr) is not None and os.path.isfile(expr):
+        return strider(expand_archive(expr + SEPARATOR), stride, offset)
+    elif os.path.isdir(expr):
         return strider(sorted(files(expr)), stride, offset)
     elif os.path.isfile(expr):
         return [expr]
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright EAVISE
+#
+#   Sharded bounding box datasets with random access per image
+#
+
+import os
+import threading
+from collections.abc import Mapping
+import numpy as np
+from .convert import create_parser
+from ..box import ParserType
+from ..boxset import image_id_array
+
+__all__ = ['ShardReader', 'ShardWriter']
+
+#: Name of the index file of a sharded dataset
+INDEX_NAME = 'index.npz'
+
+
+class ShardWriter:
+    """ Write a bounding box dataset as a number of shard files and an index.
+    The boxes of every image get serialized with the parser of ``fmt`` and appended to one of the shards,
+    while the index keeps track of the shard, byte offset and length of every image.
+
+    Args:
+        folder (str): Folder to write the dataset in
+        fmt (str or class): Format from the :mod:`brambox.boxes.format <brambox.boxes>` dictionary, used to serialize the boxes of every image
+        shards (int, optional): Number of shard files; Default **1**
+        **kwargs: Keyword arguments that are passed to the parser
+
+    Note:
+        The images are distributed over the shards in a round robin fashion. |br|
+        The index is only written when the writer gets closed, so an interrupted dataset has no index and cannot be read.
+        When it is used as a context manager, the index is not written if an exception was raised.
+
+    Example:
+        >>> with brambox.boxes.ShardWriter('dataset', 'anno_kitti', shards=8) as writer:
+        ...     for img_id, annos in brambox.boxes.iparse('anno_kitti', 'labels/*.txt'):
+        ...         writer.write(img_id, annos)
+    """
+
+    def __init__(self, folder, fmt, shards=1, **kwargs):
+        if shards < 1:
+            raise ValueError(f'The number of shards should be at least 1 [{shards}]')
+
+        self.folder = folder
+        self.parser = create_parser(fmt, **kwargs)
+        self.shard_names = [f'{i:05d}-of-{shards:05d}.shard' for i in range(shards)]
+
+        os.makedirs(folder, exist_ok=True)
+        self._files = [
+            open(os.path.join(folder, name), 'wb') for name in self.shard_names
+        ]
+        self._image_ids = []
+        self._seen = set()
+        self._shard = []
+        self._offset = []
+        self._length = []
+
+    def write(self, image_id, boxes):
+        """ Serialize and write the bounding boxes of one image.
+
+        Args:
+            image_id: Image identifier
+            boxes (list): Bounding boxes of the image
+        """
+        if image_id in self._seen:
+            raise ValueError(f'Image [{image_id}] was already written to this dataset')
+
+        if self.parser.parser_type == ParserType.SINGLE_FILE:
+            record = self.parser.serialize({image_id: boxes})
+        else:
+            record = self.parser.serialize(boxes)
+        if isinstance(record, str):
+            record = record.encode('utf-8')
+
+        shard = len(self._image_ids) % len(self._files)
+        f = self._files[shard]
+        self._shard.append(shard)
+        self._offset.append(f.tell())
+        self._length.append(len(record))
+        self._image_ids.append(image_id)
+        self._seen.add(image_id)
+        f.write(record)
+
+    def close(self):
+        """ Close the shard files and write the index. """
+        if self._files is None:
+            return
+        self._close_files()
+
+        index = os.path.join(self.folder, INDEX_NAME)
+        tmp_index = os.path.join(self.folder, f'.{INDEX_NAME}.{os.getpid()}.tmp')
+        with open(tmp_index, 'wb') as f:
+            np.savez(
+                f,
+                image_ids=image_id_array(self._image_ids),
+                shards=np.array(self.shard_names, dtype=np.str_),
+                shard=np.array(self._shard, dtype=np.int32),
+                offset=np.array(self._offset, dtype=np.int64),
+                length=np.array(self._length, dtype=np.int64),
+            )
+        os.replace(tmp_index, index)
+
+    def _close_files(self):
+        """ Close the shard files without writing the index. """
+        for f in self._files:
+            f.close()
+        self._files = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._files is not None:
+            self._close_files()
+
+
+class ShardReader(Mapping):
+    """ Read a dataset that was written with :class:`~brambox.boxes.ShardWriter` or ``generate(..., shards=N)``.
+    This class behaves as a read-only dictionary ``{"image_id": [box, box, ...], ...}``.
+    Opening a dataset only loads the index and getting the boxes of an image only reads and deserializes that image.
+
+    Args:
+        folder (str): Folder of the dataset
+        fmt (str or class): Format from the :mod:`brambox.boxes.format <brambox.boxes>` dictionary, that was used to write the dataset
+        **kwargs: Keyword arguments that are passed to the parser
+
+    Note:
+        The shard files are opened when they are first needed and kept open until :func:`close` gets called.
+        Reading is thread safe.
+
+    Example:
+        >>> annos = brambox.boxes.ShardReader('dataset', 'anno_kitti')
+        >>> annos['img_000123']
+        [KittiAnnotation {...}, ...]
+    """
+
+    def __init__(self, folder, fmt, **kwargs):
+        self.folder = folder
+        self.parser = create_parser(fmt, **kwargs)
+
+        with np.load(os.path.join(folder, INDEX_NAME), allow_pickle=False) as index:
+            self.image_ids = index['image_ids'].tolist()
+            self.shard_names = index['shards'].tolist()
+            self._shard = index['shard']
+            self._offset = index['offset']
+            self._length = index['length']
+        self._index = {img_id: i for i, img_id in enumerate(self.image_ids)}
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def read(self, image_id):
+        """ Read the serialized bounding boxes of an image.
+
+        Args:
+            image_id: Image identifier
+
+        Returns:
+            bytes: Serialized boxes, as written by the parser
+        """
+        idx = self._index[image_id]
+        shard = int(self._shard[idx])
+        offset = int(self._offset[idx])
+        length = int(self._length[idx])
+
+        with self._lock:
+            f = self._files.get(shard)
+            if f is None:
+                f = self._files[shard] = open(
+                    os.path.join(self.folder, self.shard_names[shard]), 'rb'
+                )
+            f.seek(offset)
+            return f.read(length)
+
+    def close(self):
+        """ Close the shard files. """
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    def __getitem__(self, image_id):
+        record = self.read(image_id)
+        if 'b' not in self.parser.read_mode:
+            record = record.decode('utf-8')
+
+        if self.parser.parser_type == ParserType.SINGLE_FILE:
+            boxes = []
+            for image_boxes in self.parser.deserialize(record).values():
+                boxes += image_boxes
+            return boxes
+
+        return self.parser.deserialize(record)
+
+    def __contains__(self, image_id):
+        return image_id in self._index
+
+    def __iter__(self):
+        return iter(self.image_ids)
+
+    def __len__(self):
+        return len(self.image_ids)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__} {{folder = {self.folder}, parser = {self.parser.__class__.__name__}, images = {len(self)}, shards = {len(self.shard_names)}}}'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import unittest
+from brambox.boxes.annotations.annotation import Annotation
+from brambox.boxes.annotations import NpzParser
+from brambox.boxes.detections.detection import Detection
+
+
+class TestNpzParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = NpzParser()
+
+    def tearDown(self):
+        pass
+
+    def test_serialize_deserialize(self):
+        """ test basic serialization/deserialization with parser """
+        testanno1 = Annotation()
+        testanno2 = Annotation()
+        testanno2.class_label = 'person'
+        testanno2.occluded_fraction = 0.5
+        testanno2.visible_width = 10
+        testanno2.ignore = True
+        obj = {
+            'img_1': [testanno1, testanno2],
+            'img_2': [testanno1, testanno1, testanno1],
+        }
+
+        bytestream = self.parser.serialize(obj)
+        obj2 = self.parser.deserialize(bytestream)
+
+        self.assertEqual(dict(obj2.items()), obj)
+
+    def test_serialize_detections(self):
+        """ test serialization of detections as annotations """
+        testdet = Detection()
+        testdet.class_label = 'person'
+        testdet.x_top_left = 5
+        obj = {'img_1': [testdet]}
+
+        obj2 = self.parser.deserialize(self.parser.serialize(obj))
+        self.assertEqual(obj2['img_1'], [Annotation.create(testdet)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import io
 import unittest
 from brambox.boxes.annotations.annotation import Annotation
 from brambox.boxes.annotations import VaticAnnotation, VaticParser
@@ -96,6 +97,19 @@ class TestVaticParser(unittest.TestCase):
         string = self.parser.serialize(obj)
         self.assertEqual(string, vatic_string)
 
+    def test_iter_serialize(self):
+        """ test if serializing per image gives the same string """
+        testanno1 = Annotation()
+        testanno2 = Annotation()
+        testanno2.class_label = 'person'
+        obj = {}
+        obj['0'] = [testanno1, testanno1, testanno2]
+        obj['2'] = []
+        obj['1'] = [testanno2]
+
+        string = ''.join(self.parser.iter_serialize(iter(obj.items())))
+        self.assertEqual(string, vatic_string)
+
     def test_deserialize(self):
         """ test if basic deserialize works """
         obj = self.parser.deserialize(vatic_string)
@@ -106,6 +120,15 @@ class TestVaticParser(unittest.TestCase):
         self.assertEqual(obj['0'][0].class_label, '')
         self.assertEqual(obj['1'][0].class_label, 'person')
 
+    def test_deserialize_file(self):
+        """ test if deserializing a file line by line gives the same result """
+        lines = vatic_string.splitlines()
+        string = '\n'.join([lines[0], lines[3], lines[1], lines[2]])
+        obj = self.parser.deserialize_file(io.StringIO(string))
+        self.assertEqual(obj, self.parser.deserialize(string))
+        self.assertEqual(list(obj.keys()), ['0', '1'])
+        self.assertEqual(len(obj['0']), 3)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 import unittest
+import yaml
+from brambox.boxes import generate
 from brambox.boxes.annotations.annotation import Annotation
 from brambox.boxes.annotations import YamlAnnotation, YamlParser
 
@@ -109,6 +113,56 @@ class TestYamlParser(unittest.TestCase):
         string = self.parser.serialize(obj)
         self.assertEqual(string, yaml_string)
 
+    def test_iter_serialize(self):
+        """ test serialization per image with parser """
+        testanno1 = Annotation()
+        testanno2 = Annotation()
+        testanno2.class_label = 'person'
+        obj = {
+            'img_1': [testanno1, testanno2],
+            'img_2': [testanno1, testanno1, testanno1],
+        }
+
+        string = ''.join(self.parser.iter_serialize(iter(obj.items())))
+        self.assertEqual(string, self.parser.serialize(obj))
+
+        obj = {'img_2': obj['img_2'], 'img_1': obj['img_1']}
+        string = ''.join(self.parser.iter_serialize(obj.items()))
+        self.assertEqual(string, self.parser.serialize(obj))
+
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, 'annotations.yaml')
+            generate('anno_yaml', obj, filename)
+            with open(filename) as f:
+                self.assertEqual(f.read(), self.parser.serialize(obj))
+
+    def test_empty(self):
+        """ test round trip of an empty dataset """
+        self.assertEqual(''.join(self.parser.iter_serialize({}.items())), self.parser.serialize({}))
+
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, 'annotations.yaml')
+            generate('anno_yaml', {}, filename)
+            with open(filename) as f:
+                self.assertEqual(self.parser._deserialize_images(yaml.safe_load(f)), {})
+
+        self.assertEqual(self.parser._deserialize_images(yaml.safe_load('')), {})
+
+    def test_select(self):
+        """ test creating only the annotations of the selected images """
+        testanno1 = Annotation()
+        testanno2 = Annotation()
+        testanno2.x_top_left = 5
+        obj = {'img_3': [testanno1], 'img_1': [], 'img_2': [testanno2, testanno1]}
+        yml_obj = yaml.safe_load(self.parser.serialize(obj))
+
+        obj = self.parser._deserialize_images(
+            yml_obj, lambda i: i != 'img_1', lambda ids: sorted(ids)[:1]
+        )
+        self.assertEqual(list(obj.keys()), ['img_2'])
+        self.assertEqual(len(obj['img_2']), 2)
+        self.assertEqual(obj['img_2'][0].x_top_left, 5)
+
     def test_deserialize(self):
         """ test basic deserialization with parser """
         obj = self.parser.deserialize(yaml_string)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+import numpy as np
+from brambox.boxes.detections.detection import Detection
+from brambox.boxes.detections import NpzParser
+
+
+class TestNpzParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = NpzParser()
+        testdet1 = Detection()
+        testdet1.confidence = 0.25
+        testdet2 = Detection()
+        testdet2.class_label = 'person'
+        testdet2.object_id = 3
+        testdet2.width = 12.5
+        self.obj = {
+            'img_1': [testdet1, testdet2],
+            'img_2': [],
+            'img_3': [testdet2, testdet1, testdet1],
+        }
+
+    def tearDown(self):
+        pass
+
+    def test_serialize_deserialize(self):
+        """ test basic serialization/deserialization with parser """
+        bytestream = self.parser.serialize(self.obj)
+        obj2 = self.parser.deserialize(bytestream)
+
+        self.assertEqual(dict(obj2.items()), self.obj)
+
+    def test_deserialize_file(self):
+        """ test memory mapped deserialization of a file """
+        fd, filename = tempfile.mkstemp(suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.parser.serialize(self.obj))
+            with open(filename, 'rb') as f:
+                obj2 = self.parser.deserialize_file(f)
+                self.assertEqual(self.parser.scan_image_ids(f), list(self.obj.keys()))
+            self.assertIsInstance(obj2.columns['confidence'], np.memmap)
+            self.assertEqual(dict(obj2.items()), self.obj)
+
+            with open(filename, 'rb') as f:
+                obj2 = self.parser.deserialize_file(f, lambda img_id: img_id != 'img_1')
+            self.assertEqual(list(obj2.keys()), ['img_2', 'img_3'])
+            self.assertEqual(obj2['img_3'], self.obj['img_3'])
+        finally:
+            os.remove(filename)
+
+    def test_image_ids(self):
+        """ test integer image identifiers and invalid identifiers """
+        obj = {1: self.obj['img_1'], 5: self.obj['img_3']}
+        self.assertEqual(
+            dict(self.parser.deserialize(self.parser.serialize(obj)).items()), obj
+        )
+        obj = {1: self.obj['img_1'], 'img_3': self.obj['img_3']}
+        self.assertRaises(TypeError, self.parser.serialize, obj)
+
+
+if __name__ == '__main__':
+    unittest.main()
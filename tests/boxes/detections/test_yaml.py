@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 import unittest
+import yaml
+from brambox.boxes import generate
 from brambox.boxes.detections.detection import Detection
 from brambox.boxes.detections import YamlDetection, YamlParser
 
@@ -78,6 +82,33 @@ class TestYamlParser(unittest.TestCase):
         string = self.parser.serialize(obj)
         self.assertEqual(string, yaml_string)
 
+    def test_iter_serialize(self):
+        """ test serialization per image with parser """
+        testdet1 = Detection()
+        testdet2 = Detection()
+        testdet2.class_label = 'person'
+        testdet2.confidence = 0.90
+        obj = {'img_2': [testdet1, testdet1], 'img_1': [testdet1, testdet2], 'img_3': []}
+
+        string = ''.join(self.parser.iter_serialize(obj.items()))
+        self.assertEqual(string, self.parser.serialize(obj))
+        self.assertTrue(string.startswith('img_1:'))
+
+        string = ''.join(self.parser.iter_serialize(iter(obj.items())))
+        self.assertTrue(string.startswith('img_2:'))
+
+    def test_empty(self):
+        """ test round trip of an empty dataset """
+        self.assertEqual(''.join(self.parser.iter_serialize({}.items())), self.parser.serialize({}))
+
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, 'detections.yaml')
+            generate('det_yaml', {}, filename)
+            with open(filename) as f:
+                self.assertEqual(self.parser._deserialize_images(yaml.safe_load(f)), {})
+
+        self.assertEqual(self.parser._deserialize_images(yaml.safe_load('')), {})
+
     def test_deserialize(self):
         """ test basic deserialization with parser """
         obj = self.parser.deserialize(yaml_string)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import io
+import unittest
+import brambox.boxes as bbb
+from .test_match import random_dataset
+
+
+class TestEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.detections, self.annotations = random_dataset(5, num_images=60)
+        self.image_ids = list(self.detections.keys()) + [
+            key for key in self.annotations if key not in self.detections
+        ]
+
+    def test_update(self):
+        """ Incremental statistics should be the same as the statistics of the full dataset """
+        evaluator = bbb.Evaluator()
+        evaluator.compact_size = 7
+        for image_id in self.image_ids:
+            evaluator.update(
+                image_id, self.detections.get(image_id, []), self.annotations[image_id]
+            )
+
+        self.assertEqual(evaluator.num_images, len(self.annotations))
+        self.assertEqual(evaluator.pr(), bbb.pr(self.detections, self.annotations))
+        self.assertEqual(
+            evaluator.mr_fppi(), bbb.mr_fppi(self.detections, self.annotations)
+        )
+        self.assertEqual(
+            evaluator.ap(), bbb.ap(*bbb.pr(self.detections, self.annotations))
+        )
+        self.assertEqual(
+            evaluator.lamr(), bbb.lamr(*bbb.mr_fppi(self.detections, self.annotations))
+        )
+
+    def test_intermediate(self):
+        """ Statistics should be available after every update """
+        evaluator = bbb.Evaluator(0.3)
+        for i, image_id in enumerate(self.image_ids[:20]):
+            evaluator.update(
+                image_id, self.detections.get(image_id, []), self.annotations[image_id]
+            )
+            det = {
+                key: self.detections[key]
+                for key in self.image_ids[: i + 1]
+                if key in self.detections
+            }
+            anno = {key: self.annotations[key] for key in self.image_ids[: i + 1]}
+            if sum(not a.ignore for value in anno.values() for a in value) > 0:
+                self.assertEqual(evaluator.pr(), bbb.pr(det, anno, 0.3))
+
+    def test_empty(self):
+        """ An empty evaluator has no statistics """
+        evaluator = bbb.Evaluator()
+        self.assertEqual(evaluator.pr(), ([], []))
+        self.assertEqual(evaluator.num_images, 0)
+
+    def test_errors(self):
+        """ Adding an image twice or using a custom overlap function should fail """
+        evaluator = bbb.Evaluator()
+        evaluator.update('img', [], [])
+        self.assertRaises(ValueError, evaluator.update, 'img', [], [])
+        self.assertRaises(ValueError, bbb.Evaluator, 0.5, lambda a, b: 0)
+
+    def test_merge(self):
+        """ Merging the results of different parts should give the same statistics as the full dataset """
+        bounds = [0, 15, 16, 40, len(self.image_ids)]
+        results = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            ids = self.image_ids[start:stop]
+            det = {key: self.detections[key] for key in ids if key in self.detections}
+            anno = {key: self.annotations[key] for key in ids}
+            result = bbb.match_dataset(det, anno, 0.5)
+
+            buffer = io.BytesIO()
+            result.save(buffer)
+            buffer.seek(0)
+            results.append(bbb.MatchResult.load(buffer))
+
+        merged = results[0].merge(*results[1:])
+        self.assertEqual(
+            merged.cumulative_positives(),
+            bbb.match_detections(self.detections, self.annotations, 0.5),
+        )
+
+        evaluator = bbb.Evaluator()
+        evaluator.merge(merged)
+        self.assertEqual(evaluator.num_images, len(self.annotations))
+        self.assertEqual(evaluator.pr(), bbb.pr(self.detections, self.annotations))
+        self.assertEqual(
+            evaluator.mr_fppi(), bbb.mr_fppi(self.detections, self.annotations)
+        )
+        for label, curve in bbb.pr_per_class(self.detections, self.annotations).items():
+            self.assertEqual(evaluator.pr(label), curve)
+
+        self.assertRaises(
+            ValueError,
+            merged.merge,
+            bbb.match_dataset(self.detections, self.annotations, 0.7),
+        )
+
+    def test_save_labels(self):
+        """ Saved results should keep the type of the class labels """
+        detections, annotations = random_dataset(2, num_images=20, labels=(1, 2))
+        first = {key: annotations[key] for key in list(annotations)[:10]}
+        second = {key: annotations[key] for key in list(annotations)[10:]}
+
+        buffer = io.BytesIO()
+        bbb.match_dataset(
+            {key: detections[key] for key in first if key in detections}, first, 0.5
+        ).save(buffer)
+        buffer.seek(0)
+        result = bbb.MatchResult.load(buffer)
+        self.assertEqual(sorted(result.class_labels), [1, 2])
+
+        merged = result.merge(
+            bbb.match_dataset(
+                {key: detections[key] for key in second if key in detections},
+                second,
+                0.5,
+            )
+        )
+        self.assertEqual(sorted(merged.class_labels), [1, 2])
+        self.assertEqual(
+            merged.cumulative_positives(class_label=1),
+            bbb.match_detections(
+                {key: [d for d in value if d.class_label == 1] for key, value in detections.items()},
+                {key: [a for a in value if a.class_label == 1] for key, value in annotations.items()},
+                0.5,
+            ),
+        )
+
+        result.class_labels = [object()]
+        self.assertRaises(TypeError, result.save, io.BytesIO())
+
+    def test_merge_evaluators(self):
+        """ Merging evaluators should give the same statistics as one evaluator """
+        first = bbb.Evaluator()
+        second = bbb.Evaluator()
+        for i, image_id in enumerate(self.image_ids):
+            evaluator = first if i < 30 else second
+            evaluator.update(
+                image_id, self.detections.get(image_id, []), self.annotations[image_id]
+            )
+
+        first.merge(second)
+        self.assertEqual(
+            first.lamr(), bbb.lamr(*bbb.mr_fppi(self.detections, self.annotations))
+        )
+        self.assertRaises(ValueError, first.merge, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+import unittest
+import random
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+import brambox.boxes as bbb
+from brambox.boxes.statistics import match
+from brambox.boxes.statistics.match import _match_detections_loop
+
+
+def random_dataset(seed, num_images=40, labels=('person', 'car')):
+    """ Create random annotations and detections with lots of ties and overlaps """
+    rng = random.Random(seed)
+    annotations = {}
+    detections = {}
+
+    for i in range(num_images):
+        image_id = f'img_{i}'
+        annotations[image_id] = []
+        for _ in range(rng.randint(0, 8)):
+            anno = bbb.Annotation()
+            anno.class_label = rng.choice(labels)
+            anno.x_top_left = rng.randint(0, 40)
+            anno.y_top_left = rng.randint(0, 40)
+            anno.width = rng.randint(5, 30)
+            anno.height = rng.randint(5, 30)
+            anno.ignore = rng.random() < 0.2
+            annotations[image_id].append(anno)
+
+        if rng.random() < 0.1:
+            continue
+        detections[image_id] = []
+        for _ in range(rng.randint(0, 10)):
+            det = bbb.Detection()
+            det.class_label = rng.choice(labels)
+            det.x_top_left = rng.randint(0, 40)
+            det.y_top_left = rng.randint(0, 40)
+            det.width = rng.randint(5, 30)
+            det.height = rng.randint(5, 30)
+            det.confidence = rng.choice((0.1, 0.25, 0.5, 0.75, 0.9, rng.random()))
+            detections[image_id].append(det)
+
+        # Duplicate boxes, so that multiple annotations have the same overlap
+        if len(annotations[image_id]) > 0 and rng.random() < 0.3:
+            annotations[image_id].append(bbb.Annotation.create(annotations[image_id][0]))
+
+    return detections, annotations
+
+
+class TestMatchDetections(unittest.TestCase):
+    def assertSameMatch(self, detections, annotations, threshold, overlap_fn=bbb.iou):
+        expected = _match_detections_loop(detections, annotations, threshold, overlap_fn)
+        result = bbb.match_detections(detections, annotations, threshold, overlap_fn)
+        self.assertEqual(result, expected)
+        for values in result[:2]:
+            for value in values:
+                self.assertIs(type(value), int)
+
+    def test_regression_iou(self):
+        """ Vectorized matching should give the same results as the python implementation """
+        for seed in range(20):
+            detections, annotations = random_dataset(seed)
+            for threshold in (0.1, 0.3, 0.5, 0.7):
+                self.assertSameMatch(detections, annotations, threshold)
+
+    def test_regression_ioa(self):
+        """ Vectorized matching with ioa should give the same results as the python implementation """
+        for seed in range(10):
+            detections, annotations = random_dataset(seed)
+            self.assertSameMatch(detections, annotations, 0.5, bbb.ioa)
+
+    def test_boxset(self):
+        """ Matching BoxSets should give the same results as matching dictionaries """
+        for seed in range(5):
+            detections, annotations = random_dataset(seed)
+            expected = bbb.match_detections(detections, annotations, 0.5)
+            result = bbb.match_detections(
+                bbb.BoxSet.from_dict(detections), bbb.BoxSet.from_dict(annotations), 0.5
+            )
+            self.assertEqual(result, expected)
+
+    def test_workers(self):
+        """ Matching with multiple processes should give the same results """
+        detections, annotations = random_dataset(4, num_images=100)
+        expected = bbb.match_detections(detections, annotations, 0.5)
+        self.assertEqual(
+            bbb.match_detections(detections, annotations, 0.5, workers=3), expected
+        )
+        self.assertEqual(
+            bbb.match_detections(
+                bbb.BoxSet.from_dict(detections),
+                bbb.BoxSet.from_dict(annotations),
+                0.5,
+                workers=2,
+            ),
+            expected,
+        )
+        self.assertEqual(
+            bbb.mr_fppi(detections, annotations, workers=2),
+            bbb.mr_fppi(detections, annotations),
+        )
+
+    def test_custom_overlap_fn(self):
+        """ Custom overlap functions should use the python implementation """
+        detections, annotations = random_dataset(0)
+
+        def fn(a, b):
+            return bbb.iou(a, b)
+
+        self.assertEqual(
+            bbb.match_detections(detections, annotations, 0.5, fn),
+            bbb.match_detections(detections, annotations, 0.5),
+        )
+
+    def test_empty(self):
+        """ Empty inputs """
+        self.assertEqual(bbb.match_detections({}, {}, 0.5), ([], [], 0))
+        _, annotations = random_dataset(0)
+        self.assertSameMatch({}, annotations, 0.5)
+
+    def test_util_import(self):
+        """ match_detections should still be importable from the util module """
+        from brambox.boxes.statistics.util import match_detections
+
+        self.assertIs(bbb.match_detections, match.match_detections)
+        detections, annotations = random_dataset(0)
+        self.assertEqual(
+            match_detections(detections, annotations, 0.5),
+            bbb.match_detections(detections, annotations, 0.5),
+        )
+
+    def test_missing_annotations(self):
+        """ Detections of images without annotations should raise a KeyError, as before """
+        det = bbb.Detection()
+        self.assertRaises(KeyError, bbb.match_detections, {'img': [det]}, {}, 0.5)
+
+    def test_pr_unchanged(self):
+        """ pr and mr_fppi should not change """
+        detections, annotations = random_dataset(3)
+        tps, fps, num_annotations = _match_detections_loop(
+            detections, annotations, 0.5, bbb.iou
+        )
+        precision, recall = bbb.pr(detections, annotations)
+        self.assertEqual(precision, [tp / (tp + fp) for tp, fp in zip(tps, fps)])
+        self.assertEqual(recall, [tp / num_annotations for tp in tps])
+
+    def test_pr_range(self):
+        """ Matching multiple thresholds at once should give the same results as separate pr calls """
+        for seed in range(10):
+            detections, annotations = random_dataset(seed)
+            thresholds = (0.1, 0.5, 0.55, 0.9)
+            curves = bbb.pr_range(detections, annotations, thresholds)
+            self.assertEqual(len(curves), len(thresholds))
+            for curve, threshold in zip(curves, thresholds):
+                self.assertEqual(curve, bbb.pr(detections, annotations, threshold))
+
+        aps, mean_ap = bbb.ap_range(detections, annotations, workers=2)
+        self.assertEqual(len(aps), 10)
+        self.assertEqual(aps[0], bbb.ap(*bbb.pr(detections, annotations, 0.5)))
+        self.assertEqual(aps[-1], bbb.ap(*bbb.pr(detections, annotations, 0.95)))
+        self.assertAlmostEqual(mean_ap, sum(aps) / len(aps))
+
+    def test_pr_per_class(self):
+        """ Per class curves should give the same results as filtering the classes and calling pr """
+        for seed in range(10):
+            detections, annotations = random_dataset(
+                seed, labels=('person', 'car', 'bike')
+            )
+            curves = bbb.pr_per_class(
+                detections, annotations, workers=2 if seed == 0 else None
+            )
+            for label in ('person', 'car', 'bike'):
+                class_filter = bbb.ClassLabelFilter([label])
+                det = {
+                    key: [d for d in value if class_filter(d)]
+                    for key, value in detections.items()
+                }
+                anno = {
+                    key: [a for a in value if class_filter(a)]
+                    for key, value in annotations.items()
+                }
+                if not any(not a.ignore for value in anno.values() for a in value):
+                    self.assertNotIn(label, curves)
+                    continue
+                self.assertEqual(curves[label], bbb.pr(det, anno))
+
+        aps, mean_ap = bbb.mean_ap(detections, annotations)
+        self.assertEqual(aps.keys(), curves.keys())
+        self.assertAlmostEqual(mean_ap, sum(aps.values()) / len(aps))
+
+    def test_sweep(self):
+        """ Sort-and-sweep pairing in crowded images should give the same results """
+        sweep_threshold = match.sweep_threshold
+        match.sweep_threshold = 0
+        try:
+            for seed in range(10):
+                detections, annotations = random_dataset(seed)
+                for threshold in (0.1, 0.5):
+                    self.assertSameMatch(detections, annotations, threshold)
+                self.assertSameMatch(detections, annotations, 0.5, bbb.ioa)
+        finally:
+            match.sweep_threshold = sweep_threshold
+
+    def test_optimal(self):
+        """ Optimal assignment should maximize the sum of the overlaps """
+        anno = [bbb.Annotation(), bbb.Annotation()]
+        anno[0].width, anno[0].height = 10, 10
+        anno[1].x_top_left, anno[1].width, anno[1].height = 4, 10, 10
+        det = [bbb.Detection.create(anno[1]), bbb.Detection.create(anno[1])]
+        det[0].x_top_left, det[0].confidence = 2, 0.9
+        det[1].x_top_left, det[1].confidence = 6, 0.8
+
+        self.assertEqual(
+            bbb.match_detections({'img': det}, {'img': anno}, 0.5), ([1, 1], [0, 1], 2)
+        )
+        self.assertEqual(
+            bbb.match_detections({'img': det}, {'img': anno}, 0.5, assignment='optimal'),
+            ([1, 2], [0, 0], 2),
+        )
+
+    def test_optimal_regression(self):
+        """ Optimal assignment should give the same overlap sum as a dense linear sum assignment """
+        for seed in range(10):
+            detections, annotations = random_dataset(seed)
+            for image_id, det in detections.items():
+                anno = [a for a in annotations[image_id] if not a.ignore]
+                matches = match.assign_boxes(det, anno, 0.3, bbb.iou, 'optimal')
+                overlaps = bbb.iou_matrix(det, anno)
+                valid = overlaps >= 0.3
+                for i, d in enumerate(det):
+                    for j, a in enumerate(anno):
+                        valid[i, j] &= d.class_label == a.class_label
+                weights = np.where(valid, overlaps, 0)
+                rows, cols = linear_sum_assignment(weights, maximize=True)
+                expected = weights[rows, cols].sum()
+                result = sum(weights[i, j] for i, j in enumerate(matches) if j >= 0)
+                self.assertAlmostEqual(result, expected)
+
+            greedy = bbb.pr(detections, annotations, 0.3)
+            optimal = bbb.pr(detections, annotations, 0.3, assignment='optimal')
+            self.assertEqual(len(greedy[0]), len(optimal[0]))
+
+        self.assertRaises(
+            ValueError,
+            bbb.match_detections,
+            detections,
+            annotations,
+            0.5,
+            assignment='best',
+        )
+
+    def test_match_filter_optimal(self):
+        """ MatchFilter with optimal assignment """
+        detections, annotations = random_dataset(2)
+        for image_id, det in detections.items():
+            anno = annotations[image_id]
+            matches = match.assign_boxes(det, anno, 0.5, bbb.iou, 'optimal')
+            match_filter = bbb.MatchFilter(anno, assignment='optimal')
+            match_filter.assign(det)
+            matched, _ = bbb.filter_split(det, match_filter)
+            self.assertEqual(len(matched), int((matches >= 0).sum()))
+            self.assertEqual(len(match_filter.boxes), len(anno) - len(matched))
+
+        match_filter = bbb.MatchFilter([], assignment='optimal')
+        self.assertRaises(ValueError, match_filter, bbb.Detection())
+
+
+if __name__ == '__main__':
+    unittest.main()
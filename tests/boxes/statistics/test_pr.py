@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import math
+import unittest
+import brambox.boxes as bbb
+from .test_match import random_dataset
+
+
+def voc_ap(precision, recall):
+    """ Reference implementation of the PASCAL VOC 2010 average precision """
+    mrec = [0.0] + list(recall) + [1.0]
+    mpre = [0.0] + list(precision) + [0.0]
+    for i in range(len(mpre) - 2, -1, -1):
+        mpre[i] = max(mpre[i], mpre[i + 1])
+
+    return sum(
+        (mrec[i + 1] - mrec[i]) * mpre[i + 1]
+        for i in range(len(mrec) - 1)
+        if mrec[i + 1] != mrec[i]
+    )
+
+
+def coco_ap(precision, recall):
+    """ Reference implementation of the COCO average precision """
+    pr = list(precision)
+    for i in range(len(pr) - 1, 0, -1):
+        pr[i - 1] = max(pr[i - 1], pr[i])
+
+    q = []
+    for i in range(101):
+        threshold = i / 100
+        idx = next((j for j, r in enumerate(recall) if r >= threshold), None)
+        q.append(0.0 if idx is None else pr[idx])
+
+    return sum(q) / len(q)
+
+
+def reference_lamr(miss_rate, fppi, num_of_samples=9):
+    """ Reference implementation of the log average miss-rate, with linear interpolation between the curve points """
+    total = 0.0
+    for i in range(num_of_samples):
+        sample = 10 ** (-2.0 + 2.0 * i / (num_of_samples - 1))
+        if sample < fppi[0]:
+            value = 1.0
+        elif sample > fppi[-1]:
+            value = 0.0
+        else:
+            j = max(j for j, f in enumerate(fppi) if f <= sample)
+            if fppi[j] == sample:
+                value = miss_rate[j]
+            else:
+                t = (sample - fppi[j]) / (fppi[j + 1] - fppi[j])
+                value = miss_rate[j] + t * (miss_rate[j + 1] - miss_rate[j])
+        total += math.log(value)
+
+    return math.exp(total / num_of_samples)
+
+
+class TestAp(unittest.TestCase):
+    def test_voc(self):
+        """ VOC average precision should be the exact area under the precision envelope """
+        self.assertAlmostEqual(
+            bbb.ap([1.0, 0.5, 2 / 3], [0.5, 0.5, 1.0], mode='voc'), 5 / 6
+        )
+        for seed in range(10):
+            precision, recall = bbb.pr(*random_dataset(seed))
+            self.assertAlmostEqual(
+                bbb.ap(precision, recall, mode='voc'), voc_ap(precision, recall)
+            )
+
+    def test_coco(self):
+        """ COCO average precision should sample the precision envelope at 101 points """
+        self.assertAlmostEqual(bbb.ap([1.0], [0.5], mode='coco'), 51 / 101)
+        for seed in range(10):
+            precision, recall = bbb.pr(*random_dataset(seed))
+            self.assertAlmostEqual(
+                bbb.ap(precision, recall, mode='coco'), coco_ap(precision, recall)
+            )
+
+    def test_modes(self):
+        """ Empty curves and unknown modes """
+        self.assertNotEqual(bbb.ap([], [], mode='voc'), bbb.ap([], [], mode='voc'))
+        self.assertNotEqual(bbb.ap([], [], mode='coco'), bbb.ap([], [], mode='coco'))
+        self.assertRaises(ValueError, bbb.ap, [1.0], [1.0], mode='unknown')
+
+        detections, annotations = random_dataset(0)
+        aps, _ = bbb.ap_range(detections, annotations, (0.5,), mode='voc')
+        self.assertEqual(aps[0], bbb.ap(*bbb.pr(detections, annotations), mode='voc'))
+
+
+class TestLamr(unittest.TestCase):
+    def test_lamr(self):
+        """ The log average miss-rate should linearly interpolate the curve """
+        for seed in range(10):
+            detections, annotations = random_dataset(seed, num_images=100)
+            miss_rate, fppi = bbb.mr_fppi(detections, annotations)
+            self.assertAlmostEqual(
+                bbb.lamr(miss_rate, fppi), reference_lamr(miss_rate, fppi), 12
+            )
+            self.assertAlmostEqual(
+                bbb.lamr(miss_rate, fppi, 5), reference_lamr(miss_rate, fppi, 5), 12
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
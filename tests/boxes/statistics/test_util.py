@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import unittest
+import random
+import numpy as np
+import brambox.boxes as bbb
+from brambox.boxes.statistics.util import intersection, intersection_matrix
+
+
+def random_box(rng):
+    box = bbb.Box()
+    box.x_top_left = rng.uniform(0, 100)
+    box.y_top_left = rng.uniform(0, 100)
+    box.width = rng.uniform(1, 50)
+    box.height = rng.uniform(1, 50)
+    return box
+
+
+class TestOverlapMatrix(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.a = [random_box(rng) for _ in range(15)]
+        self.b = [random_box(rng) for _ in range(20)]
+        self.b[0].x_top_left = 1000  # Box without overlap
+
+    def test_intersection_matrix(self):
+        """ intersection_matrix should equal the scalar intersection function """
+        mat = intersection_matrix(self.a, self.b)
+        self.assertEqual(mat.shape, (15, 20))
+        for i, a in enumerate(self.a):
+            for j, b in enumerate(self.b):
+                self.assertEqual(mat[i, j], intersection(a, b))
+
+    def test_iou_matrix(self):
+        """ iou_matrix should equal the scalar iou function """
+        mat = bbb.iou_matrix(self.a, self.b)
+        for i, a in enumerate(self.a):
+            for j, b in enumerate(self.b):
+                self.assertEqual(mat[i, j], bbb.iou(a, b))
+
+    def test_ioa_matrix(self):
+        """ ioa_matrix should equal the scalar ioa function for every denominator """
+        for denominator in ('a', 'b', 'min', 'max'):
+            mat = bbb.ioa_matrix(self.a, self.b, denominator)
+            for i, a in enumerate(self.a):
+                for j, b in enumerate(self.b):
+                    self.assertEqual(mat[i, j], bbb.ioa(a, b, denominator))
+
+    def test_coordinate_arrays(self):
+        """ The matrix functions should also accept coordinate arrays """
+        coords_a = np.array(
+            [[b.x_top_left, b.y_top_left, b.width, b.height] for b in self.a]
+        )
+        coords_b = np.array(
+            [[b.x_top_left, b.y_top_left, b.width, b.height] for b in self.b]
+        )
+        np.testing.assert_array_equal(
+            bbb.iou_matrix(coords_a, coords_b), bbb.iou_matrix(self.a, self.b)
+        )
+        np.testing.assert_array_equal(
+            bbb.ioa_matrix(coords_a, self.b, 'min'), bbb.ioa_matrix(self.a, self.b, 'min')
+        )
+
+    def test_empty(self):
+        """ Empty inputs should give empty matrices """
+        self.assertEqual(bbb.iou_matrix([], self.b).shape, (0, 20))
+        self.assertEqual(bbb.ioa_matrix(self.a, []).shape, (15, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
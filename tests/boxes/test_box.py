@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import unittest
-from brambox.boxes import Box
+import numpy as np
+from brambox.boxes import Box, BoxSelection, BoxSet, Detection
 
 
 class TestBox(unittest.TestCase):
@@ -22,5 +23,60 @@ class TestBox(unittest.TestCase):
         self.assertRaises(TypeError, Box.create, 3.1415)
 
 
+class TestBoxSelection(unittest.TestCase):
+    def setUp(self):
+        self.items = [
+            ('img_1', 'person', 0.3, 'a'),
+            ('img_1', 'car', 0.9, 'b'),
+            ('img_2', 'person', 0.1, 'c'),
+            ('img_1', 'person', 0.5, 'd'),
+            ('img_1', 'person', 0.3, 'e'),
+            ('img_3', 'person', 0.8, 'f'),
+        ]
+
+    def test_select(self):
+        """ Selected values keep their order and images without selected boxes are kept """
+        selection = BoxSelection(min_confidence=0.3, class_labels=['person'])
+        self.assertEqual(
+            selection.select(self.items),
+            {'img_1': ['a', 'd', 'e'], 'img_2': [], 'img_3': ['f']},
+        )
+
+        selection = BoxSelection(top_k=2)
+        self.assertEqual(
+            selection.select(self.items),
+            {'img_1': ['b', 'd'], 'img_2': ['c'], 'img_3': ['f']},
+        )
+
+        selection = BoxSelection(top_k=3)
+        self.assertEqual(selection.select(self.items)['img_1'], ['a', 'b', 'd'])
+        selection = BoxSelection(top_k=0)
+        self.assertEqual(selection.select(self.items)['img_1'], [])
+
+    def test_select_columns(self):
+        """ Selecting from a BoxSet should give the same boxes as selecting from the objects """
+        boxes = {}
+        for img_id, class_label, confidence, _ in self.items:
+            det = Detection()
+            det.class_label = class_label
+            det.confidence = confidence
+            boxes.setdefault(img_id, []).append(det)
+        boxset = BoxSet.from_dict(boxes)
+
+        for kwargs in (
+            {'min_confidence': 0.3},
+            {'class_labels': ['car']},
+            {'top_k': 2, 'class_labels': ['person']},
+            {'top_k': 1, 'min_confidence': 0.2},
+        ):
+            selection = BoxSelection(**kwargs)
+            expected = {img_id: selection(dets) for img_id, dets in boxes.items()}
+            result = selection.select_columns(boxset)
+            self.assertEqual(result.to_dict(), expected)
+            np.testing.assert_array_equal(
+                np.diff(result.offsets), [len(v) for v in expected.values()]
+            )
+
+
 if __name__ == '__main__':
     unittest.main()
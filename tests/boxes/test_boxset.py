@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import os
+import unittest
+import pickle
+import tempfile
+import numpy as np
+import brambox.boxes as bbb
+from brambox.boxes.boxset import NO_OBJECT_ID
+
+
+class TestBoxSet(unittest.TestCase):
+    def setUp(self):
+        anno1 = bbb.Annotation()
+        anno1.class_label = 'person'
+        anno1.object_id = 3
+        anno1.x_top_left = 10
+        anno1.y_top_left = 20.5
+        anno1.width = 30
+        anno1.height = 40
+        anno1.ignore = True
+        anno1.occluded_fraction = 0.25
+        anno2 = bbb.Annotation()
+        anno2.class_label = 'car'
+        anno2.lost = True
+        anno2.visible_width = 4.0
+
+        det1 = bbb.Detection()
+        det1.class_label = 'person'
+        det1.confidence = 0.75
+        det2 = bbb.Detection()
+        det2.x_top_left = 5.0
+        det2.confidence = 0.5
+
+        self.annos = {'img_1': [anno1, anno2], 'img_2': [], 'img_3': [anno2]}
+        self.dets = {'img_1': [det1], 'img_2': [det2, det1]}
+
+    def test_roundtrip_annotations(self):
+        """ Converting annotations to a BoxSet and back should be lossless """
+        boxset = bbb.BoxSet.from_dict(self.annos)
+        self.assertEqual(boxset.box_type, bbb.Annotation)
+        self.assertEqual(boxset.to_dict(), self.annos)
+        self.assertEqual(list(boxset.keys()), list(self.annos.keys()))
+
+    def test_roundtrip_detections(self):
+        """ Converting detections to a BoxSet and back should be lossless """
+        boxset = bbb.BoxSet.from_dict(self.dets)
+        self.assertEqual(boxset.box_type, bbb.Detection)
+        self.assertEqual(boxset.to_dict(), self.dets)
+        self.assertIn('confidence', boxset.columns)
+        self.assertNotIn('ignore', boxset.columns)
+
+    def test_columns(self):
+        """ Test the columnar layout of the set """
+        boxset = bbb.BoxSet.from_dict(self.annos)
+        self.assertEqual(boxset.num_boxes, 3)
+        self.assertEqual(len(boxset), 3)
+        np.testing.assert_array_equal(boxset.offsets, [0, 2, 2, 3])
+        np.testing.assert_array_equal(boxset.width, [30, 0, 0])
+        np.testing.assert_array_equal(boxset.ignore, [True, False, False])
+        np.testing.assert_array_equal(boxset.object_id, [3, NO_OBJECT_ID, NO_OBJECT_ID])
+        self.assertEqual(boxset.class_labels, ['person', 'car'])
+        self.assertEqual(list(boxset.class_label_array()), ['person', 'car', 'car'])
+        self.assertEqual(boxset.image_slice('img_3'), slice(2, 3))
+
+    def test_lazy_views(self):
+        """ Indexing a set should create new box objects of the correct type """
+        boxset = bbb.BoxSet.from_dict(self.dets)
+        boxes = boxset['img_2']
+        self.assertEqual(len(boxes), 2)
+        self.assertIsInstance(boxes[0], bbb.Detection)
+        self.assertIsInstance(boxes[0].confidence, float)
+        self.assertIsNone(boxes[0].object_id)
+        self.assertIsNot(boxes[0], boxset['img_2'][0])
+        self.assertIn('img_1', boxset)
+        self.assertNotIn('img_3', boxset)
+        self.assertRaises(KeyError, boxset.__getitem__, 'img_3')
+
+    def test_object_id_fallback(self):
+        """ Non integer object ids should be kept as they are """
+        self.annos['img_3'][0].object_id = 'track_7'
+        boxset = bbb.BoxSet.from_dict(self.annos)
+        self.assertEqual(boxset.object_id.dtype, object)
+        self.assertEqual(boxset.to_dict(), self.annos)
+
+    def test_from_columns(self):
+        """ Missing columns should get the default values of the box type """
+        boxset = bbb.BoxSet.from_columns(
+            bbb.Annotation,
+            ['img_1', 'img_2', 'img_3'],
+            [2, 0, 1],
+            ['person', 'car', 'car'],
+            {
+                'x_top_left': [10, 0, 0],
+                'y_top_left': [20.5, 0, 0],
+                'width': [30, 0, 0],
+                'height': [40, 0, 0],
+                'object_id': [3, NO_OBJECT_ID, NO_OBJECT_ID],
+                'ignore': [True, False, False],
+                'lost': [False, True, True],
+                'occluded_fraction': [0.25, 0, 0],
+                'visible_width': [0, 4, 4],
+            },
+        )
+        self.assertEqual(boxset.to_dict(), self.annos)
+        np.testing.assert_array_equal(boxset.difficult, [False, False, False])
+
+    def test_take(self):
+        """ Taking images should keep their boxes, in the given order """
+        boxset = bbb.BoxSet.from_dict(self.annos)
+        subset = boxset.take(['img_3', 'img_2', 'img_1'])
+        self.assertEqual(list(subset.keys()), ['img_3', 'img_2', 'img_1'])
+        self.assertEqual(subset.to_dict(), self.annos)
+        self.assertIs(boxset.take(list(self.annos.keys())), boxset)
+        self.assertEqual(boxset.take([]).num_boxes, 0)
+        self.assertRaises(KeyError, boxset.take, ['img_4'])
+
+    def test_save_load(self):
+        """ Saving and memory mapping a BoxSet should be lossless """
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, 'boxes.npz')
+            for boxes, box_type in (
+                (self.annos, bbb.Annotation),
+                (self.dets, bbb.Detection),
+            ):
+                bbb.BoxSet.from_dict(boxes).save(filename)
+                boxset = bbb.BoxSet.load(filename, box_type)
+                self.assertIsInstance(boxset.columns['x_top_left'], np.memmap)
+                self.assertEqual(boxset.to_dict(), boxes)
+                boxset = bbb.BoxSet.load(filename, box_type, mmap_mode=None)
+                self.assertNotIsInstance(boxset.columns['x_top_left'], np.memmap)
+                self.assertEqual(boxset.to_dict(), boxes)
+
+            bbb.BoxSet.from_dict({}).save(filename)
+            self.assertEqual(len(bbb.BoxSet.load(filename, bbb.Annotation)), 0)
+
+    def test_pickle(self):
+        """ A BoxSet should be picklable """
+        boxset = bbb.BoxSet.from_dict(self.annos)
+        boxset2 = pickle.loads(pickle.dumps(boxset))
+        self.assertEqual(boxset2.to_dict(), self.annos)
+
+    def test_invalid(self):
+        """ Test the consistency checks of the constructor """
+        boxset = bbb.BoxSet.from_dict(self.dets)
+        self.assertRaises(
+            ValueError,
+            bbb.BoxSet,
+            bbb.Detection,
+            boxset.image_ids,
+            boxset.offsets[:-1],
+            boxset.class_labels,
+            boxset.columns,
+        )
+        columns = dict(boxset.columns)
+        del columns['confidence']
+        self.assertRaises(
+            ValueError,
+            bbb.BoxSet,
+            bbb.Detection,
+            boxset.image_ids,
+            boxset.offsets,
+            boxset.class_labels,
+            columns,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+import brambox.boxes as bbb
+from .test_convert import random_annotations
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.annotations = random_annotations(0, 30)
+        self.labels = os.path.join(self.folder, 'labels')
+        os.makedirs(self.labels)
+        bbb.generate('anno_kitti', self.annotations, self.labels)
+        self.expected = bbb.parse('anno_kitti', self.labels)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_generate(self):
+        """ Multi file formats should be written into tar and zip archives """
+        for extension in ('.tar', '.tar.gz', '.tar.xz', '.zip'):
+            with self.subTest(extension=extension):
+                archive = os.path.join(self.folder, 'labels' + extension)
+                progress = []
+                bbb.generate(
+                    'anno_kitti',
+                    self.annotations,
+                    archive,
+                    progress=lambda count, _: progress.append(count),
+                )
+                self.assertEqual(progress, list(range(1, 31)))
+
+                self.assertEqual(bbb.parse('anno_kitti', archive), self.expected)
+                self.assertEqual(
+                    bbb.parse('anno_kitti', archive + '::*.txt', stride=3, offset=1),
+                    bbb.parse('anno_kitti', self.labels, stride=3, offset=1),
+                )
+                self.assertEqual(dict(bbb.iparse('anno_kitti', archive)), self.expected)
+
+    def test_members(self):
+        """ Selection expressions should be expanded inside the archive """
+        archive = os.path.join(self.folder, 'labels.tar')
+        with tarfile.open(archive, 'w') as tar:
+            tar.add(self.labels, 'train')
+            tar.add(os.path.join(self.labels, 'img_000.txt'), 'test/img_100.txt')
+
+        names = [os.path.basename(path) for path in bbb.expand(archive + '::train')]
+        self.assertEqual(names, sorted(os.listdir(self.labels)))
+        self.assertEqual(len(list(bbb.expand(archive + '::*/*.txt'))), 31)
+        self.assertEqual(len(list(bbb.expand(archive + '::**.txt'))), 31)
+        self.assertEqual(
+            list(bbb.expand(archive + '::test/img_100.txt')),
+            [archive + '::test/img_100.txt'],
+        )
+
+        parsed = bbb.parse('anno_kitti', archive + '::train/*.txt')
+        self.assertEqual(parsed, self.expected)
+        parsed = bbb.parse('anno_kitti', archive + '::train/*.txt', columnar=True)
+        self.assertEqual(parsed.to_dict(), self.expected)
+        parsed = bbb.parse('anno_kitti', archive + '::test', image_filter=['img_100'])
+        self.assertEqual(parsed, {'img_100': self.expected['img_000']})
+
+        with self.assertRaises(FileNotFoundError):
+            bbb.parse('anno_kitti', [archive + '::train/img_999.txt'])
+
+    def test_dot_members(self):
+        """ Member names starting with './' should be expanded and opened without that prefix """
+        pickle = os.path.join(self.folder, 'annotations.pkl')
+        bbb.generate('anno_pickle', self.annotations, pickle)
+        archive = os.path.join(self.folder, 'labels.tar')
+        with tarfile.open(archive, 'w') as tar:
+            tar.add(self.labels, './train')
+            tar.add(pickle, './data/annotations.pkl')
+
+        self.assertEqual(len(list(bbb.expand(archive + '::train/*.txt'))), 30)
+        self.assertEqual(
+            list(bbb.expand(archive + '::./data/annotations.pkl')),
+            [archive + '::data/annotations.pkl'],
+        )
+        self.assertEqual(bbb.parse('anno_kitti', archive + '::train/*.txt'), self.expected)
+        self.assertEqual(bbb.parse('anno_kitti', archive + '::train'), self.expected)
+        self.assertEqual(
+            bbb.parse('anno_pickle', archive + '::data/annotations.pkl'),
+            bbb.parse('anno_pickle', pickle),
+        )
+
+    def test_zip_member_stride(self):
+        """ Single file formats inside a zip should support offset and stride, also when the member cannot seek """
+        frames = {i: boxes for i, boxes in enumerate(self.annotations.values())}
+        filename = os.path.join(self.folder, 'annotations.txt')
+        bbb.generate('anno_vatic', frames, filename)
+        expected = bbb.parse('anno_vatic', filename, offset=1, stride=3)
+
+        archive = os.path.join(self.folder, 'annotations.zip')
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.write(filename, 'annotations.txt')
+
+        member = archive + '::annotations.txt'
+        self.assertEqual(bbb.parse('anno_vatic', member, offset=1, stride=3), expected)
+        with mock.patch.object(zipfile.ZipExtFile, 'seekable', return_value=False):
+            with mock.patch.object(zipfile.ZipExtFile, 'seek', side_effect=io.UnsupportedOperation):
+                self.assertEqual(bbb.parse('anno_vatic', member, offset=1, stride=3), expected)
+                self.assertEqual(bbb.parse('anno_vatic', member), bbb.parse('anno_vatic', filename))
+
+    def test_cache(self):
+        """ Files inside archives should be cached with the signature of the archive """
+        archive = os.path.join(self.folder, 'labels.zip')
+        bbb.generate('anno_kitti', self.annotations, archive + '::train')
+        cache = bbb.ParseCache(os.path.join(self.folder, 'cache'))
+
+        for _ in range(2):
+            parsed = bbb.parse('anno_kitti', archive + '::train', cache_dir=cache)
+            self.assertEqual(parsed, self.expected)
+        self.assertEqual(len(cache.entries()), 1)
+
+    def test_single_file(self):
+        """ Single file formats should be read from an archive member """
+        filename = os.path.join(self.folder, 'annotations.pkl')
+        bbb.generate('anno_pickle', self.annotations, filename)
+        expected = bbb.parse('anno_pickle', filename)
+
+        archive = os.path.join(self.folder, 'annotations.zip')
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.write(filename, 'data/annotations.pkl')
+        self.assertEqual(
+            bbb.parse('anno_pickle', archive + '::data/annotations.pkl'), expected
+        )
+
+        filename = os.path.join(self.folder, 'boxes.npz')
+        bbb.generate('anno_npz', self.annotations, filename)
+        archive = os.path.join(self.folder, 'boxes.tar.gz')
+        with tarfile.open(archive, 'w:gz') as tar:
+            tar.add(filename, 'boxes.npz')
+        parsed = bbb.parse('anno_npz', archive + '::boxes.npz', offset=2, stride=4)
+        self.assertEqual(parsed, bbb.parse('anno_npz', filename, offset=2, stride=4))
+
+    def test_writer(self):
+        """ An atomic writer should only create the archive when it is closed without errors """
+        archive = os.path.join(self.folder, 'data.tar.bz2')
+        with self.assertRaises(RuntimeError):
+            with bbb.ArchiveWriter(archive, atomic=True) as writer:
+                writer.write('a.txt', 'a')
+                raise RuntimeError()
+        self.assertFalse(os.path.exists(archive))
+        self.assertEqual(os.listdir(self.folder), ['labels'])
+
+        with bbb.ArchiveWriter(archive, atomic=True) as writer:
+            writer.write('a.txt', 'a')
+            writer.write('b/c.bin', b'\x00\x01')
+        with tarfile.open(archive) as tar:
+            self.assertEqual(tar.getnames(), ['a.txt', 'b/c.bin'])
+            self.assertEqual(tar.extractfile('b/c.bin').read(), b'\x00\x01')
+
+        with self.assertRaises(ValueError):
+            bbb.ArchiveWriter(os.path.join(self.folder, 'data.rar'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import bz2
+import gzip
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import brambox.boxes as bbb
+from .test_convert import random_annotations
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.annotations = random_annotations(0, 30)
+        self.frames = {i: boxes for i, boxes in enumerate(self.annotations.values())}
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_single_file(self):
+        """ Single file formats should infer the compression from the extension """
+        for fmt, name in (
+            ('anno_vatic', 'annotations.txt'),
+            ('anno_pickle', 'annotations.pkl'),
+            ('anno_npz', 'annotations.npz'),
+        ):
+            annotations = self.frames if fmt == 'anno_vatic' else self.annotations
+            filename = os.path.join(self.folder, name)
+            bbb.generate(fmt, annotations, filename)
+            expected = bbb.parse(fmt, filename)
+
+            for extension in bbb.compressions.values():
+                with self.subTest(fmt=fmt, extension=extension):
+                    bbb.generate(fmt, annotations, filename + extension, atomic=True)
+                    self.assertEqual(bbb.parse(fmt, filename + extension), expected)
+                    self.assertEqual(
+                        bbb.parse(fmt, filename + extension, offset=1, stride=3),
+                        bbb.parse(fmt, filename, offset=1, stride=3),
+                    )
+                    self.assertEqual(
+                        dict(bbb.iparse(fmt, filename + extension)),
+                        dict(bbb.iparse(fmt, filename)),
+                    )
+
+        filename = os.path.join(self.folder, 'annotations.txt')
+        with gzip.open(filename + '.gz', 'rb') as f, open(filename, 'rb') as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_multi_file(self):
+        """ Multi file formats should compress every file with an explicit compression """
+        labels = os.path.join(self.folder, 'labels')
+        os.makedirs(labels)
+        bbb.generate('anno_kitti', self.annotations, labels)
+        expected = bbb.parse('anno_kitti', labels)
+
+        compressed = os.path.join(self.folder, 'compressed')
+        os.makedirs(compressed)
+        bbb.generate(
+            'anno_kitti', self.annotations, compressed, workers=2, compression='bz2'
+        )
+        self.assertIn('img_000.txt.bz2', os.listdir(compressed))
+        self.assertEqual(bbb.parse('anno_kitti', compressed), expected)
+        self.assertEqual(bbb.parse('anno_kitti', compressed, workers=2), expected)
+        self.assertEqual(
+            bbb.parse('anno_kitti', compressed, columnar=True).to_dict(), expected
+        )
+        self.assertEqual(dict(bbb.iparse('anno_kitti', compressed)), expected)
+
+        cache = os.path.join(self.folder, 'cache')
+        for _ in range(2):
+            self.assertEqual(
+                bbb.parse('anno_kitti', compressed, cache_dir=cache), expected
+            )
+
+        archive = os.path.join(self.folder, 'labels.tar')
+        bbb.generate('anno_kitti', self.annotations, archive, compression='gzip')
+        with tarfile.open(archive) as tar:
+            self.assertIn('img_000.txt.gz', tar.getnames())
+        self.assertEqual(bbb.parse('anno_kitti', archive), expected)
+        self.assertEqual(
+            bbb.parse('anno_kitti', [archive + '::img_001.txt.gz']),
+            {'img_001': expected['img_001']},
+        )
+
+    def test_explicit(self):
+        """ An explicit compression should override the extension """
+        filename = os.path.join(self.folder, 'annotations.txt')
+        bbb.generate('anno_vatic', self.frames, filename + '.orig', compression=None)
+        bbb.generate('anno_vatic', self.frames, filename, compression='bz2')
+        with open(filename, 'rb') as f, open(filename + '.orig', 'rb') as g:
+            self.assertEqual(bz2.decompress(f.read()), g.read())
+
+        expected = bbb.parse('anno_vatic', filename + '.orig')
+        self.assertEqual(bbb.parse('anno_vatic', filename, compression='bz2'), expected)
+        with self.assertRaises(ValueError):
+            bbb.parse('anno_vatic', filename, compression='zstd')
+
+        shutil.copy(filename, filename + '.gz')
+        self.assertEqual(
+            bbb.parse('anno_vatic', filename + '.gz', compression='bz2'), expected
+        )
+
+    def test_cache(self):
+        """ The compression should be part of the cache key """
+        filename = os.path.join(self.folder, 'annotations.txt.gz')
+        bbb.generate('anno_vatic', self.frames, filename, compression=None)
+        expected = bbb.parse('anno_vatic', filename, compression=None)
+
+        cache = os.path.join(self.folder, 'cache')
+        self.assertEqual(
+            bbb.parse('anno_vatic', filename, compression=None, cache_dir=cache), expected
+        )
+        with self.assertRaises(OSError):
+            bbb.parse('anno_vatic', filename, cache_dir=cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
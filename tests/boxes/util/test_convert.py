@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import brambox.boxes as bbb
+
+
+def random_annotations(seed, num_images=20):
+    """ Create random annotations with integer coordinates """
+    rng = random.Random(seed)
+    annotations = {}
+    for i in range(num_images):
+        annotations[f'img_{i:03d}'] = []
+        for _ in range(rng.randint(0, 6)):
+            anno = bbb.Annotation()
+            anno.class_label = rng.choice(('person', 'car'))
+            anno.x_top_left = float(rng.randint(0, 100))
+            anno.y_top_left = float(rng.randint(0, 100))
+            anno.width = float(rng.randint(5, 50))
+            anno.height = float(rng.randint(5, 50))
+            annotations[f'img_{i:03d}'].append(anno)
+
+    return annotations
+
+
+class TestParse(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.annotations = random_annotations(0)
+        bbb.generate('anno_kitti', self.annotations, self.folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_workers(self):
+        """ Parsing files concurrently should give the same result in the same order """
+        expected = bbb.parse('anno_kitti', self.folder)
+        self.assertEqual(list(expected.keys()), sorted(self.annotations.keys()))
+        for executor in ('thread', 'process'):
+            result = bbb.parse('anno_kitti', self.folder, workers=3, executor=executor)
+            self.assertEqual(list(result.keys()), list(expected.keys()))
+            self.assertEqual(result, expected)
+
+        self.assertRaises(
+            ValueError,
+            bbb.parse,
+            'anno_kitti',
+            self.folder,
+            workers=2,
+            executor='unknown',
+        )
+
+    def test_workers_duplicate(self):
+        """ Duplicate image identifiers should raise the same error """
+        os.makedirs(os.path.join(self.folder, 'sub'))
+        shutil.copy(
+            os.path.join(self.folder, 'img_003.txt'), os.path.join(self.folder, 'sub')
+        )
+        with self.assertRaises(ValueError) as sequential:
+            bbb.parse('anno_kitti', self.folder)
+        with self.assertRaises(ValueError) as concurrent:
+            bbb.parse('anno_kitti', self.folder, workers=2)
+        self.assertEqual(str(sequential.exception), str(concurrent.exception))
+
+    def test_columnar(self):
+        """ Columnar parsing should give the same boxes as parsing every file """
+        formats = {
+            'anno_kitti': {},
+            'anno_cvc': {},
+            'anno_dollar': {},
+            'anno_darknet': {
+                'image_width': 640,
+                'image_height': 480,
+                'class_label_map': ['person', 'car'],
+            },
+        }
+        for fmt, kwargs in formats.items():
+            folder = os.path.join(self.folder, fmt)
+            os.makedirs(folder)
+            bbb.generate(fmt, self.annotations, folder, **kwargs)
+            expected = bbb.parse(fmt, folder, **kwargs)
+            result = bbb.parse(fmt, folder, columnar=True, **kwargs)
+            self.assertIsInstance(result, bbb.BoxSet)
+            self.assertEqual(list(result.keys()), list(expected.keys()))
+            self.assertEqual(result.to_dict(), expected)
+            result = bbb.parse(fmt, folder, columnar=True, workers=2, **kwargs)
+            self.assertEqual(result.to_dict(), expected)
+
+    def test_columnar_fallback(self):
+        """ Lines that cannot be converted at once should be deserialized one by one """
+        with open(os.path.join(self.folder, 'img_003.txt'), 'a') as f:
+            f.write('person 0.00 0 -10 1.00 2.00 3.00 4.00 -1 -1 -1 -1000 -1000 -1000\n')
+        expected = bbb.parse('anno_kitti', self.folder)
+        result = bbb.parse('anno_kitti', self.folder, columnar=True)
+        self.assertEqual(result.to_dict(), expected)
+
+        with open(os.path.join(self.folder, 'img_004.txt'), 'a') as f:
+            f.write('person\n')
+        self.assertRaises(IndexError, bbb.parse, 'anno_kitti', self.folder)
+        self.assertRaises(IndexError, bbb.parse, 'anno_kitti', self.folder, columnar=True)
+
+    def test_iparse_multi_file(self):
+        """ Iterating over a multi file format should give the same boxes as parsing it """
+        expected = bbb.parse('anno_kitti', self.folder)
+        result = list(bbb.iparse('anno_kitti', self.folder))
+        self.assertEqual(result, list(expected.items()))
+
+        result = list(bbb.iparse('anno_kitti', self.folder, offset=1, stride=3))
+        expected = bbb.parse('anno_kitti', self.folder, offset=1, stride=3)
+        self.assertEqual(result, list(expected.items()))
+
+    def test_iparse_single_file(self):
+        """ Line based formats should yield every group of consecutive lines """
+        filename = os.path.join(self.folder, 'annotations.txt')
+        annotations = {i: boxes for i, boxes in enumerate(self.annotations.values())}
+        bbb.generate('anno_vatic', annotations, filename)
+        expected = bbb.parse('anno_vatic', filename)
+        result = list(bbb.iparse('anno_vatic', filename))
+        self.assertEqual(dict(result), {k: v for k, v in expected.items() if len(v)})
+        self.assertEqual(len(result), len(dict(result)))
+
+        filename = os.path.join(self.folder, 'detections.txt')
+        with open(filename, 'w') as f:
+            f.write('img_1 0.9 1 1 10 10\n')
+            f.write('img_1 0.8 5 5 10 10\n')
+            f.write('img_2 0.7 1 1 10 10\n')
+            f.write('img_1 0.6 2 2 10 10\n')
+        result = list(bbb.iparse('det_pascalvoc', filename, class_label_map=['person']))
+        self.assertEqual([img_id for img_id, _ in result], ['img_1', 'img_2', 'img_1'])
+        self.assertEqual([len(boxes) for _, boxes in result], [2, 1, 1])
+        self.assertEqual(result[2][1][0].confidence, 0.6)
+
+    def test_select_single_file(self):
+        """ Selecting images from a single file should give the same result as selecting them after parsing """
+        filename = os.path.join(self.folder, 'annotations.txt')
+        annotations = {i: boxes for i, boxes in enumerate(self.annotations.values())}
+        bbb.generate('anno_vatic', annotations, filename)
+        full = bbb.parse('anno_vatic', filename)
+        for offset, stride in ((0, 1), (3, 1), (0, 4), (2, 3), (7, 2)):
+            removed = sorted(full.keys())[:offset]
+            keys = [k for k in full if k not in removed]
+            if stride > 1:
+                keys = sorted(keys)[::stride]
+            expected = {k: full[k] for k in keys}
+            result = bbb.parse('anno_vatic', filename, offset=offset, stride=stride)
+            self.assertEqual(result, expected)
+            self.assertEqual(list(result.keys()), keys)
+
+        result = bbb.parse('anno_vatic', filename, image_filter={'2', '5', '99'})
+        self.assertEqual(result, {k: full[k] for k in ('2', '5')})
+        result = bbb.parse('anno_vatic', filename, image_filter=lambda i: int(i) < 3)
+        self.assertEqual(result, {k: full[k] for k in ('0', '1', '2') if k in full})
+
+    def test_select_deserialize(self):
+        """ Parsers that select images while deserializing should give the same result """
+        calls = []
+
+        class SelectingParser(bbb.formats['anno_pickle']):
+            def deserialize_selection(self, f, select, image_filter=None):
+                data = self.deserialize_file(f)
+                img_ids = select([i for i in data if image_filter is None or image_filter(i)])
+                calls.append(img_ids)
+                return {img_id: data[img_id] for img_id in img_ids}
+
+        filename = os.path.join(self.folder, 'annotations.pkl')
+        bbb.generate('anno_pickle', self.annotations, filename)
+        for offset, stride in ((3, 1), (2, 3)):
+            expected = bbb.parse('anno_pickle', filename, offset=offset, stride=stride)
+            result = bbb.parse(SelectingParser, filename, offset=offset, stride=stride)
+            self.assertEqual(list(result.items()), list(expected.items()))
+            self.assertEqual(calls.pop(), list(expected.keys()))
+
+        result = bbb.parse(
+            SelectingParser, filename, stride=2, image_filter=lambda i: i < 'img_010'
+        )
+        self.assertEqual(list(result.keys()), [f'img_00{i}' for i in range(0, 10, 2)])
+
+    def test_select_multi_file(self):
+        """ Filtered out files should not be read """
+        full = bbb.parse('anno_kitti', self.folder)
+        expected = {k: full[k] for k in ('img_001', 'img_007')}
+        for kwargs in ({}, {'workers': 2}, {'columnar': True}):
+            result = bbb.parse(
+                'anno_kitti', self.folder, image_filter={'img_001', 'img_007'}, **kwargs
+            )
+            self.assertEqual(dict(result.items()), expected)
+
+        with open(os.path.join(self.folder, 'broken.txt'), 'w') as f:
+            f.write('person\n')
+        result = bbb.parse(
+            'anno_kitti', self.folder, image_filter=lambda i: i.startswith('img_')
+        )
+        self.assertEqual(result, full)
+
+    def test_selection(self):
+        """ Selecting boxes while parsing should give the same result as discarding them afterwards """
+        rng = random.Random(1)
+        folder = os.path.join(self.folder, 'detections')
+        os.makedirs(folder)
+        dollar = os.path.join(folder, 'dollar.txt')
+        pascalvoc = os.path.join(folder, 'pascalvoc.txt')
+        coco = os.path.join(folder, 'coco.json')
+        with open(dollar, 'w') as fd, open(pascalvoc, 'w') as fp, open(coco, 'w') as fc:
+            coco_dets = []
+            for img in (3, 1, 2, 3, 5):
+                for _ in range(rng.randint(0, 8)):
+                    score = rng.choice((0.1, 0.4, 0.5, 0.9, rng.random()))
+                    fd.write(f'{img},1,2,10,20,{score}\n')
+                    fp.write(f'img_{img} {score} 1 2 10 20\n')
+                    coco_dets.append(
+                        f'{{"image_id": {img}, "category_id": {rng.randint(1, 2)}, "bbox": [1, 2, 10, 20], "score": {score}}}'
+                    )
+            fc.write('[' + ', '.join(coco_dets) + ']')
+
+        files = {
+            'det_dollar': (dollar, {'class_label_map': ['person']}),
+            'det_pascalvoc': (pascalvoc, {'class_label': 'person'}),
+            'det_coco': (coco, {'class_label_map': ['person', 'car']}),
+        }
+        selections = (
+            {'min_confidence': 0.4},
+            {'class_labels': ['person']},
+            {'class_labels': ['car'], 'top_k_per_image': 2},
+            {'top_k_per_image': 3, 'min_confidence': 0.2},
+        )
+        for fmt, (filename, kwargs) in files.items():
+            full = bbb.parse(fmt, filename, **kwargs)
+            for selection in selections:
+                top_k = selection.get('top_k_per_image')
+                expected = {}
+                for img_id, dets in full.items():
+                    dets = [
+                        d
+                        for d in dets
+                        if d.confidence >= selection.get('min_confidence', 0)
+                        and d.class_label
+                        in selection.get('class_labels', [d.class_label])
+                    ]
+                    if top_k is not None:
+                        best = sorted(dets, key=lambda d: -d.confidence)[:top_k]
+                        dets = [d for d in dets if any(d is b for b in best)]
+                    expected[img_id] = dets
+
+                result = bbb.parse(fmt, filename, **selection, **kwargs)
+                self.assertEqual(result, expected, f'{fmt} {selection}')
+
+        shutil.rmtree(folder)
+        expected = {
+            img_id: [a for a in annos if a.class_label == 'car']
+            for img_id, annos in bbb.parse('anno_kitti', self.folder).items()
+        }
+        result = bbb.parse('anno_kitti', self.folder, class_labels=['car'])
+        self.assertEqual(result, expected)
+        result = bbb.parse('anno_kitti', self.folder, class_labels=['car'], columnar=True)
+        self.assertEqual(result.to_dict(), expected)
+        self.assertRaises(
+            ValueError, bbb.parse, 'anno_kitti', self.folder, min_confidence=0.5
+        )
+
+    def test_npz(self):
+        """ The npz formats should be parsed lazily with columnar parsing """
+        filename = os.path.join(self.folder, 'annotations.npz')
+        bbb.generate('anno_npz', self.annotations, filename)
+        self.assertEqual(bbb.parse('anno_npz', filename), self.annotations)
+
+        result = bbb.parse('anno_npz', filename, columnar=True)
+        self.assertIsInstance(result, bbb.BoxSet)
+        self.assertEqual(result.to_dict(), self.annotations)
+
+        keys = sorted(self.annotations.keys())[2::3]
+        result = bbb.parse('anno_npz', filename, offset=2, stride=3, columnar=True)
+        self.assertEqual(list(result.keys()), keys)
+        self.assertEqual(result.to_dict(), {k: self.annotations[k] for k in keys})
+        result = bbb.parse(
+            'anno_npz', filename, identify=lambda img_id: img_id[4:], image_filter=['001']
+        )
+        self.assertEqual(result, {'001': self.annotations['img_001']})
+
+        # A BoxSet is written from its arrays, without creating annotations
+        boxes = bbb.parse('anno_npz', filename, columnar=True)
+        filename = os.path.join(self.folder, 'copy.npz')
+        with mock.patch.object(bbb.BoxSet, '__getitem__', side_effect=AssertionError):
+            bbb.generate('anno_npz', boxes, filename)
+        self.assertEqual(bbb.parse('anno_npz', filename), self.annotations)
+
+    def test_cache(self):
+        """ Cached parsing should give the same result and only reparse modified files """
+        cache_dir = os.path.join(self.folder, 'cache')
+        folder = os.path.join(self.folder, 'labels')
+        os.makedirs(folder)
+        bbb.generate('anno_kitti', self.annotations, folder)
+        expected = bbb.parse('anno_kitti', folder)
+
+        self.assertEqual(bbb.parse('anno_kitti', folder, cache_dir=cache_dir), expected)
+        cache = bbb.ParseCache(cache_dir)
+        self.assertEqual(len(cache.entries()), 1)
+        self.assertEqual(bbb.parse('anno_kitti', folder, cache_dir=cache), expected)
+        self.assertEqual(
+            bbb.parse('anno_kitti', folder, cache_dir=cache, workers=2), expected
+        )
+
+        # Modified file
+        annotations = {
+            'img_003': self.annotations['img_004'] + self.annotations['img_005']
+        }
+        bbb.generate('anno_kitti', annotations, folder)
+        deserialized = []
+
+        def deserialize(parser, box_files):
+            deserialized.extend(box_files)
+            return bbb.ParseCache.deserialize(parser, box_files)
+
+        box_files = sorted(os.path.join(folder, f) for f in os.listdir(folder))
+        parser = bbb.formats['anno_kitti']()
+        result = cache.load(parser, box_files, {}, deserialize)
+        self.assertEqual(deserialized, [os.path.join(folder, 'img_003.txt')])
+        self.assertEqual(result, list(bbb.parse('anno_kitti', folder).values()))
+        self.assertEqual(len(cache.entries()), 1)
+
+        # Eviction
+        cache.max_size = 0
+        self.assertEqual(cache.evict(), 1)
+        self.assertEqual(cache.size, 0)
+        self.assertEqual(
+            bbb.parse('anno_kitti', folder, cache_dir=cache_dir),
+            dict(zip(expected.keys(), result)),
+        )
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+
+
+class TestGenerate(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.annotations = random_annotations(1)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_iterator(self):
+        """ Generating from an iterator should give the same files as generating from a dictionary """
+        dict_folder = os.path.join(self.folder, 'dict')
+        iter_folder = os.path.join(self.folder, 'iterator')
+        os.makedirs(dict_folder)
+        os.makedirs(iter_folder)
+        bbb.generate('anno_kitti', self.annotations, dict_folder)
+        bbb.generate('anno_kitti', bbb.iparse('anno_kitti', dict_folder), iter_folder)
+        self.assertEqual(
+            bbb.parse('anno_kitti', iter_folder), bbb.parse('anno_kitti', dict_folder)
+        )
+
+        annotations = {i: boxes for i, boxes in enumerate(self.annotations.values())}
+        filename = os.path.join(self.folder, 'annotations.txt')
+        bbb.generate('anno_vatic', annotations, filename)
+        with open(filename) as f:
+            expected = f.read()
+        bbb.generate('anno_vatic', iter(annotations.items()), filename)
+        with open(filename) as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_workers(self):
+        """ Writing files concurrently should give the same files """
+        annotations = {
+            f'set{i % 3}/{k}': v for i, (k, v) in enumerate(self.annotations.items())
+        }
+        bbb.generate('anno_kitti', annotations, self.folder)
+        expected = bbb.parse('anno_kitti', self.folder, identify=str)
+
+        for atomic in (False, True):
+            folder = tempfile.mkdtemp()
+            try:
+                counts = []
+                bbb.generate(
+                    'anno_kitti',
+                    iter(annotations.items()),
+                    folder,
+                    workers=3,
+                    atomic=atomic,
+                    progress=lambda count, elapsed: counts.append(count),
+                )
+                self.assertEqual(counts, list(range(1, len(annotations) + 1)))
+                self.assertEqual(
+                    sorted(os.listdir(os.path.join(folder, 'set0'))),
+                    sorted(os.listdir(os.path.join(self.folder, 'set0'))),
+                )
+                result = bbb.parse('anno_kitti', folder, identify=str)
+                self.assertEqual(
+                    [v for k, v in sorted(result.items())],
+                    [v for k, v in sorted(expected.items())],
+                )
+            finally:
+                shutil.rmtree(folder)
+
+    def test_workers_error(self):
+        """ Errors of the workers should be raised in the calling thread """
+
+        class FailingParser(bbb.formats['anno_kitti']):
+            def serialize(self, annotations):
+                if len(annotations) > 0:
+                    raise RuntimeError('Cannot serialize')
+                return super().serialize(annotations)
+
+        items = [(f'img_{i:03d}', [bbb.Annotation()] if i == 5 else []) for i in range(50)]
+        with self.assertRaises(RuntimeError):
+            bbb.generate(FailingParser, iter(items), self.folder, workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import brambox.boxes as bbb
+from .test_convert import random_annotations
+
+
+def random_detections(seed, num_images=50):
+    """ Create random detections """
+    rng = random.Random(seed)
+    detections = {}
+    for i in range(num_images):
+        detections[i] = []
+        for _ in range(rng.randint(0, 8)):
+            det = bbb.Detection()
+            det.class_label = rng.choice(('zebra', 'car', 'person'))
+            det.x_top_left = float(rng.randint(0, 500))
+            det.width = float(rng.randint(5, 300))
+            det.height = float(rng.randint(5, 300))
+            det.confidence = rng.random()
+            detections[i].append(det)
+
+    return detections
+
+
+class TestBoxDatabase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'boxes.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_annotations(self):
+        """ Annotations should be stored without loss and keep their image order """
+        annotations = random_annotations(0)
+        for annos in annotations.values():
+            for i, anno in enumerate(annos):
+                anno.ignore = i % 2 == 0
+                anno.occluded_fraction = 0.25 * i
+                anno.object_id = i
+        with bbb.BoxDatabase(self.filename) as db:
+            db.insert(annotations)
+
+        with bbb.BoxDatabase(self.filename) as db:
+            self.assertEqual(len(db), len(annotations))
+            self.assertEqual(db.image_ids(), list(annotations.keys()))
+            self.assertEqual(db.query(empty_images=True), annotations)
+            self.assertEqual(
+                db.query(), {k: v for k, v in annotations.items() if len(v) > 0}
+            )
+            self.assertEqual(
+                db.query(class_label='car', empty_images=True),
+                {
+                    k: [a for a in v if a.class_label == 'car']
+                    for k, v in annotations.items()
+                },
+            )
+            self.assertRaises(ValueError, db.query, min_confidence=0.5)
+
+    def test_query(self):
+        """ Queries should give the same result as filtering the boxes """
+        detections = random_detections(1)
+        with bbb.BoxDatabase(self.filename) as db:
+            db.insert(detections.items())
+
+            def expected(fn):
+                result = {k: [d for d in v if fn(d)] for k, v in detections.items()}
+                return {k: v for k, v in result.items() if len(v) > 0}
+
+            self.assertEqual(
+                db.query(
+                    class_label='zebra', min_confidence=0.3, min_height=50, max_height=200
+                ),
+                expected(
+                    lambda d: d.class_label == 'zebra'
+                    and d.confidence >= 0.3
+                    and 50 <= d.height <= 200
+                ),
+            )
+            self.assertEqual(
+                db.query(class_label=['car', 'person'], max_confidence=0.5),
+                expected(
+                    lambda d: d.class_label in ('car', 'person') and d.confidence <= 0.5
+                ),
+            )
+            self.assertEqual(
+                db.query(min_area=2000, max_area=10000, min_width=20, max_width=100),
+                expected(
+                    lambda d: 2000 <= d.width * d.height <= 10000 and 20 <= d.width <= 100
+                ),
+            )
+            self.assertEqual(
+                db.query(where='x_top_left + width > ?', parameters=(400,)),
+                expected(lambda d: d.x_top_left + d.width > 400),
+            )
+
+            image_ids = [30, 2, 7, 1000]
+            result = db.query(image_ids=image_ids, empty_images=True)
+            self.assertEqual(list(result.keys()), [2, 7, 30])
+            self.assertEqual(result, {k: detections[k] for k in (2, 7, 30)})
+
+    def test_insert(self):
+        """ Inserting boxes of an existing image should add them to that image """
+        detections = random_detections(2, 3)
+        with bbb.BoxDatabase(':memory:') as db:
+            self.assertEqual(db.query(), {})
+            db.insert({0: []})
+            self.assertEqual(db.query(empty_images=True), {0: []})
+            db.insert(detections)
+            db.insert({1: detections[0]})
+            result = db.query(empty_images=True)
+            self.assertEqual(list(result.keys()), [0, 1, 2])
+            self.assertEqual(result[1], detections[1] + detections[0])
+
+            annotation = bbb.Annotation()
+            annotation.class_label = 'zebra'
+            db.insert({'img': [annotation]})
+            self.assertEqual(db.query(image_ids=['img'])['img'][0].confidence, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
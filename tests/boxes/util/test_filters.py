@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import random
 import unittest
 import brambox.boxes as bbb
 
@@ -101,5 +102,39 @@ class TestOcclusionAreaFilter(unittest.TestCase):
         self.assertFalse(self.f(self.anno))
 
 
+class TestMatchFilter(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.boxes = []
+        for _ in range(400):
+            box = bbb.Box()
+            box.class_label = rng.choice(('a', 'b'))
+            box.x_top_left = rng.randint(0, 500)
+            box.y_top_left = rng.randint(0, 50)
+            box.width = rng.randint(5, 40)
+            box.height = rng.randint(5, 40)
+            self.boxes.append(box)
+        self.queries = [bbb.Box.create(box) for box in self.boxes[::3]]
+        for box in self.queries:
+            box.x_top_left += rng.randint(-5, 5)
+
+    def test_index(self):
+        """The spatial index should give the same matches as comparing all boxes
+        """
+        for remove in (True, False):
+            for fn in (bbb.iou, bbb.ioa):
+                indexed = bbb.MatchFilter(self.boxes, remove, 0.3, fn)
+                self.assertIsNotNone(indexed.index)
+                plain = bbb.MatchFilter(self.boxes, remove, 0.3, fn)
+                plain.index = None
+
+                for box in self.queries:
+                    self.assertEqual(indexed(box), plain(box))
+                self.assertEqual(
+                    [(b.x_top_left, b.y_top_left) for b in indexed.boxes],
+                    [(b.x_top_left, b.y_top_left) for b in plain.boxes],
+                )
+
+
 if __name__ == '__main__':
     unittest.main()
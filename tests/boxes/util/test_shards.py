@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import brambox.boxes as bbb
+from .test_convert import random_annotations
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.annotations = random_annotations(0, 50)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_generate(self):
+        """ A sharded dataset should give the same boxes as the parser of its format """
+        labels = os.path.join(self.folder, 'labels')
+        os.makedirs(labels)
+        bbb.generate('anno_kitti', self.annotations, labels)
+        expected = bbb.parse('anno_kitti', labels)
+
+        dataset = os.path.join(self.folder, 'dataset')
+        progress = []
+        bbb.generate(
+            'anno_kitti',
+            self.annotations,
+            dataset,
+            shards=4,
+            progress=lambda count, _: progress.append(count),
+        )
+        self.assertEqual(progress, list(range(1, 51)))
+        self.assertEqual(len(os.listdir(dataset)), 5)
+
+        with bbb.ShardReader(dataset, 'anno_kitti') as reader:
+            self.assertEqual(len(reader), 50)
+            self.assertEqual(list(reader.keys()), list(self.annotations.keys()))
+            self.assertEqual(reader['img_013'], expected['img_013'])
+            self.assertEqual(dict(reader.items()), expected)
+            self.assertNotIn('img_100', reader)
+            self.assertIsNone(reader.get('img_100'))
+
+    def test_generate_options(self):
+        """ Options that are not supported for sharded datasets should raise a ValueError """
+        dataset = os.path.join(self.folder, 'dataset')
+        for option in ({'workers': 2}, {'atomic': True}, {'compression': 'gzip'}):
+            with self.subTest(**option):
+                with self.assertRaises(ValueError):
+                    bbb.generate('anno_kitti', self.annotations, dataset, shards=2, **option)
+                self.assertFalse(os.path.exists(dataset))
+
+        bbb.generate('anno_kitti', self.annotations, dataset, shards=2, workers=1, compression=None)
+        with bbb.ShardReader(dataset, 'anno_kitti') as reader:
+            self.assertEqual(len(reader), 50)
+
+    def test_single_file(self):
+        """ Single file formats should store every image as a separate record """
+        annotations = {i: boxes for i, boxes in enumerate(self.annotations.values())}
+        filename = os.path.join(self.folder, 'annotations.txt')
+        bbb.generate('anno_vatic', annotations, filename)
+        expected = bbb.parse('anno_vatic', filename)
+
+        dataset = os.path.join(self.folder, 'dataset')
+        bbb.generate('anno_vatic', annotations, dataset, shards=3)
+        with bbb.ShardReader(dataset, 'anno_vatic') as reader:
+            self.assertEqual(list(reader.keys()), list(annotations.keys()))
+            for img_id, boxes in reader.items():
+                self.assertEqual(boxes, expected.get(str(img_id), []))
+
+    def test_writer(self):
+        """ Test duplicate images, interrupted writes and concurrent reads """
+        dataset = os.path.join(self.folder, 'dataset')
+        with bbb.ShardWriter(dataset, 'anno_pickle', shards=2) as writer:
+            writer.write('img_000', self.annotations['img_000'])
+            self.assertRaises(
+                ValueError, writer.write, 'img_000', self.annotations['img_000']
+            )
+
+        with self.assertRaises(RuntimeError):
+            with bbb.ShardWriter(self.folder, 'anno_pickle') as writer:
+                writer.write('img_000', self.annotations['img_000'])
+                raise RuntimeError('interrupted')
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'index.npz')))
+
+        bbb.generate('anno_pickle', self.annotations, dataset, shards=3)
+        reader = bbb.ShardReader(dataset, 'anno_pickle')
+        errors = []
+
+        def read():
+            for img_id, boxes in self.annotations.items():
+                if reader[img_id] != boxes:
+                    errors.append(img_id)
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        reader.close()
+        self.assertEqual(errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()